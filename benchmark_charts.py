@@ -0,0 +1,76 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Compare building and serialising the comparison charts as plain dict figures
+(hero_comparison_figure) against the previous path through plotly.graph_objects.
+
+Usage: python benchmark_charts.py [number of heroes] [repetitions]  (default 40 and 200)
+'''
+
+import json
+import sys
+import time
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from final_proj_commandline import hero_comparison_figure, CMP_CHART_SPECS, ROLE_STAT_METRICS
+
+
+def build_benchmark_hero_stats(hero_count):
+    '''Make up hero stats shaped like the ones select_hero_stats returns.
+
+    Parameters
+    ----------
+    hero_count: int
+        the number of heroes
+
+    Returns
+    -------
+    dict
+        the names, metrics and percentiles of the heroes
+    '''
+    generator = np.random.default_rng(0)
+    hero_stats = {'name': np.array(['Hero' + str(i) for i in range(hero_count)], dtype=object)}
+    for metric in ROLE_STAT_METRICS:
+        hero_stats[metric] = generator.uniform(0, 600, hero_count)
+    hero_stats['percentiles'] = generator.uniform(0, 100, (hero_count, len(ROLE_STAT_METRICS)))
+    return hero_stats
+
+
+def graph_objects_figure(hero_stats, cmp_choice):
+    '''the figure as hero_comparison_barplot built it before, with validated Plotly objects'''
+    spec = CMP_CHART_SPECS[cmp_choice]
+    if (spec['type'] == 'pie'):
+        data = go.Pie(labels=hero_stats['name'], values=hero_stats[spec['metric']])
+        layout = go.Layout(title=spec['title'])
+    elif (spec['type'] == 'grouped_bar'):
+        data = []
+        for metric_index, label in enumerate(ROLE_STAT_METRICS.values()):
+            data.append(go.Bar(name=label, x=hero_stats['name'], y=hero_stats['percentiles'][:, metric_index]))
+        layout = go.Layout(title=spec['title'], barmode="group", yaxis=dict(range=[0, 100]))
+    else:
+        data = go.Bar(x=hero_stats['name'], y=hero_stats[spec['metric']])
+        layout = go.Layout(title=spec['title'])
+    return go.Figure(data=data, layout=layout)
+
+
+def measure(label, render, repetitions):
+    '''Print the mean time to build and serialise every comparison chart once'''
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for cmp_choice in CMP_CHART_SPECS:
+            render(cmp_choice)
+    elapsed = time.perf_counter() - start
+    print(label + ": " + str(round(elapsed / (repetitions * len(CMP_CHART_SPECS)) * 1e6)) + " us per chart")
+
+
+if __name__ == "__main__":
+    hero_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    hero_stats = build_benchmark_hero_stats(hero_count)
+    print("Building " + str(len(CMP_CHART_SPECS)) + " charts of " + str(hero_count) + " heroes, " + str(repetitions) + " times")
+    measure("graph_objects figure, to_json", lambda cmp_choice: graph_objects_figure(hero_stats, cmp_choice).to_json(), repetitions)
+    measure("dict figure, pio.to_json without validation", lambda cmp_choice: pio.to_json(hero_comparison_figure(hero_stats, cmp_choice), validate=False), repetitions)
+    measure("dict figure, json.dumps", lambda cmp_choice: json.dumps(hero_comparison_figure(hero_stats, cmp_choice)), repetitions)
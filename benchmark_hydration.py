@@ -0,0 +1,138 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Compare loading heroes from the database into the slot-based Hero with
+hero_row_factory against the previous plain Hero filled by set_val_by_list.
+
+Usage: python benchmark_hydration.py [number of heroes]  (default 100000)
+'''
+
+import sqlite3
+import sys
+import time
+import tracemalloc
+from final_proj_commandline import hero_row_factory, create_heroes, create_hero_translations, add_hero, select_localised_heroes, DEFAULT_LOCALE
+
+
+class DictHero:
+    '''the Hero class before it had __slots__, with its attributes in a __dict__'''
+    def __init__(self, role="", name="", description="", abilities=None, quote="", hero_pose_url="", health="0", armor="0", shield="0", real_name="", age="", nationality="", occupation="", base="", affiliation="", pick_rate=0, win_rate=0, tie_rate=0, on_fire_rate=0, slug=""):
+        self.role = role
+        self.name = name
+        self.description = description
+        self.abilities = abilities
+        self.quote = quote
+        self.hero_pose_url = hero_pose_url
+        self.health = health
+        self.armor = armor
+        self.shield = shield
+        self.real_name = real_name
+        self.age = age
+        self.nationality = nationality
+        self.occupation = occupation
+        self.base = base
+        self.affiliation = affiliation
+        self.pick_rate = pick_rate
+        self.win_rate = win_rate
+        self.tie_rate = tie_rate
+        self.on_fire_rate = on_fire_rate
+        self.slug = slug
+        self.health_base = 0.0
+        self.armor_base = 0.0
+        self.shield_base = 0.0
+
+    def set_val_by_list(self, list):
+        self.role = list[2]
+        self.name = list[1]
+        self.description = list[3]
+        self.abilities = []
+        self.quote = list[4]
+        self.hero_pose_url = list[18]
+        self.health = list[11]
+        self.armor = list[12]
+        self.shield = list[13]
+        self.real_name = list[5]
+        self.age = list[6]
+        self.nationality = list[7]
+        self.occupation = list[8]
+        self.base = list[9]
+        self.affiliation = list[10]
+        self.pick_rate = float(list[14])
+        self.win_rate = float(list[15])
+        self.tie_rate = float(list[16])
+        self.on_fire_rate = float(list[17])
+        self.slug = list[19]
+        self.health_base = list[20]
+        self.armor_base = list[22]
+        self.shield_base = list[24]
+
+
+def build_benchmark_database(hero_count):
+    '''Build an in-memory database with the heroes and hero_translations tables
+    filled with hero_count made-up heroes.
+
+    Parameters
+    ----------
+    hero_count: int
+        the number of heroes
+
+    Returns
+    -------
+    connection
+        a connection to the database
+    '''
+    connection = sqlite3.connect(':memory:')
+    connection.execute(create_heroes)
+    connection.execute(create_hero_translations)
+    roles = ['Tank', 'Damage', 'Support']
+    connection.executemany(add_hero, (
+        ('Hero' + str(i), roles[i % 3], 'A hero of the benchmark.', 'Benchmark!', 'Real Name ' + str(i), str(20 + i % 50),
+         'Egyptian', 'Sharpshooter', 'Cairo, Egypt', 'Overwatch', str(200 + i % 400), str(i % 300), str(i % 200),
+         i % 10, 40 + i % 20, 1.5, i % 15, 'https://example.com/' + str(i) + '.png', 'hero' + str(i),
+         200 + i % 400, None, i % 300, None, i % 200, None)
+        for i in range(hero_count)))
+    return connection
+
+
+def measure(label, hydrate, repetitions=3):
+    '''Print the best throughput of a hydration function over a few runs, then the
+    memory it takes in another run under tracemalloc, which would slow down the others'''
+    elapsed = float('inf')
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        heroes = hydrate()
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del heroes
+    tracemalloc.start()
+    heroes = hydrate()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    hero = heroes[0]
+    object_size = sys.getsizeof(hero) + (sys.getsizeof(hero.__dict__) if hasattr(hero, '__dict__') else 0)
+    print(label + ": " + str(round(len(heroes) / elapsed)) + " heroes/s, " + str(object_size) + " bytes per object, "
+        + str(round(memory / len(heroes))) + " bytes per hero including its values")
+
+
+def hydrate_dict_heroes(connection):
+    heroes = []
+    for row in connection.execute(select_localised_heroes, [DEFAULT_LOCALE]).fetchall():
+        hero = DictHero()
+        hero.set_val_by_list(row)
+        heroes.append(hero)
+    return heroes
+
+
+def hydrate_slot_heroes(connection):
+    cursor = connection.cursor()
+    cursor.row_factory = hero_row_factory
+    return cursor.execute(select_localised_heroes, [DEFAULT_LOCALE]).fetchall()
+
+
+if __name__ == "__main__":
+    hero_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    connection = build_benchmark_database(hero_count)
+    print("Hydrating " + str(hero_count) + " heroes")
+    measure("set_val_by_list into a __dict__ Hero", lambda: hydrate_dict_heroes(connection))
+    measure("hero_row_factory into the __slots__ Hero", lambda: hydrate_slot_heroes(connection))
@@ -4,24 +4,56 @@
 #################################
 
 from bs4 import BeautifulSoup
-import plotly.graph_objects as go 
+import plotly.io as pio
+import numpy as np
 import requests
 import json
 import time
 import re
 import webbrowser
+import sys
 import sqlite3
+import threading
+import operator
+import queue
+import os
+import uuid
+import math
+import hashlib
+import tarfile
+import io
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 wiki_file = Path("./hero_wiki.sqlite")
+## a packaged finished build, restored on a machine without hero_wiki.sqlite instead of scraping
+wiki_snapshot_file = Path(os.environ.get("HERO_WIKI_SNAPSHOT", "./hero_wiki_snapshot.tar.gz"))
 
 OFFICAL_WEBSITE_URL = 'https://playoverwatch.com'
 GAMEPEDIA_WEBSITE_URL = 'https://overwatch.gamepedia.com'
 OVERBUFF_WEBSITE_URL = 'https://www.overbuff.com/heroes'
-OFFICAL_WEBSITE_INDEX_PATH = '/en-us/heroes/'
+OFFICAL_WEBSITE_INDEX_PATH = '/{locale}/heroes/'
 GAMEPEDIA_WEBSITE_INDEX_PATH = '/Heroes'
 CACHE_FILE_NAME = 'cache.json'
 CACHE_DICT = {}
+CACHE_LOCK = threading.Lock()
+READ_CONNECTIONS = queue.LifoQueue()
+
+## searches are answered from an in-memory copy of hero_wiki.sqlite, which costs about
+## the size of the file in RAM once per process (shared by all of its read connections);
+## set HERO_WIKI_SERVE_FROM=disk to read the file directly instead
+SERVE_FROM_MEMORY = os.environ.get("HERO_WIKI_SERVE_FROM", "memory") != "disk"
+SNAPSHOT_CHECK_INTERVAL = 5 # seconds between checks of the file for a new data version
+MEMORY_SNAPSHOT = {'generation': 0, 'uri': None, 'anchor': None, 'data_version': None, 'checked_at': 0.0}
+HERO_STATS_STORES = {} # key is a locale, see get_hero_stats_store
+SNAPSHOT_LOCK = threading.RLock()
+SNAPSHOT_FILE_FORMAT = 2 # increase when the tables change, older snapshot files are then refused
+
+## the default locale is stored in heroes/abilities, the others only keep
+## the text that differs from it in hero_translations/ability_translations
+DEFAULT_LOCALE = 'en-us'
+LOCALES = ['en-us', 'de-de', 'es-es', 'fr-fr', 'ja-jp', 'ko-kr', 'pt-br', 'zh-tw']
 
 headers = {
     'User-Agent': 'UMSI 507 Course Final Project - Overwatch Hero Wiki',
@@ -32,13 +64,13 @@ headers = {
 create_heroes = '''
     CREATE TABLE IF NOT EXISTS "heroes" (
         "Id"          INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-        "Name"        TEXT NOT NULL,
-        "Role"        TEXT NOT NULL,
+        "Name"        TEXT NOT NULL COLLATE NOCASE,
+        "Role"        TEXT NOT NULL COLLATE NOCASE,
         "Description" TEXT NOT NULL,
         "Quote"       TEXT NOT NULL,
         "Real_Name"   TEXT NOT NULL,
         "Age"         TEXT NOT NULL,
-        "Nationality" TEXT NOT NULL,
+        "Nationality" TEXT NOT NULL COLLATE NOCASE,
         "Occupation"  TEXT NOT NULL,
         "Base"        TEXT NOT NULL,
         "Affiliation" TEXT NOT NULL,
@@ -49,7 +81,14 @@ create_heroes = '''
         "Win_Rate"    REAL NOT NULL,
         "Tie_Rate"    REAL NOT NULL,
         "OnFire_Rate" REAL NOT NULL,
-        "Pose_URL"    TEXT NOT NULL
+        "Pose_URL"    TEXT NOT NULL,
+        "Slug"        TEXT NOT NULL,
+        "Health_Base" REAL NOT NULL,
+        "Health_Alt"  REAL,
+        "Armor_Base"  REAL NOT NULL,
+        "Armor_Alt"   REAL,
+        "Shield_Base" REAL NOT NULL,
+        "Shield_Alt"  REAL
     );
 '''
 
@@ -59,16 +98,16 @@ drop_heroes = '''
 
 add_hero = '''
     INSERT INTO heroes
-    VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 '''
 
 create_abilities = '''
     CREATE TABLE IF NOT EXISTS "abilities" (
         "Id"          INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-        "Name"        TEXT NOT NULL,
+        "Name"        TEXT NOT NULL COLLATE NOCASE,
         "Description" TEXT NOT NULL,
         "Stats"       TEXT NOT NULL,
-        "HeroId"      INTEGER NOT NULL,
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
         "Video_URL"   TEXT NOT NULL
     );
 '''
@@ -82,6 +121,418 @@ add_ability = '''
     VALUES (NULL, ?, ?, ?, ?, ?)
 '''
 
+create_hero_translations = '''
+    CREATE TABLE IF NOT EXISTS "hero_translations" (
+        "HeroId"      INTEGER NOT NULL,
+        "Locale"      TEXT NOT NULL,
+        "Name"        TEXT COLLATE NOCASE,
+        "Role"        TEXT,
+        "Description" TEXT,
+        "Quote"       TEXT,
+        PRIMARY KEY ("HeroId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_translations = '''
+    DROP TABLE IF EXISTS "hero_translations";
+'''
+
+add_hero_translation = '''
+    INSERT INTO hero_translations
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+create_ability_translations = '''
+    CREATE TABLE IF NOT EXISTS "ability_translations" (
+        "AbilityId"   INTEGER NOT NULL,
+        "Locale"      TEXT NOT NULL,
+        "Name"        TEXT COLLATE NOCASE,
+        "Description" TEXT,
+        PRIMARY KEY ("AbilityId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_ability_translations = '''
+    DROP TABLE IF EXISTS "ability_translations";
+'''
+
+add_ability_translation = '''
+    INSERT INTO ability_translations
+    VALUES (?, ?, ?, ?)
+'''
+
+create_ability_stats = '''
+    CREATE TABLE IF NOT EXISTS "ability_stats" (
+        "AbilityId"     INTEGER NOT NULL REFERENCES "abilities" ("Id"),
+        "Position"      INTEGER NOT NULL,
+        "Key"           TEXT NOT NULL COLLATE NOCASE,
+        "Raw_Value"     TEXT NOT NULL,
+        "Numeric_Value" REAL,
+        "Unit"          TEXT,
+        PRIMARY KEY ("AbilityId", "Position")
+    ) WITHOUT ROWID;
+'''
+
+drop_ability_stats = '''
+    DROP TABLE IF EXISTS "ability_stats";
+'''
+
+add_ability_stat = '''
+    INSERT INTO ability_stats
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+## everything hero.html shows for one hero in one locale, serialised as compact JSON
+create_hero_pages = '''
+    CREATE TABLE IF NOT EXISTS "hero_pages" (
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
+        "Locale"      TEXT NOT NULL,
+        "Page"        TEXT NOT NULL,
+        PRIMARY KEY ("HeroId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_pages = '''
+    DROP TABLE IF EXISTS "hero_pages";
+'''
+
+add_hero_page = '''
+    INSERT INTO hero_pages
+    VALUES (?, ?, ?)
+'''
+
+## every hero's standing within its role on each metric, next to the mean, median and
+## standard deviation of the role, computed once at build time with window functions
+create_hero_role_stats = '''
+    CREATE TABLE IF NOT EXISTS "hero_role_stats" (
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
+        "Metric"      TEXT NOT NULL,
+        "Role"        TEXT NOT NULL COLLATE NOCASE,
+        "Value"       REAL NOT NULL,
+        "Role_Rank"   INTEGER NOT NULL,
+        "Role_Count"  INTEGER NOT NULL,
+        "Percentile"  REAL NOT NULL,
+        "Role_Mean"   REAL NOT NULL,
+        "Role_Median" REAL NOT NULL,
+        "Role_Stddev" REAL NOT NULL,
+        PRIMARY KEY ("HeroId", "Metric")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_role_stats = '''
+    DROP TABLE IF EXISTS "hero_role_stats";
+'''
+
+## rank 1 is the largest value of the role, the percentile is the share of the other heroes
+## of the role with a smaller value, and the median averages the one or two middle values
+add_hero_role_stats = '''
+    INSERT INTO hero_role_stats
+    WITH metric_values AS (
+        SELECT Id AS HeroId, 'health' AS Metric, Role, Health_Base AS Value FROM heroes
+        UNION ALL SELECT Id, 'armor', Role, Armor_Base FROM heroes
+        UNION ALL SELECT Id, 'shield', Role, Shield_Base FROM heroes
+        UNION ALL SELECT Id, 'pick_rate', Role, Pick_Rate FROM heroes
+        UNION ALL SELECT Id, 'win_rate', Role, Win_Rate FROM heroes
+        UNION ALL SELECT Id, 'tie_rate', Role, Tie_Rate FROM heroes
+        UNION ALL SELECT Id, 'on_fire_rate', Role, OnFire_Rate FROM heroes
+    ), ranked AS (
+        SELECT HeroId, Metric, Role, Value,
+            RANK() OVER (PARTITION BY Metric, Role ORDER BY Value DESC) AS Role_Rank,
+            ROW_NUMBER() OVER (PARTITION BY Metric, Role ORDER BY Value) AS Position,
+            PERCENT_RANK() OVER (PARTITION BY Metric, Role ORDER BY Value) * 100 AS Percentile,
+            COUNT(*) OVER role_window AS Role_Count,
+            AVG(Value) OVER role_window AS Role_Mean,
+            AVG(Value * Value) OVER role_window AS Role_Mean_Square
+        FROM metric_values
+        WINDOW role_window AS (PARTITION BY Metric, Role)
+    ), medians AS (
+        SELECT Metric, Role, AVG(Value) AS Role_Median FROM ranked
+        WHERE Position IN ((Role_Count + 1) / 2, (Role_Count + 2) / 2)
+        GROUP BY Metric, Role
+    )
+    SELECT ranked.HeroId, ranked.Metric, ranked.Role, ranked.Value, ranked.Role_Rank, ranked.Role_Count,
+        ranked.Percentile, ranked.Role_Mean, medians.Role_Median,
+        sqrt(max(ranked.Role_Mean_Square - ranked.Role_Mean * ranked.Role_Mean, 0))
+    FROM ranked JOIN medians ON medians.Metric = ranked.Metric AND medians.Role = ranked.Role
+'''
+
+create_wiki_info = '''
+    CREATE TABLE IF NOT EXISTS "wiki_info" (
+        "Key"         TEXT PRIMARY KEY,
+        "Value"       TEXT NOT NULL
+    ) WITHOUT ROWID;
+'''
+
+drop_wiki_info = '''
+    DROP TABLE IF EXISTS "wiki_info";
+'''
+
+add_wiki_info = '''
+    INSERT INTO wiki_info
+    VALUES (?, ?)
+'''
+
+## locale-specific text falls back to the default locale where no translation is stored
+localised_hero_columns = '''
+    SELECT heroes.Id, COALESCE(t.Name, heroes.Name) AS Name, COALESCE(t.Role, heroes.Role) AS Role,
+        COALESCE(t.Description, heroes.Description) AS Description, COALESCE(t.Quote, heroes.Quote) AS Quote,
+        heroes.Real_Name, heroes.Age, heroes.Nationality, heroes.Occupation, heroes.Base,
+        heroes.Affiliation, heroes.Health, heroes.Armor, heroes.Shield, heroes.Pick_Rate,
+        heroes.Win_Rate, heroes.Tie_Rate, heroes.OnFire_Rate, heroes.Pose_URL, heroes.Slug,
+        heroes.Health_Base, heroes.Health_Alt, heroes.Armor_Base, heroes.Armor_Alt,
+        heroes.Shield_Base, heroes.Shield_Alt'''
+
+localised_hero_from = '''
+    FROM heroes LEFT JOIN hero_translations AS t
+        ON t.HeroId = heroes.Id AND t.Locale = ?
+'''
+
+select_localised_heroes = localised_hero_columns + localised_hero_from
+
+## the names of the columns of localised_hero_columns and select_localised_abilities, in order
+LOCALISED_HERO_COLUMNS = ('Id', 'Name', 'Role', 'Description', 'Quote', 'Real_Name', 'Age', 'Nationality', 'Occupation', 'Base',
+    'Affiliation', 'Health', 'Armor', 'Shield', 'Pick_Rate', 'Win_Rate', 'Tie_Rate', 'OnFire_Rate', 'Pose_URL', 'Slug',
+    'Health_Base', 'Health_Alt', 'Armor_Base', 'Armor_Alt', 'Shield_Base', 'Shield_Alt')
+LOCALISED_ABILITY_COLUMNS = ('Name', 'Description', 'Stats', 'Video_URL', 'Hero_Name', 'Id', 'HeroId', 'Hero_Slug')
+
+select_localised_abilities = '''
+    SELECT COALESCE(at.Name, abilities.Name) AS Name, COALESCE(at.Description, abilities.Description) AS Description,
+        abilities.Stats, abilities.Video_URL, COALESCE(ht.Name, heroes.Name) AS Hero_Name, abilities.Id, abilities.HeroId,
+        heroes.Slug AS Hero_Slug
+    FROM abilities JOIN heroes ON abilities.HeroId = heroes.Id
+    LEFT JOIN ability_translations AS at
+        ON at.AbilityId = abilities.Id AND at.Locale = ?
+    LEFT JOIN hero_translations AS ht
+        ON ht.HeroId = heroes.Id AND ht.Locale = ?
+'''
+
+## names are matched case-insensitively in the default locale and in the translations,
+## each side through its own index
+search_heroes_by_name = select_localised_heroes + '''
+    WHERE heroes.Id IN (
+        SELECT Id FROM heroes WHERE Name = ?
+        UNION SELECT HeroId FROM hero_translations WHERE Name = ?)
+'''
+
+search_heroes_by_role = select_localised_heroes + '''
+    WHERE heroes.Role = ?
+'''
+
+search_abilities_by_name = select_localised_abilities + '''
+    WHERE abilities.Id IN (
+        SELECT Id FROM abilities WHERE Name = ?
+        UNION SELECT AbilityId FROM ability_translations WHERE Name = ?)
+'''
+
+search_abilities_by_hero_name = select_localised_abilities + '''
+    WHERE abilities.HeroId IN (
+        SELECT Id FROM heroes WHERE Name = ?
+        UNION SELECT HeroId FROM hero_translations WHERE Name = ?)
+'''
+
+## the abilities of all heroes of a role, for load_heroes_with_abilities
+search_abilities_by_role = select_localised_abilities + '''
+    WHERE heroes.Role = ?
+    ORDER BY abilities.Id
+'''
+
+## the standing within their roles of several heroes
+search_hero_role_stats_query = '''
+    SELECT heroes.Slug, Metric, Value, Role_Rank, Role_Count, Percentile, Role_Mean, Role_Median, Role_Stddev
+    FROM heroes JOIN hero_role_stats ON hero_role_stats.HeroId = heroes.Id
+    WHERE heroes.Slug IN (SELECT value FROM json_each(?))
+'''
+
+## the columns of the hero stats store, one row per hero in Id order, with the percentiles
+## of hero_role_stats turned into one column per metric in the order of ROLE_STAT_METRICS
+select_hero_stats_columns = '''
+    SELECT heroes.Slug, COALESCE(t.Name, heroes.Name), COALESCE(t.Role, heroes.Role), lower(heroes.Role),
+        heroes.Health_Base, heroes.Armor_Base, heroes.Shield_Base, heroes.Pick_Rate,
+        heroes.Win_Rate, heroes.Tie_Rate, heroes.OnFire_Rate,
+        p.Health, p.Armor, p.Shield, p.Pick_Rate, p.Win_Rate, p.Tie_Rate, p.OnFire_Rate
+    FROM heroes LEFT JOIN hero_translations AS t
+        ON t.HeroId = heroes.Id AND t.Locale = ?
+    LEFT JOIN (
+        SELECT HeroId,
+            MAX(CASE Metric WHEN 'health' THEN Percentile END) AS Health,
+            MAX(CASE Metric WHEN 'armor' THEN Percentile END) AS Armor,
+            MAX(CASE Metric WHEN 'shield' THEN Percentile END) AS Shield,
+            MAX(CASE Metric WHEN 'pick_rate' THEN Percentile END) AS Pick_Rate,
+            MAX(CASE Metric WHEN 'win_rate' THEN Percentile END) AS Win_Rate,
+            MAX(CASE Metric WHEN 'tie_rate' THEN Percentile END) AS Tie_Rate,
+            MAX(CASE Metric WHEN 'on_fire_rate' THEN Percentile END) AS OnFire_Rate
+        FROM hero_role_stats GROUP BY HeroId
+    ) AS p ON p.HeroId = heroes.Id
+    ORDER BY heroes.Id
+'''
+
+## abilities by the parsed number of one stat (e.g. 'Cooldown'), through idx_ability_stats_key_value
+select_abilities_by_stat = '''
+    SELECT abilities.Name, heroes.Name, ability_stats.Raw_Value, ability_stats.Numeric_Value, ability_stats.Unit, heroes.Slug
+    FROM ability_stats JOIN abilities ON abilities.Id = ability_stats.AbilityId
+    JOIN heroes ON heroes.Id = abilities.HeroId
+    WHERE ability_stats.Key = ? AND ability_stats.Numeric_Value BETWEEN ? AND ?
+'''
+
+search_abilities_by_stat_ascending = select_abilities_by_stat + '''
+    ORDER BY ability_stats.Numeric_Value ASC LIMIT ?
+'''
+
+search_abilities_by_stat_descending = select_abilities_by_stat + '''
+    ORDER BY ability_stats.Numeric_Value DESC LIMIT ?
+'''
+
+## full-text indexes over the hero and ability text, with one row of text per hero or ability
+## and built locale, since the translated text is spread over two tables
+create_heroes_fts = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "heroes_fts" USING fts5(
+        "Description", "Quote", "Occupation", "Affiliation", "HeroId" UNINDEXED, "Locale" UNINDEXED,
+        tokenize='porter unicode61 remove_diacritics 2'
+    );
+'''
+
+drop_heroes_fts = '''
+    DROP TABLE IF EXISTS "heroes_fts";
+'''
+
+create_abilities_fts = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "abilities_fts" USING fts5(
+        "Name", "Description", "Stats", "AbilityId" UNINDEXED, "Locale" UNINDEXED,
+        tokenize='porter unicode61 remove_diacritics 2'
+    );
+'''
+
+drop_abilities_fts = '''
+    DROP TABLE IF EXISTS "abilities_fts";
+'''
+
+add_heroes_fts = '''
+    INSERT INTO heroes_fts (Description, Quote, Occupation, Affiliation, HeroId, Locale)
+    SELECT COALESCE(t.Description, heroes.Description), COALESCE(t.Quote, heroes.Quote),
+        heroes.Occupation, heroes.Affiliation, heroes.Id, ?
+''' + localised_hero_from
+
+add_abilities_fts = '''
+    INSERT INTO abilities_fts (Name, Description, Stats, AbilityId, Locale)
+    SELECT COALESCE(at.Name, abilities.Name), COALESCE(at.Description, abilities.Description),
+        abilities.Stats, abilities.Id, ?
+    FROM abilities LEFT JOIN ability_translations AS at
+        ON at.AbilityId = abilities.Id AND at.Locale = ?
+'''
+
+## heroes and abilities of one locale ranked together by BM25 (lower is better), with a highlighted snippet
+search_wiki_text_query = '''
+    SELECT * FROM (
+        SELECT 'hero', COALESCE(t.Name, heroes.Name), COALESCE(t.Name, heroes.Name),
+            snippet(heroes_fts, -1, ?, ?, '...', 16), bm25(heroes_fts) AS Rank
+        FROM heroes_fts JOIN heroes ON heroes.Id = heroes_fts.HeroId
+        LEFT JOIN hero_translations AS t
+            ON t.HeroId = heroes.Id AND t.Locale = heroes_fts.Locale
+        WHERE heroes_fts MATCH ? AND heroes_fts.Locale = ?
+        UNION ALL
+        SELECT 'ability', COALESCE(at.Name, abilities.Name), COALESCE(ht.Name, heroes.Name),
+            snippet(abilities_fts, -1, ?, ?, '...', 16), bm25(abilities_fts, 5.0, 1.0, 1.0) AS Rank
+        FROM abilities_fts JOIN abilities ON abilities.Id = abilities_fts.AbilityId
+        JOIN heroes ON heroes.Id = abilities.HeroId
+        LEFT JOIN ability_translations AS at
+            ON at.AbilityId = abilities.Id AND at.Locale = abilities_fts.Locale
+        LEFT JOIN hero_translations AS ht
+            ON ht.HeroId = heroes.Id AND ht.Locale = abilities_fts.Locale
+        WHERE abilities_fts MATCH ? AND abilities_fts.Locale = ?
+    )
+    ORDER BY Rank LIMIT ?
+'''
+
+## every search above must be answered through an index: each query with example parameters and
+## the step its EXPLAIN QUERY PLAN must have, see tests/test_query_plans.py
+search_query_plan_checks = [
+    (search_heroes_by_name, [DEFAULT_LOCALE, '', ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_name '),
+    (search_heroes_by_role, [DEFAULT_LOCALE, ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_role_\w+ \(Role=\?'),
+    (search_abilities_by_name, [DEFAULT_LOCALE, DEFAULT_LOCALE, '', ''], r'SEARCH abilities USING (COVERING )?INDEX idx_abilities_name '),
+    (search_abilities_by_hero_name, [DEFAULT_LOCALE, DEFAULT_LOCALE, '', ''], r'SEARCH abilities USING INDEX idx_abilities_hero_id '),
+    (search_abilities_by_role, [DEFAULT_LOCALE, DEFAULT_LOCALE, ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_role_\w+ \(Role=\?'),
+    (search_wiki_text_query, ['[', ']', '"barrier"', DEFAULT_LOCALE, '[', ']', '"barrier"', DEFAULT_LOCALE, 20], r'SCAN abilities_fts VIRTUAL TABLE INDEX \d+:M'),
+    (search_hero_role_stats_query, ['["ana", "mercy"]'], r'SEARCH hero_role_stats USING PRIMARY KEY '),
+    (search_abilities_by_stat_ascending, ['Cooldown', 0, 6, 20], r'SEARCH ability_stats USING INDEX idx_ability_stats_key_value '),
+    (search_abilities_by_stat_descending, ['Damage', float('-inf'), float('inf'), 20], r'SEARCH ability_stats USING INDEX idx_ability_stats_key_value '),
+    (select_localised_heroes + ' ORDER BY heroes.Health_Base DESC LIMIT ?', [DEFAULT_LOCALE, 20], r'SCAN heroes USING INDEX idx_heroes_health')
+]
+
+## the build runs in one transaction without fsyncs and is checked once at the end,
+## in WAL mode so that readers keep serving the previous data until it commits
+build_pragmas = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536'
+]
+
+## read connections only query, and keep the whole (small) database in memory
+serving_pragmas = [
+    'PRAGMA query_only = ON',
+    'PRAGMA cache_size = -8192',
+    'PRAGMA mmap_size = 67108864'
+]
+SERVING_CACHED_STATEMENTS = 64
+
+## indexes are created after the rows are loaded
+create_indexes = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS "idx_heroes_slug" ON "heroes" ("Slug")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_name" ON "heroes" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_name" ON "heroes" ("Role" COLLATE NOCASE, "Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_abilities_name" ON "abilities" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_abilities_hero_id" ON "abilities" ("HeroId")',
+    'CREATE INDEX IF NOT EXISTS "idx_hero_translations_name" ON "hero_translations" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_ability_translations_name" ON "ability_translations" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_ability_stats_key_value" ON "ability_stats" ("Key" COLLATE NOCASE, "Numeric_Value")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_health" ON "heroes" ("Health_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_armor" ON "heroes" ("Armor_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_shield" ON "heroes" ("Shield_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_win_rate" ON "heroes" ("Win_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_pick_rate" ON "heroes" ("Pick_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_health" ON "heroes" ("Role" COLLATE NOCASE, "Health_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_armor" ON "heroes" ("Role" COLLATE NOCASE, "Armor_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_shield" ON "heroes" ("Role" COLLATE NOCASE, "Shield_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_win_rate" ON "heroes" ("Role" COLLATE NOCASE, "Win_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_pick_rate" ON "heroes" ("Role" COLLATE NOCASE, "Pick_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_nationality" ON "heroes" ("Nationality" COLLATE NOCASE)'
+]
+
+## the columns the hero filter can sort on and take ranges of; every index above ends with the
+## hero Id, which breaks ties so that pages can continue from (sort value, Id)
+HERO_FILTER_SORTS = {'name': 'Name', 'health': 'Health_Base', 'armor': 'Armor_Base', 'shield': 'Shield_Base', 'win_rate': 'Win_Rate', 'pick_rate': 'Pick_Rate'}
+HERO_FILTER_RANGES = {'health': 'Health_Base', 'armor': 'Armor_Base', 'shield': 'Shield_Base', 'win_rate': 'Win_Rate', 'pick_rate': 'Pick_Rate'}
+HERO_FILTER_PAGE_SIZE = 20
+
+## the metrics of hero_role_stats in display order, with their labels
+ROLE_STAT_METRICS = {'health': 'Health', 'armor': 'Armor', 'shield': 'Shield', 'pick_rate': 'Pick rate', 'win_rate': 'Win rate', 'tie_rate': 'Tie rate', 'on_fire_rate': 'On fire rate'}
+
+## the tables written by the export subcommand, the Arrow types of their declared SQLite types,
+## and the low-cardinality text columns that are dictionary-encoded
+EXPORT_TABLES = ['heroes', 'abilities', 'ability_stats', 'hero_role_stats']
+EXPORT_ARROW_TYPES = {'INTEGER': 'int64', 'REAL': 'float64', 'TEXT': 'string'}
+EXPORT_DICTIONARY_COLUMNS = {'Role', 'Nationality', 'Key', 'Unit', 'Metric'}
+EXPORT_BATCH_SIZE = 10000
+EXPORT_COMPRESSION = 'zstd'
+
+## the chart of each comparison choice: its type, the metric of the hero stats store it shows
+## (the heroes are sorted by it) and its title; grouped bars show the percentiles of every metric
+CMP_CHART_SPECS = {
+    1: {'type': 'bar', 'metric': 'health', 'title': "Hero Comparison by Health"},
+    2: {'type': 'bar', 'metric': 'armor', 'title': "Hero Comparison by Armor"},
+    3: {'type': 'bar', 'metric': 'shield', 'title': "Hero Comparison by Shield"},
+    4: {'type': 'pie', 'metric': 'pick_rate', 'title': "Hero Comparison by Pick Rate"},
+    5: {'type': 'bar', 'metric': 'win_rate', 'title': "Hero Comparison by Win Rate"},
+    6: {'type': 'bar', 'metric': 'tie_rate', 'title': "Hero Comparison by Tie Rate"},
+    7: {'type': 'bar', 'metric': 'on_fire_rate', 'title': "Hero Comparison by On Fire Rate"},
+    8: {'type': 'grouped_bar', 'metric': None, 'title': "Hero Comparison by Percentile within Role"}
+}
+
+## the number at the start of a stat value and its unit (e.g. '12 seconds', '40%', '20 meters'),
+## a unit followed by '/' is a rate (e.g. '20 m/s') and is left without one
+STAT_NUMBER_PATTERN = re.compile(r'(-?\d+(?:\.\d+)?)\s*(%|seconds?\b(?!/)|s\b(?!/)|meters?\b(?!/)|m\b(?!/)|degrees?\b(?!/))?')
+STAT_UNITS = {'%': '%', 'second': 's', 'seconds': 's', 's': 's', 'meter': 'm', 'meters': 'm', 'm': 'm', 'degree': '°', 'degrees': '°'}
+
 def construct_unique_key(baseurl, params):
     ''' constructs a key that is guaranteed to uniquely and 
     repeatably identify an API request by its baseurl and params
@@ -172,16 +623,17 @@ def make_url_request_using_cache(baseurl, cache, params=None):
         JSON
     '''
     request_key = construct_unique_key(baseurl, params)
-    if (request_key in cache.keys()):
-        print("Using cache")
-        return cache[request_key]
+    with CACHE_LOCK: # locales are fetched from several threads at once
+        if (request_key in cache.keys()):
+            print("Using cache")
+            return cache[request_key]
+    print("Fetching")
+    time.sleep(1)
+    if (params == None):
+        response = requests.get(baseurl, headers=headers)
     else:
-        print("Fetching")
-        time.sleep(1)
-        if (params == None):
-            response = requests.get(baseurl, headers=headers)
-        else:
-            response = requests.get(baseurl, headers=headers, params=params)
+        response = requests.get(baseurl, headers=headers, params=params)
+    with CACHE_LOCK:
         cache[request_key] = response.text
         save_cache(cache)
         return cache[request_key] # in both cases, we return cache[request_key]
@@ -219,6 +671,15 @@ class Hero:
     shield: string
         the shield value of a overwatch hero (e.g. '100')
 
+    health_base: float
+        the base health of a overwatch hero, parsed at build time (e.g. 200.0 for '200 (400 in Tank mode)')
+
+    armor_base: float
+        the base armor of a overwatch hero, parsed at build time
+
+    shield_base: float
+        the base shield of a overwatch hero, parsed at build time
+
     real_name: string
         the real name of a overwatch hero (e.g. 'Ana Amari (أنا عماري)')
     
@@ -248,11 +709,20 @@ class Hero:
 
     on_fire_rate: float
         the on fire rate of a overwatch hero in the competition match
+
+    slug: string
+        the locale-independent key of a overwatch hero in the official website (e.g. 'ana')
     '''
-    def __init__(self, role="", name="", description="", abilities={}, quote="", hero_pose_url="", health="0", armor="0", shield="0", real_name="", age="", nationality="", occupation="", base="", affiliation="", pick_rate=0, win_rate=0, tie_rate=0, on_fire_rate=0):
+    __slots__ = ('role', 'name', 'description', 'abilities', 'quote', 'hero_pose_url', 'health', 'armor', 'shield',
+        'real_name', 'age', 'nationality', 'occupation', 'base', 'affiliation', 'pick_rate', 'win_rate', 'tie_rate',
+        'on_fire_rate', 'slug', 'health_base', 'armor_base', 'shield_base')
+
+    def __init__(self, role="", name="", description="", abilities=None, quote="", hero_pose_url="", health="0", armor="0", shield="0", real_name="", age="", nationality="", occupation="", base="", affiliation="", pick_rate=0, win_rate=0, tie_rate=0, on_fire_rate=0, slug=""):
         self.role = role
         self.name = name
         self.description = description
+        if (abilities is None):
+            abilities = {}
         self.abilities = abilities
         self.quote = quote
         self.hero_pose_url = hero_pose_url
@@ -269,27 +739,10 @@ class Hero:
         self.win_rate = win_rate
         self.tie_rate = tie_rate
         self.on_fire_rate = on_fire_rate
-    
-    def set_val_by_list(self, list):
-        self.role = list[2]
-        self.name = list[1]
-        self.description = list[3]
-        self.abilities = []
-        self.quote = list[4]
-        self.hero_pose_url = list[18]
-        self.health = list[11]
-        self.armor = list[12]
-        self.shield = list[13]
-        self.real_name = list[5]
-        self.age = list[6]
-        self.nationality = list[7]
-        self.occupation = list[8]
-        self.base = list[9]
-        self.affiliation = list[10]
-        self.pick_rate = float(list[14])
-        self.win_rate = float(list[15])
-        self.tie_rate = float(list[16])
-        self.on_fire_rate = float(list[17])
+        self.slug = slug
+        self.health_base = 0.0
+        self.armor_base = 0.0
+        self.shield_base = 0.0
 
 
     def info(self):
@@ -326,6 +779,8 @@ class Ability:
     stats: string
         the stats of an ability (e.g. "Type: Weapon. Damage: 70 over 0.6 seconds. Spread angle: Pinpoint...")
     '''
+    __slots__ = ('name', 'description', 'video_url', 'stats')
+
     def __init__(self, name="", description="", video_url="", stats=""):
         self.name = name
         self.description = description
@@ -343,12 +798,13 @@ class Ability:
         webbrowser.open(self.video_url)
 
 
-def build_hero_official_url_dict():
-    ''' Make a dictionary that maps hero name to hero page url from "https://playoverwatch.com/en-us/heroes/"
+def build_hero_official_url_dict(locale=DEFAULT_LOCALE):
+    ''' Make a dictionary that maps hero name to hero page url from "https://playoverwatch.com/<locale>/heroes/"
 
     Parameters
     ----------
-    None
+    locale: string
+        the locale of the official website (e.g. 'en-us')
 
     Returns
     -------
@@ -356,7 +812,7 @@ def build_hero_official_url_dict():
         key is a hero name and value is the url
         e.g. {'Ana':'https://playoverwatch.com/en-us/heroes/ana/', ...}
     '''
-    index_page_url = OFFICAL_WEBSITE_URL + OFFICAL_WEBSITE_INDEX_PATH
+    index_page_url = OFFICAL_WEBSITE_URL + OFFICAL_WEBSITE_INDEX_PATH.format(locale=locale)
     url_text = make_url_request_using_cache(index_page_url, CACHE_DICT)
     soup = BeautifulSoup(url_text, 'html.parser')
     hero_official_url_dict = {}
@@ -428,7 +884,50 @@ def get_official_hero_instance(hero_name, hero_url):
     hero_pose_tag = hero_pose_parent.find('div', class_="hero-pose-image")['style']
     hero_pose_url = re.findall(r'.*[(](.*)[)].*', hero_pose_tag)[0]
 
-    return Hero(hero_role, hero_name, hero_description, hero_abilities_dict, hero_quote, hero_pose_url)
+    ## the last part of the URL is the same in every locale (e.g. '/en-us/heroes/ana/')
+    hero_slug = hero_url.rstrip('/').split('/')[-1]
+
+    return Hero(hero_role, hero_name, hero_description, hero_abilities_dict, hero_quote, hero_pose_url, slug=hero_slug)
+
+
+def build_hero_dict(locale=DEFAULT_LOCALE):
+    ''' Make a hero dict of one locale from the official website
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the official website (e.g. 'en-us')
+
+    Returns
+    -------
+    dict
+        key is a lowercase hero name and value is the hero instance
+    '''
+    hero_official_url_dict = build_hero_official_url_dict(locale)
+    hero_dict = {}
+    for hero_name in hero_official_url_dict.keys():
+        hero_url = hero_official_url_dict[hero_name]
+        hero_inst = get_official_hero_instance(hero_name, hero_url)
+        hero_dict[hero_name.lower()] = hero_inst
+    return hero_dict
+
+
+def build_locale_hero_dicts(locales=LOCALES):
+    ''' Make the hero dicts of several locales, fetching the locales concurrently
+
+    Parameters
+    ----------
+    locales: list
+        the locales of the official website (e.g. ['en-us', 'de-de'])
+
+    Returns
+    -------
+    dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    with ThreadPoolExecutor(max_workers=len(locales)) as executor:
+        hero_dicts = list(executor.map(build_hero_dict, locales))
+    return dict(zip(locales, hero_dicts))
 
 
 def build_hero_gamepedia_url_dict():
@@ -562,238 +1061,1215 @@ def add_match_stats_to_hero_instance(hero_dict):
             hero_dict[hero_name].on_fire_rate = float(hero_match_stats_list[4].strip('%'))
 
 
-def create_heroes_table(hero_dict):
+## Hero attributes in the column order of the heroes table
+HERO_COLUMN_ATTRIBUTES = ('name', 'role', 'description', 'quote', 'real_name', 'age', 'nationality', 'occupation', 'base', 'affiliation', 'health', 'armor', 'shield', 'pick_rate', 'win_rate', 'tie_rate', 'on_fire_rate', 'hero_pose_url', 'slug')
+
+## the columns the row factories read, in the order of the attributes they are assigned to
+## in hero_row_factory/ability_row_factory, and the itemgetters picking them out of the rows
+## of the queries starting with localised_hero_columns and select_localised_abilities
+HERO_ROW_COLUMNS = ('Name', 'Role', 'Description', 'Quote', 'Real_Name', 'Age', 'Nationality', 'Occupation', 'Base', 'Affiliation',
+    'Health', 'Armor', 'Shield', 'Pick_Rate', 'Win_Rate', 'Tie_Rate', 'OnFire_Rate', 'Pose_URL', 'Slug', 'Health_Base', 'Armor_Base', 'Shield_Base')
+ABILITY_ROW_COLUMNS = ('Name', 'Description', 'Video_URL', 'Stats')
+HERO_ROW_GETTER = operator.itemgetter(*[LOCALISED_HERO_COLUMNS.index(column) for column in HERO_ROW_COLUMNS])
+ABILITY_ROW_GETTER = operator.itemgetter(*[LOCALISED_ABILITY_COLUMNS.index(column) for column in ABILITY_ROW_COLUMNS])
+
+
+def create_heroes_table(cur, hero_dict):
     '''Build a Heroes Table from hero dict.
     
     Parameters
     ----------
+    cur: cursor
+        the cursor of the database being built
     hero_dict: dict
         hero dict including all infos of all heroes
     '''
-    conn = sqlite3.connect("hero_wiki.sqlite")
-    cur = conn.cursor()
-
     ## create table
     cur.execute(drop_heroes)
     cur.execute(create_heroes)
-    conn.commit()
 
     ## add infos
-    for hero_name in hero_dict.keys():
-        name = hero_dict[hero_name].name
-        role = hero_dict[hero_name].role
-        description = hero_dict[hero_name].description
-        quote = hero_dict[hero_name].quote
-        real_name = hero_dict[hero_name].real_name
-        age = hero_dict[hero_name].age
-        nationality = hero_dict[hero_name].nationality
-        occupation = hero_dict[hero_name].occupation
-        base = hero_dict[hero_name].base
-        affiliation = hero_dict[hero_name].affiliation
-        health = hero_dict[hero_name].health
-        armor = hero_dict[hero_name].armor
-        shield = hero_dict[hero_name].shield
-        pick_rate = hero_dict[hero_name].pick_rate
-        win_rate = hero_dict[hero_name].win_rate
-        tie_rate = hero_dict[hero_name].tie_rate
-        on_fire_rate = hero_dict[hero_name].on_fire_rate
-        hero_pose_url = hero_dict[hero_name].hero_pose_url
-        cur.execute(add_hero, [name, role, description, quote, real_name, age, nationality, occupation, base, affiliation, health, armor, shield, pick_rate, win_rate, tie_rate, on_fire_rate, hero_pose_url])
-        conn.commit()
-
-    conn.close()
-
-
-def create_abilities_table(hero_dict):
+    cur.executemany(add_hero, hero_rows(hero_dict))
+
+
+def parse_durability(durability):
+    ''' Parse a health, armor or shield text from gamepedia into numbers
+
+    Parameters
+    ----------
+    durability: string
+        the durability text (e.g. '200 (400 in Tank mode)')
+
+    Returns
+    -------
+    tuple
+        the base value and the value of the alternate form, e.g. (200.0, 400.0);
+        the alternate value is None if there is none
+    '''
+    numbers = re.findall(r'\d+(?:\.\d+)?', durability.replace(',', ''))
+    base_value = float(numbers[0]) if numbers else 0.0
+    alt_value = float(numbers[1]) if len(numbers) > 1 else None
+    return (base_value, alt_value)
+
+
+def hero_rows(hero_dict):
+    ''' Yield the rows of the heroes table from hero dict'''
+    hero_row = operator.attrgetter(*HERO_COLUMN_ATTRIBUTES)
+    for hero_inst in hero_dict.values():
+        yield hero_row(hero_inst) + parse_durability(hero_inst.health) + parse_durability(hero_inst.armor) + parse_durability(hero_inst.shield)
+
+
+def ability_rows(hero_dict, hero_ids):
+    ''' Yield the rows of the abilities table from hero dict, with the id of each hero looked up by its slug'''
+    for hero_inst in hero_dict.values():
+        hero_id = hero_ids[hero_inst.slug]
+        for ability in hero_inst.abilities.values():
+            yield (ability.name, ability.description, ability.stats.lstrip(), hero_id, ability.video_url)
+
+
+def create_abilities_table(cur, hero_dict):
     '''Build an Abilities Table from hero dict.
     
     Parameters
     ----------
+    cur: cursor
+        the cursor of the database being built
     hero_dict: dict
         hero dict including all infos of all heroes
     '''
-    conn = sqlite3.connect("hero_wiki.sqlite")
-    cur = conn.cursor()
-
     ## create table
     cur.execute(drop_abilities)
     cur.execute(create_abilities)
-    conn.commit()
 
     ## add infos
-    hero_id = 1
-    for hero_name in hero_dict.keys():
-        for ability_name in hero_dict[hero_name].abilities.keys():
-            name = hero_dict[hero_name].abilities[ability_name].name
-            description = hero_dict[hero_name].abilities[ability_name].description
-            stats = hero_dict[hero_name].abilities[ability_name].stats.lstrip()
-            video_url = hero_dict[hero_name].abilities[ability_name].video_url
-            cur.execute(add_ability, [name, description, stats, hero_id, video_url])
-            conn.commit()
-        hero_id += 1
-
-    conn.close()
-
-
-def search_hero_table_by_name(hero_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT * From heroes'
-    query += ' WHERE Name = "' + hero_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def search_hero_table_by_role(role=None):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT * From heroes'
+    hero_ids = dict(cur.execute('SELECT Slug, Id FROM heroes').fetchall())
+    cur.executemany(add_ability, ability_rows(hero_dict, hero_ids))
+
+
+def parse_ability_stats(stats):
+    ''' Parse the stats text of an ability into its stat lines
+
+    Parameters
+    ----------
+    stats: string
+        the stats of an ability (e.g. "Type: Weapon\nCooldown: 12 seconds. \n")
+
+    Returns
+    -------
+    list
+        tuples of (key, raw value, numeric value, unit), e.g. ('Cooldown', '12 seconds.', 12.0, 's');
+        the numeric value and unit are None when the value does not start with a number,
+        and a line without a key (e.g. 'Headshot') has an empty key and the line as its value
+    '''
+    stat_lines = []
+    for stat_line in stats.strip('\n').split("\n"):
+        if (not stat_line.strip()):
+            continue
+        if (':' not in stat_line):
+            stat_lines.append(('', stat_line.strip(), None, None))
+            continue
+        key, raw_value = stat_line.split(':', 1)
+        raw_value = raw_value.strip()
+        numeric_value = None
+        unit = None
+        match = STAT_NUMBER_PATTERN.match(raw_value)
+        if (match):
+            numeric_value = float(match.group(1))
+            if (match.group(2)):
+                unit = STAT_UNITS[match.group(2)]
+        stat_lines.append((key.strip(), raw_value, numeric_value, unit))
+    return stat_lines
+
+
+def ability_stat_rows(cur):
+    ''' Yield the rows of the ability_stats table from the loaded abilities table'''
+    for ability_id, stats in cur.connection.execute('SELECT Id, Stats FROM abilities').fetchall():
+        position = 0
+        for stat_line in parse_ability_stats(stats):
+            yield (ability_id, position) + stat_line
+            position += 1
+
+
+def create_ability_stats_table(cur):
+    '''Build the Ability Stats Table by parsing the stats of every ability once.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    '''
+    ## create table
+    cur.execute(drop_ability_stats)
+    cur.execute(create_ability_stats)
+
+    ## add infos
+    cur.executemany(add_ability_stat, ability_stat_rows(cur))
+
+
+def create_hero_role_stats_table(cur):
+    '''Build the Hero Role Stats Table from the loaded heroes table: the rank, percentile,
+    role mean, role median and role standard deviation of every hero on every metric.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    '''
+    ## create table
+    cur.execute(drop_hero_role_stats)
+    cur.execute(create_hero_role_stats)
+
+    ## add infos
+    cur.execute(add_hero_role_stats)
+
+
+def group_role_stats(role_stats_rows):
+    '''Group rows of the hero_role_stats table by hero.
+
+    Parameters
+    ----------
+    role_stats_rows: list
+        tuples of (hero key, metric, value, rank, count, percentile, mean, median, stddev)
+
+    Returns
+    -------
+    dict
+        key is a hero key and value is the list of its (label, value, rank, count, percentile,
+        mean, median, stddev) in the order of ROLE_STAT_METRICS
+    '''
+    metric_order = list(ROLE_STAT_METRICS.keys())
+    role_stats_dict = {}
+    for row in sorted(role_stats_rows, key=lambda row: metric_order.index(row[1])):
+        role_stats_dict.setdefault(row[0], []).append((ROLE_STAT_METRICS[row[1]],) + tuple(row[2:]))
+    return role_stats_dict
+
+
+def translated_or_none(text, default_text):
+    ''' Return the text of a locale, or None when it is the same as the default locale's text,
+    so that untranslated text is only stored once
+    '''
+    if (text == default_text):
+        return None
+    return text
+
+
+def hero_translation_rows(locale_hero_dicts, default_hero_rows):
+    ''' Yield the rows of the hero_translations table, skipping heroes without translated text'''
+    for locale in locale_hero_dicts.keys():
+        if (locale == DEFAULT_LOCALE):
+            continue
+        for hero_inst in locale_hero_dicts[locale].values():
+            if (hero_inst.slug not in default_hero_rows):
+                continue
+            hero_id, name, role, description, quote = default_hero_rows[hero_inst.slug]
+            hero_translation = (translated_or_none(hero_inst.name, name),
+                                translated_or_none(hero_inst.role, role),
+                                translated_or_none(hero_inst.description, description),
+                                translated_or_none(hero_inst.quote, quote))
+            if (hero_translation != (None, None, None, None)):
+                yield (hero_id, locale) + hero_translation
+
+
+def ability_translation_rows(locale_hero_dicts, default_ability_rows):
+    ''' Yield the rows of the ability_translations table, skipping abilities without translated text'''
+    for locale in locale_hero_dicts.keys():
+        if (locale == DEFAULT_LOCALE):
+            continue
+        for hero_inst in locale_hero_dicts[locale].values():
+            for ability in hero_inst.abilities.values():
+                if (ability.video_url not in default_ability_rows):
+                    continue
+                ability_id, name, description = default_ability_rows[ability.video_url]
+                ability_translation = (translated_or_none(ability.name, name),
+                                       translated_or_none(ability.description, description))
+                if (ability_translation != (None, None)):
+                    yield (ability_id, locale) + ability_translation
+
+
+def create_translation_tables(cur, locale_hero_dicts):
+    '''Build the Hero Translations and Ability Translations Tables from the hero dicts of all locales.
+    Heroes are matched to the default locale by slug and abilities by video URL,
+    and only the text that differs from the default locale is stored.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locale_hero_dicts: dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    ## create table
+    cur.execute(drop_hero_translations)
+    cur.execute(create_hero_translations)
+    cur.execute(drop_ability_translations)
+    cur.execute(create_ability_translations)
+
+    ## look up the rows of the default locale
+    default_hero_rows = {}
+    for row in cur.execute('SELECT Slug, Id, Name, Role, Description, Quote FROM heroes'):
+        default_hero_rows[row[0]] = row[1:]
+    default_ability_rows = {}
+    for row in cur.execute('SELECT Video_URL, Id, Name, Description FROM abilities'):
+        default_ability_rows[row[0]] = row[1:]
+
+    ## add infos
+    cur.executemany(add_hero_translation, hero_translation_rows(locale_hero_dicts, default_hero_rows))
+    cur.executemany(add_ability_translation, ability_translation_rows(locale_hero_dicts, default_ability_rows))
+
+
+def hero_page_rows(cur, locales):
+    ''' Yield the rows of the hero_pages table: for every locale, each hero row with its
+    abilities, their parsed stat lines and its standing within its role attached,
+    read from the loaded tables'''
+    conn = cur.connection
+    stats_dict = {}
+    for ability_id, key, raw_value in conn.execute('SELECT AbilityId, Key, Raw_Value FROM ability_stats ORDER BY AbilityId, Position').fetchall():
+        stats_dict.setdefault(ability_id, []).append((key, raw_value))
+    role_stats_dict = group_role_stats(conn.execute('SELECT HeroId, Metric, Value, Role_Rank, Role_Count, Percentile, Role_Mean, Role_Median, Role_Stddev FROM hero_role_stats').fetchall())
+
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    for locale in locales:
+        abilities_dict = {}
+        for ability in cursor.execute(select_localised_abilities + ' ORDER BY abilities.Id', [locale, locale]).fetchall():
+            ability_page = (ability['Name'], ability['Description'], stats_dict.get(ability['Id'], []), ability['Video_URL'])
+            abilities_dict.setdefault(ability['HeroId'], []).append(ability_page)
+        for hero in cursor.execute(select_localised_heroes, [locale]).fetchall():
+            page = {'hero': tuple(hero), 'abilities': abilities_dict.get(hero['Id'], []), 'role_stats': role_stats_dict.get(hero['Id'], [])}
+            yield (hero['Id'], locale, json.dumps(page, ensure_ascii=False, separators=(',', ':')))
+
+
+def create_hero_pages_table(cur, locales):
+    '''Build the Hero Pages Table, the pre-joined read model of hero.html, so that
+    a hero page is a single lookup.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales to build the pages of
+    '''
+    ## create table
+    cur.execute(drop_hero_pages)
+    cur.execute(create_hero_pages)
+
+    ## add infos
+    cur.executemany(add_hero_page, hero_page_rows(cur, locales))
+
+
+def create_fts_tables(cur, locales):
+    '''Build the full-text indexes of the hero and ability text of every locale from the loaded tables.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales to index the text of
+    '''
+    cur.execute(drop_heroes_fts)
+    cur.execute(create_heroes_fts)
+    cur.executemany(add_heroes_fts, [(locale, locale) for locale in locales])
+    cur.execute(drop_abilities_fts)
+    cur.execute(create_abilities_fts)
+    cur.executemany(add_abilities_fts, [(locale, locale) for locale in locales])
+
+
+def create_wiki_info_table(cur, locales):
+    '''Build the Wiki Info Table with a new data version, which changes on every build.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales in the database
+    '''
+    cur.execute(drop_wiki_info)
+    cur.execute(create_wiki_info)
+    cur.executemany(add_wiki_info, [
+        ('data_version', uuid.uuid4().hex),
+        ('built_at', time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+        ('locales', ','.join(locales))
+    ])
+
+
+def create_wiki_database(hero_dict, locale_hero_dicts):
+    '''Build all tables of the database in a single transaction, create the
+    indexes once the rows are loaded and check the integrity of the result
+    before it is committed.
+    
+    Parameters
+    ----------
+    hero_dict: dict
+        hero dict including all infos of all heroes in the default locale
+    locale_hero_dicts: dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    conn = sqlite3.connect(wiki_file, isolation_level=None)
+    ## sqrt is only built into SQLite when it is compiled with its math functions
+    conn.create_function('sqrt', 1, math.sqrt, deterministic=True)
+    cur = conn.cursor()
+    for pragma in build_pragmas:
+        cur.execute(pragma)
+
+    ## a failed build is rolled back and its connection closed, so it never keeps the write lock
+    try:
+        cur.execute('BEGIN')
+        create_heroes_table(cur, hero_dict)
+        create_abilities_table(cur, hero_dict)
+        create_ability_stats_table(cur)
+        create_hero_role_stats_table(cur)
+        create_translation_tables(cur, locale_hero_dicts)
+        create_hero_pages_table(cur, list(locale_hero_dicts.keys()))
+        create_fts_tables(cur, list(locale_hero_dicts.keys()))
+        create_wiki_info_table(cur, list(locale_hero_dicts.keys()))
+        for create_index in create_indexes:
+            cur.execute(create_index)
+
+        ## checked before the commit, so that readers never see data that failed the check
+        integrity = cur.execute('PRAGMA integrity_check').fetchone()[0]
+        if (integrity != 'ok'):
+            raise sqlite3.DatabaseError("hero_wiki.sqlite failed the integrity check: " + integrity)
+        cur.execute('COMMIT')
+    except:
+        if (conn.in_transaction):
+            cur.execute('ROLLBACK')
+        raise
+    else:
+        cur.execute('PRAGMA wal_checkpoint(PASSIVE)')
+    finally:
+        conn.close()
+
+    ## serve the new data right away if this process is serving from memory
+    if (SERVE_FROM_MEMORY and MEMORY_SNAPSHOT['anchor'] is not None):
+        load_memory_snapshot()
+
+
+def build_wiki_database():
+    ''' Scrape the official website, gamepedia and overbuff, and build hero_wiki.sqlite from the results'''
+    ## build hero dicts of all locales from official website
+    locale_hero_dicts = build_locale_hero_dicts(LOCALES)
+    hero_dict = locale_hero_dicts[DEFAULT_LOCALE]
+        
+    ## build url dict from gamepedia website
+    hero_gamepedia_url_dict = build_hero_gamepedia_url_dict()
+
+    ## add gamepedia infos into class Hero in hero dict
+    for hero_name in hero_gamepedia_url_dict.keys():
+        try:
+            add_ability_stats_to_hero_instance(hero_dict[hero_name.lower()], hero_gamepedia_url_dict[hero_name])
+        except:
+            pass
+    
+    # add_ability_stats_to_hero_instance(hero_dict['roadhog'], hero_gamepedia_url_dict['Roadhog'])
+    # add_ability_stats_to_hero_instance(hero_dict['widowmaker'], hero_gamepedia_url_dict['Widowmaker'])
+
+    ## add overbuff infos into class Hero in hero dict
+    add_match_stats_to_hero_instance(hero_dict)
+
+    ## build tables in database
+    create_wiki_database(hero_dict, locale_hero_dicts)
+
+    ## display infos in hero dict
+    # for hero_name in hero_official_url_dict.keys():
+    #     print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
+    #     hero_inst = hero_dict[hero_name.lower()]
+    #     print(hero_inst.info())
+    #     print(hero_inst.detail_info())
+    #     print("")
+    #     print(hero_inst.quote)
+    #     print("")
+    #     print(hero_inst.stats())
+    #     print(hero_inst.compete_stats())
+    #     print("*******************************************")
+    #     for ability in hero_inst.abilities.keys():
+    #         print(hero_inst.abilities[ability].info())
+    #         print(hero_inst.abilities[ability].show_stats())
+    #         print("*******************************************")
+    #     print("<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<")
+
+
+def create_wiki_snapshot_file(snapshot_path=wiki_snapshot_file):
+    '''Package a finished hero_wiki.sqlite into a snapshot file: a gzipped tar holding
+    a compacted copy of the database and a manifest.json with its data version, build
+    time, locales, size and SHA-256 checksum.
+    
+    Parameters
+    ----------
+    snapshot_path: Path
+        the path of the snapshot file, replaced atomically if it exists
+
+    Returns
+    -------
+    dict
+        the manifest of the snapshot
+    '''
+    snapshot_path = Path(snapshot_path)
+    database_copy = snapshot_path.with_name(snapshot_path.name + '.sqlite.tmp')
+    if (database_copy.exists()):
+        database_copy.unlink()
+    source = sqlite3.connect(wiki_file)
+    source.execute('VACUUM INTO ?', [str(database_copy)])
+    wiki_info = dict(source.execute('SELECT Key, Value FROM wiki_info').fetchall())
+    source.close()
+
+    digest = hashlib.sha256()
+    with open(database_copy, 'rb') as database:
+        for chunk in iter(lambda: database.read(1 << 20), b''):
+            digest.update(chunk)
+    manifest = {
+        'format': SNAPSHOT_FILE_FORMAT,
+        'data_version': wiki_info['data_version'],
+        'built_at': wiki_info['built_at'],
+        'locales': wiki_info['locales'].split(','),
+        'database': wiki_file.name,
+        'size': database_copy.stat().st_size,
+        'sha256': digest.hexdigest()
+    }
+    manifest_bytes = json.dumps(manifest, indent=4).encode('utf-8')
+
+    snapshot_copy = snapshot_path.with_name(snapshot_path.name + '.tmp')
+    with tarfile.open(snapshot_copy, 'w:gz', compresslevel=6) as snapshot:
+        manifest_info = tarfile.TarInfo('manifest.json')
+        manifest_info.size = len(manifest_bytes)
+        manifest_info.mtime = int(time.time())
+        snapshot.addfile(manifest_info, io.BytesIO(manifest_bytes))
+        snapshot.add(database_copy, arcname=manifest['database'])
+    database_copy.unlink()
+    os.replace(snapshot_copy, snapshot_path)
+    return manifest
+
+
+def restore_wiki_snapshot_file(snapshot_path=wiki_snapshot_file):
+    '''Restore hero_wiki.sqlite from a snapshot file made by create_wiki_snapshot_file.
+    The database is checked against the checksum in the manifest before it replaces
+    hero_wiki.sqlite, so a damaged snapshot never replaces a database.
+    
+    Parameters
+    ----------
+    snapshot_path: Path
+        the path of the snapshot file
+
+    Returns
+    -------
+    dict
+        the manifest of the snapshot
+
+    Raises
+    ------
+    ValueError
+        if the snapshot file has another format or its database does not match its checksum
+    '''
+    restored_file = wiki_file.with_name(wiki_file.name + '.restore')
+    with tarfile.open(snapshot_path, 'r:gz') as snapshot:
+        manifest = json.load(snapshot.extractfile('manifest.json'))
+        if (manifest['format'] != SNAPSHOT_FILE_FORMAT):
+            raise ValueError("snapshot format " + str(manifest['format']) + " is not format " + str(SNAPSHOT_FILE_FORMAT))
+        digest = hashlib.sha256()
+        with snapshot.extractfile(manifest['database']) as database, open(restored_file, 'wb') as restored:
+            for chunk in iter(lambda: database.read(1 << 20), b''):
+                digest.update(chunk)
+                restored.write(chunk)
+    if (digest.hexdigest() != manifest['sha256']):
+        restored_file.unlink()
+        raise ValueError("the database in the snapshot does not match its checksum")
+
+    ## a write-ahead log left over from another database must not be applied to this one
+    for leftover in [Path(str(wiki_file) + '-wal'), Path(str(wiki_file) + '-shm')]:
+        if (leftover.exists()):
+            leftover.unlink()
+    os.replace(restored_file, wiki_file)
+    return manifest
+
+
+def read_data_version(connection):
+    ''' Return the data version stored in the wiki_info table of a database'''
+    return connection.execute("SELECT Value FROM wiki_info WHERE Key = 'data_version'").fetchone()[0]
+
+
+def load_memory_snapshot():
+    '''Copy hero_wiki.sqlite into a new shared-cache in-memory database with the
+    SQLite backup API and serve all searches from it. Connections to the previous
+    snapshot are closed as they are given back, and its memory is freed once the
+    last of them is closed.
+
+    Returns
+    -------
+    string
+        the data version of the snapshot
+    '''
+    with SNAPSHOT_LOCK:
+        MEMORY_SNAPSHOT['generation'] += 1
+        uri = 'file:hero_wiki_snapshot_' + str(MEMORY_SNAPSHOT['generation']) + '?mode=memory&cache=shared'
+
+        ## the anchor connection keeps the in-memory database alive
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(wiki_file)
+        source.backup(anchor)
+        source.close()
+
+        previous_anchor = MEMORY_SNAPSHOT['anchor']
+        MEMORY_SNAPSHOT['uri'] = uri
+        MEMORY_SNAPSHOT['anchor'] = anchor
+        MEMORY_SNAPSHOT['data_version'] = read_data_version(anchor)
+        MEMORY_SNAPSHOT['checked_at'] = time.time()
+
+        ## close the idle connections to the previous snapshot, the busy ones are closed when given back
+        while True:
+            try:
+                connection_source, connection = READ_CONNECTIONS.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+    if (previous_anchor is not None):
+        previous_anchor.close()
+    return MEMORY_SNAPSHOT['data_version']
+
+
+def refresh_memory_snapshot():
+    '''Load a new memory snapshot if there is none yet, or if hero_wiki.sqlite was
+    rebuilt with a new data version; the file is checked at most once every
+    SNAPSHOT_CHECK_INTERVAL seconds.
+    '''
+    if (MEMORY_SNAPSHOT['anchor'] is not None and time.time() - MEMORY_SNAPSHOT['checked_at'] <= SNAPSHOT_CHECK_INTERVAL):
+        return
+    with SNAPSHOT_LOCK:
+        if (MEMORY_SNAPSHOT['anchor'] is None):
+            load_memory_snapshot()
+        elif (time.time() - MEMORY_SNAPSHOT['checked_at'] > SNAPSHOT_CHECK_INTERVAL):
+            MEMORY_SNAPSHOT['checked_at'] = time.time()
+            source = sqlite3.connect(wiki_file)
+            data_version = read_data_version(source)
+            source.close()
+            if (data_version != MEMORY_SNAPSHOT['data_version']):
+                load_memory_snapshot()
+
+
+def get_data_version():
+    ''' Return the data version of the data being served'''
+    if (SERVE_FROM_MEMORY):
+        refresh_memory_snapshot()
+        return MEMORY_SNAPSHOT['data_version']
+    with read_connection() as connection:
+        return read_data_version(connection)
+
+
+def open_read_connection(source):
+    '''Open a long-lived read-only connection for serving searches.
+    The connection keeps its prepared statements in its statement cache, so the
+    parameterised search queries are only compiled once per connection.
+
+    Parameters
+    ----------
+    source: string
+        the URI of the memory snapshot, or the path of the database file
+
+    Returns
+    -------
+    connection
+        a sqlite3 connection
+    '''
+    connection = sqlite3.connect(source, uri=SERVE_FROM_MEMORY, check_same_thread=False, cached_statements=SERVING_CACHED_STATEMENTS)
+    for pragma in serving_pragmas:
+        connection.execute(pragma)
+    return connection
+
+
+@contextmanager
+def read_connection():
+    '''Borrow a read connection for the current thread and give it back afterwards.
+    Connections are reused across requests, so at most one connection is open for
+    every thread that searches at the same time.
+    '''
+    if (SERVE_FROM_MEMORY):
+        refresh_memory_snapshot()
+        source = MEMORY_SNAPSHOT['uri']
+    else:
+        source = str(wiki_file)
+    try:
+        connection_source, connection = READ_CONNECTIONS.get_nowait()
+        if (connection_source != source): # from a previous snapshot
+            connection.close()
+            connection = open_read_connection(source)
+    except queue.Empty:
+        connection = open_read_connection(source)
+    try:
+        yield connection
+    finally:
+        READ_CONNECTIONS.put((source, connection))
+
+
+def hero_row_factory(cursor, row):
+    ''' sqlite3 row factory building a Hero from a row of a query starting with localised_hero_columns'''
+    hero = Hero.__new__(Hero)
+    (hero.name, hero.role, hero.description, hero.quote, hero.real_name, hero.age, hero.nationality, hero.occupation,
+        hero.base, hero.affiliation, hero.health, hero.armor, hero.shield, hero.pick_rate, hero.win_rate, hero.tie_rate,
+        hero.on_fire_rate, hero.hero_pose_url, hero.slug, hero.health_base, hero.armor_base, hero.shield_base
+    ) = HERO_ROW_GETTER(row)
+    hero.abilities = []
+    return hero
+
+
+def ability_row_factory(cursor, row):
+    ''' sqlite3 row factory building an Ability from a row of select_localised_abilities'''
+    ability = Ability.__new__(Ability)
+    (ability.name, ability.description, ability.video_url, ability.stats) = ABILITY_ROW_GETTER(row)
+    return ability
+
+
+def search_hero_table_by_name(hero_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_heroes_by_name, [locale, hero_name, hero_name]).fetchall()
+
+def search_hero_table_by_role(role=None, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        if (role is not None):
+            return cursor.execute(search_heroes_by_role, [locale, role]).fetchall()
+        return cursor.execute(select_localised_heroes, [locale]).fetchall()
+
+def build_hero_filter_query(role=None, ranges=None, nationality=None, affiliation=None, sort='name', descending=False, after=None, page_size=HERO_FILTER_PAGE_SIZE, locale=DEFAULT_LOCALE):
+    '''Build the parameterised query of a hero filter. Only whitelisted column names
+    go into the SQL text, every value is a parameter.
+
+    Parameters
+    ----------
+    role: string
+        only heroes of this role (e.g. 'Tank')
+    ranges: dict
+        key is one of HERO_FILTER_RANGES and value is a (min, max) tuple, either end may be None
+        (e.g. {'health': (300, None), 'win_rate': (50, 55)})
+    nationality: string
+        only heroes of this nationality (e.g. 'Egyptian')
+    affiliation: string
+        only heroes whose affiliation contains these words (e.g. 'Overwatch')
+    sort: string
+        one of HERO_FILTER_SORTS
+    descending: bool
+        whether the largest values come first
+    after: tuple
+        the (sort value, hero id) of the last hero of the previous page
+    page_size: int
+        the maximum number of heroes in a page
+    locale: string
+        the locale of the text of the heroes (e.g. 'de-de'); heroes sorted by name
+        are in the order of their names in this locale
+
+    Returns
+    -------
+    tuple
+        the query and its parameters; every row ends with its sort value
+    '''
+    if (sort == 'name' and locale != DEFAULT_LOCALE):
+        ## sort and page on the shown name; the default locale has no translations,
+        ## so its names keep the order of the indexes on heroes.Name
+        sort_column = 'COALESCE(t.Name, heroes.Name) COLLATE NOCASE'
+    else:
+        sort_column = 'heroes.' + HERO_FILTER_SORTS[sort]
+    conditions = []
+    params = [locale]
     if (role is not None):
-        query += ' WHERE Role = "' + role + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def search_ablility_table_by_ablitity_name(ablitity_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT abilities.Name, abilities.Description, abilities.Stats, Video_URL, heroes.Name From abilities JOIN heroes ON abilities.HeroId = heroes.Id'
-    query += ' WHERE abilities.Name = "' + ablitity_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-
-def search_ablility_table_by_hero_name(hero_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT abilities.Name, abilities.Description, abilities.Stats, Video_URL From abilities JOIN heroes ON abilities.HeroId = heroes.Id'
-    query += ' WHERE heroes.Name = "' + hero_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def hero_comparison_barplot(hero_list, cmp_choice):
-    x_axis = []
-    y_axis = []
-    labels = []
-    values = []
-    if cmp_choice == 1:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.health.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Health")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()
-    elif cmp_choice == 2:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.armor.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Armor")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()        
-    elif cmp_choice == 3:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.shield.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Shield")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()
-    elif cmp_choice == 4:
-        for hero in hero_list:
-            labels.append(hero.name)
-            values.append(hero.pick_rate)
-        pie_data = go.Pie(labels=labels, values=values)
-        basic_layout = go.Layout(title="Hero Comparison by Pick Rate")
-        fig = go.Figure(data=pie_data, layout=basic_layout)
-        fig.show()
-    elif cmp_choice == 5:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.win_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Win Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()
-    elif cmp_choice == 6:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.tie_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Tie Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()
+        conditions.append('heroes.Role = ?')
+        params.append(role)
+    for range_name, (min_value, max_value) in (ranges or {}).items():
+        column = 'heroes.' + HERO_FILTER_RANGES[range_name]
+        if (min_value is not None):
+            conditions.append(column + ' >= ?')
+            params.append(min_value)
+        if (max_value is not None):
+            conditions.append(column + ' <= ?')
+            params.append(max_value)
+    if (nationality is not None):
+        conditions.append('heroes.Nationality = ?')
+        params.append(nationality)
+    if (affiliation is not None):
+        terms = re.findall(r'\w+', affiliation)
+        ## the affiliation is not translated, so the text of the default locale is enough
+        conditions.append('heroes.Id IN (SELECT HeroId FROM heroes_fts WHERE heroes_fts MATCH ? AND Locale = ?)')
+        params.append(' AND '.join('Affiliation : "' + term + '"' for term in terms) or '""')
+        params.append(DEFAULT_LOCALE)
+    if (after is not None):
+        ## keyset pagination: continue right after the last hero of the previous page
+        if (descending):
+            conditions.append('(' + sort_column + ', heroes.Id) < (?, ?)')
+        else:
+            conditions.append('(' + sort_column + ', heroes.Id) > (?, ?)')
+        params.extend(after)
+
+    query = localised_hero_columns + ', ' + sort_column + localised_hero_from
+    if (conditions):
+        query += '    WHERE ' + ' AND '.join(conditions) + '\n'
+    if (descending):
+        query += '    ORDER BY ' + sort_column + ' DESC, heroes.Id DESC LIMIT ?'
     else:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.on_fire_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by On Fire Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        fig.show()
+        query += '    ORDER BY ' + sort_column + ', heroes.Id LIMIT ?'
+    params.append(page_size)
+    return query, params
+
+
+def filter_hero_table(role=None, ranges=None, nationality=None, affiliation=None, sort='name', descending=False, after=None, page_size=HERO_FILTER_PAGE_SIZE, locale=DEFAULT_LOCALE, row_factory=None):
+    '''Look up one page of the heroes matching all the given criteria, see build_hero_filter_query.
+    The rows are built by row_factory (e.g. hero_row_factory) if one is given.
+
+    Returns
+    -------
+    tuple
+        the hero rows of the page, and the value of after for the next page
+        (None if this is the last page)
+    '''
+    query, params = build_hero_filter_query(role, ranges, nationality, affiliation, sort, descending, after, page_size, locale)
+    with read_connection() as connection:
+        cursor = connection.execute(query, params)
+        results = cursor.fetchall()
+        next_after = None
+        if (len(results) == page_size):
+            next_after = (results[-1][-1], results[-1][0])
+        if (row_factory is not None):
+            ## the plain rows carry the hero id and sort value the next page continues from
+            return [row_factory(cursor, result) for result in results], next_after
+    return [result[:-1] for result in results], next_after
+
+def search_ablility_table_by_ablitity_name(ablitity_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_abilities_by_name, [locale, locale, ablitity_name, ablitity_name]).fetchall()
+
+
+def search_ablility_table_by_hero_name(hero_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_abilities_by_hero_name, [locale, locale, hero_name, hero_name]).fetchall()
+
+
+def load_heroes_with_abilities(role=None, locale=DEFAULT_LOCALE):
+    '''Load heroes together with their abilities in two queries, one for the heroes and
+    one for all of their abilities, instead of one more query per hero.
+
+    Parameters
+    ----------
+    role: string
+        only heroes of this role (e.g. 'Tank'), or None for all heroes
+    locale: string
+        the locale of the text
+
+    Returns
+    -------
+    list
+        Hero objects in the order of search_hero_table_by_role, each with the list of
+        its Ability objects as its abilities
+    '''
+    heroes = []
+    heroes_by_id = {}
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        if (role is not None):
+            cursor.execute(search_heroes_by_role, [locale, role])
+        else:
+            cursor.execute(select_localised_heroes, [locale])
+        hero_id = LOCALISED_HERO_COLUMNS.index('Id')
+        for row in cursor.fetchall():
+            hero = hero_row_factory(cursor, row)
+            heroes_by_id[row[hero_id]] = hero
+            heroes.append(hero)
+
+        if (role is not None):
+            cursor.execute(search_abilities_by_role, [locale, locale, role])
+        else:
+            cursor.execute(select_localised_abilities + ' ORDER BY abilities.Id', [locale, locale])
+        hero_id = LOCALISED_ABILITY_COLUMNS.index('HeroId')
+        for row in cursor.fetchall():
+            heroes_by_id[row[hero_id]].abilities.append(ability_row_factory(cursor, row))
+    return heroes
+
+
+def search_hero_role_stats(hero_slugs):
+    '''Look up the standing within their roles of several heroes in one query.
+
+    Parameters
+    ----------
+    hero_slugs: list
+        the slugs of the heroes
+
+    Returns
+    -------
+    dict
+        key is a hero slug and value is the list of its (label, value, rank, count, percentile,
+        mean, median, stddev) in the order of ROLE_STAT_METRICS
+    '''
+    with read_connection() as connection:
+        return group_role_stats(connection.execute(search_hero_role_stats_query, [json.dumps(hero_slugs)]).fetchall())
+
+
+def load_hero_stats_store(locale=DEFAULT_LOCALE):
+    '''Load the slugs, names, roles and numeric stats of all heroes into NumPy arrays,
+    one array per column with one entry per hero, so that comparisons work on whole
+    columns instead of one Hero object per hero.
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the names and roles
+
+    Returns
+    -------
+    dict
+        'data_version' and 'locale' of the store; 'slug', 'name', 'role' and 'role_key' (the
+        role in the default locale, lowercased) arrays; one float array per metric of
+        ROLE_STAT_METRICS; and 'percentiles', with the percentile of every hero within its
+        role on every metric in the order of ROLE_STAT_METRICS as its columns
+    '''
+    with read_connection() as connection:
+        data_version = read_data_version(connection)
+        rows = connection.execute(select_hero_stats_columns, [locale]).fetchall()
+    metric_count = len(ROLE_STAT_METRICS)
+    if (rows):
+        columns = list(zip(*rows))
+    else:
+        columns = [()] * (4 + 2 * metric_count)
+    store = {
+        'data_version': data_version,
+        'locale': locale,
+        'slug': np.array(columns[0], dtype=object),
+        'name': np.array(columns[1], dtype=object),
+        'role': np.array(columns[2], dtype=object),
+        'role_key': np.array(columns[3], dtype=str)
+    }
+    for position, metric in enumerate(ROLE_STAT_METRICS):
+        store[metric] = np.array(columns[4 + position], dtype=float)
+    store['percentiles'] = np.array(columns[4 + metric_count:], dtype=float).T
+    return store
+
+
+def get_hero_stats_store(locale=DEFAULT_LOCALE):
+    ''' Return the hero stats store of a locale, loaded once per data version'''
+    data_version = get_data_version()
+    store = HERO_STATS_STORES.get(locale)
+    if (store is None or store['data_version'] != data_version):
+        store = load_hero_stats_store(locale)
+        HERO_STATS_STORES[locale] = store
+    return store
+
+
+def select_hero_stats(store, role=None, sort=None, descending=True, top=None, normalise=None):
+    '''Select heroes of a hero stats store with whole-array operations.
+
+    Parameters
+    ----------
+    store: dict
+        a hero stats store, see load_hero_stats_store
+    role: string
+        only heroes of this role, in any case (e.g. 'Tank'), or None for all heroes
+    sort: string
+        a metric of ROLE_STAT_METRICS to sort the heroes by, or None to keep them in Id order
+    descending: bool
+        whether the largest values come first
+    top: int
+        the number of heroes to keep, or None for all of them
+    normalise: string
+        'minmax' to scale every metric of the selected heroes from 0 (smallest) to 1 (largest),
+        'zscore' to turn it into standard scores, or None to keep the values
+
+    Returns
+    -------
+    dict
+        the same keys as the store, with the arrays holding the selected heroes in order
+
+    Raises
+    ------
+    ValueError
+        if normalise is not one of the normalisations above
+    '''
+    if (role is None):
+        indexes = np.arange(len(store['slug']))
+    else:
+        indexes = np.flatnonzero(store['role_key'] == role.lower())
+    if (sort is not None):
+        keys = store[sort][indexes]
+        if (descending):
+            keys = -keys
+        if (top is not None and 0 < top < len(keys)):
+            ## only the heroes up to the value of the top-th one need to be sorted; the ones
+            ## tied with it are all sorted too, so that ties are kept in Id order
+            threshold = keys[np.argpartition(keys, top - 1)[top - 1]]
+            candidates = np.flatnonzero(keys <= threshold)
+            indexes = indexes[candidates[np.argsort(keys[candidates], kind='stable')]]
+        else:
+            indexes = indexes[np.argsort(keys, kind='stable')]
+    if (top is not None):
+        indexes = indexes[:top]
+
+    selected = {'data_version': store['data_version'], 'locale': store['locale']}
+    for key in ['slug', 'name', 'role', 'role_key', 'percentiles'] + list(ROLE_STAT_METRICS):
+        selected[key] = store[key][indexes]
+    if (normalise is not None):
+        for metric in ROLE_STAT_METRICS:
+            values = selected[metric]
+            if (normalise == 'minmax'):
+                spread = values.max() - values.min() if len(values) else 0
+                selected[metric] = (values - values.min()) / spread if spread else np.zeros_like(values)
+            elif (normalise == 'zscore'):
+                spread = values.std() if len(values) else 0
+                selected[metric] = (values - values.mean()) / spread if spread else np.zeros_like(values)
+            else:
+                raise ValueError("unknown normalisation " + str(normalise))
+    return selected
+
+
+def search_ability_table_by_stat(key, min_value=float('-inf'), max_value=float('inf'), descending=False, limit=20):
+    '''Look up abilities by the parsed number of one of their stats,
+    e.g. abilities with a cooldown under 6 seconds, or the highest damage.
+
+    Parameters
+    ----------
+    key: string
+        the stat to look at (e.g. 'Cooldown', 'Damage', 'Duration', 'Ammo')
+    min_value: float
+        the smallest value to include
+    max_value: float
+        the largest value to include
+    descending: bool
+        whether the largest values come first
+    limit: int
+        the maximum number of results
+
+    Returns
+    -------
+    list
+        tuples of (ability name, hero name, raw value, numeric value, unit, hero slug)
+    '''
+    if (descending):
+        query = search_abilities_by_stat_descending
+    else:
+        query = search_abilities_by_stat_ascending
+    with read_connection() as connection:
+        return connection.execute(query, [key, min_value, max_value, limit]).fetchall()
+
+def search_wiki_text(text, locale=DEFAULT_LOCALE, limit=20, highlight=('[', ']')):
+    '''Full-text search over the hero and ability text of a locale, best matches first.
+    Every word of the text has to match (e.g. 'heal teammates'), and words are
+    matched by their stem, so 'heal' also finds 'heals' and 'healing'.
+
+    Parameters
+    ----------
+    text: string
+        the words to search for
+    locale: string
+        the locale of the text to search, the default locale's text is searched for locales that were not built
+    limit: int
+        the maximum number of results
+    highlight: tuple
+        the strings put before and after every matched word in the snippets
+
+    Returns
+    -------
+    list
+        tuples of (kind, name, hero name, snippet, rank), kind is 'hero' or 'ability'
+    '''
+    terms = re.findall(r'\w+', text)
+    if (not terms):
+        return []
+    match = ' '.join('"' + term + '"' for term in terms) # quoted, so user input is never FTS syntax
+    with read_connection() as connection:
+        built_locales = connection.execute("SELECT Value FROM wiki_info WHERE Key = 'locales'").fetchone()[0].split(',')
+        if (locale not in built_locales):
+            locale = DEFAULT_LOCALE
+        return connection.execute(search_wiki_text_query, [highlight[0], highlight[1], match, locale, highlight[0], highlight[1], match, locale, limit]).fetchall()
+
+
+def hero_comparison_figure(hero_stats, cmp_choice):
+    '''Build the figure of a comparison chart as plain dicts and lists in the plotly.js
+    figure format, so that no Plotly object has to be built and validated.
+
+    Parameters
+    ----------
+    hero_stats: dict
+        the heroes to compare, as selected by select_hero_stats
+    cmp_choice: int
+        the stat to compare, a key of CMP_CHART_SPECS
+
+    Returns
+    -------
+    dict
+        the 'data' (list of traces) and 'layout' of the figure
+    '''
+    spec = CMP_CHART_SPECS[cmp_choice]
+    names = hero_stats['name'].tolist()
+    layout = {'title': {'text': spec['title']}}
+    if (spec['type'] == 'pie'):
+        data = [{'type': 'pie', 'labels': names, 'values': hero_stats[spec['metric']].tolist()}]
+    elif (spec['type'] == 'grouped_bar'):
+        data = []
+        for metric_index, label in enumerate(ROLE_STAT_METRICS.values()):
+            data.append({'type': 'bar', 'name': label, 'x': names, 'y': hero_stats['percentiles'][:, metric_index].tolist()})
+        layout['barmode'] = 'group'
+        layout['yaxis'] = {'range': [0, 100]}
+    else:
+        data = [{'type': 'bar', 'x': names, 'y': hero_stats[spec['metric']].tolist()}]
+    return {'data': data, 'layout': layout}
+
+
+def hero_comparison_barplot(hero_stats, cmp_choice):
+    '''Show the chart of a comparison in the web browser.
+
+    Parameters
+    ----------
+    hero_stats: dict
+        the heroes to compare, as selected by select_hero_stats
+    cmp_choice: int
+        the stat to compare, a key of CMP_CHART_SPECS
+    '''
+    pio.show(hero_comparison_figure(hero_stats, cmp_choice), validate=False)
+
+
+def export_table_schema(pa, connection, table):
+    '''Build the Arrow schema of a table from the declared types of its columns.
+
+    Parameters
+    ----------
+    pa: module
+        the pyarrow module
+    connection: connection
+        a connection to the database
+    table: string
+        the name of the table
+
+    Returns
+    -------
+    Schema
+        one typed field per column, dictionary-encoded for EXPORT_DICTIONARY_COLUMNS
+    '''
+    fields = []
+    for cid, name, declared_type, notnull, default, pk in connection.execute('PRAGMA table_info("' + table + '")'):
+        if (name in EXPORT_DICTIONARY_COLUMNS):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = getattr(pa, EXPORT_ARROW_TYPES[declared_type.upper()])()
+        fields.append(pa.field(name, arrow_type, nullable=not (notnull or pk)))
+    return pa.schema(fields)
+
+
+def export_record_batches(pa, connection, table, schema, batch_size=EXPORT_BATCH_SIZE):
+    '''Yield the rows of a table as record batches of at most batch_size rows, so that
+    only one batch is held in memory at a time. The dictionary of an encoded column only
+    grows from one batch to the next, which Arrow IPC files store as dictionary deltas.
+
+    Parameters
+    ----------
+    pa: module
+        the pyarrow module
+    connection: connection
+        a connection to the database
+    table: string
+        the name of the table
+    schema: Schema
+        the schema built by export_table_schema
+    batch_size: int
+        the maximum number of rows of a batch
+    '''
+    dictionaries = {field.name: {} for field in schema if pa.types.is_dictionary(field.type)}
+    cursor = connection.execute('SELECT * FROM "' + table + '"')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if (not rows):
+            break
+        arrays = []
+        for field, values in zip(schema, zip(*rows)):
+            if (field.name in dictionaries):
+                codes = dictionaries[field.name]
+                indices = [None if value is None else codes.setdefault(value, len(codes)) for value in values]
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(codes), pa.string())))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_wiki_database(directory, compression=EXPORT_COMPRESSION):
+    '''Export the tables of EXPORT_TABLES to Parquet and Arrow IPC files,
+    e.g. heroes.parquet and heroes.arrow, for analysis with pandas or other tools.
+
+    Parameters
+    ----------
+    directory: string
+        the directory to write the files to, created if needed
+    compression: string
+        the compression codec of both file formats
+
+    Returns
+    -------
+    list
+        the paths of the written files, empty if pyarrow is not installed
+    '''
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        print("The export needs pyarrow, install it with: pip install pyarrow")
+        return []
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ipc_options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+    paths = []
+    ## read from the file, not from a memory snapshot, so only one batch of rows is ever in memory
+    connection = sqlite3.connect(wiki_file.resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        for table in EXPORT_TABLES:
+            schema = export_table_schema(pa, connection, table)
+            parquet_path = directory / (table + '.parquet')
+            arrow_path = directory / (table + '.arrow')
+            with pa.parquet.ParquetWriter(str(parquet_path), schema, compression=compression) as parquet_writer, pa.ipc.new_file(str(arrow_path), schema, options=ipc_options) as arrow_writer:
+                for batch in export_record_batches(pa, connection, table, schema):
+                    parquet_writer.write_batch(batch)
+                    arrow_writer.write_batch(batch)
+            paths += [parquet_path, arrow_path]
+    finally:
+        connection.close()
+    return paths
+
+
+def role_stats_info(hero):
+    ''' Return the standing of a hero within its role on every metric, one line per metric'''
+    lines = []
+    for label, value, rank, count, percentile, mean, median, stddev in search_hero_role_stats([hero.slug]).get(hero.slug, []):
+        lines.append(label + ": " + str(value) + " (rank " + str(rank) + "/" + str(count) + ", percentile " + str(round(percentile)) + ", role mean " + str(round(mean, 1)) + ", median " + str(round(median, 1)) + ", std. dev. " + str(round(stddev, 1)) + ")")
+    return "\n".join(lines)
 
 
 if __name__ == "__main__":
     ## Load the cache, save in global variable
     CACHE_DICT = load_cache()
 
+    if (not wiki_file.exists() and wiki_snapshot_file.exists()):
+        try:
+            manifest = restore_wiki_snapshot_file()
+            print("Restored data version " + manifest["data_version"] + " built at " + manifest["built_at"] + " from " + str(wiki_snapshot_file))
+        except (ValueError, KeyError, tarfile.TarError) as error:
+            print("Cannot restore " + str(wiki_snapshot_file) + ": " + str(error))
     if not wiki_file.exists():
-        ## build url dict from official website
-        hero_official_url_dict = build_hero_official_url_dict()
-
-        ## build hero dict from official url dict
-        hero_dict = {}
-        for hero_name in hero_official_url_dict.keys():
-            hero_url = hero_official_url_dict[hero_name]
-            hero_inst = get_official_hero_instance(hero_name, hero_url)
-            hero_dict[hero_name.lower()] = hero_inst
-            
-        ## build url dict from gamepedia website
-        hero_gamepedia_url_dict = build_hero_gamepedia_url_dict()
-
-        ## add gamepedia infos into class Hero in hero dict
-        for hero_name in hero_gamepedia_url_dict.keys():
-            try:
-                add_ability_stats_to_hero_instance(hero_dict[hero_name.lower()], hero_gamepedia_url_dict[hero_name])
-            except:
-                pass
-        
-        # add_ability_stats_to_hero_instance(hero_dict['roadhog'], hero_gamepedia_url_dict['Roadhog'])
-        # add_ability_stats_to_hero_instance(hero_dict['widowmaker'], hero_gamepedia_url_dict['Widowmaker'])
-
-        ## add overbuff infos into class Hero in hero dict
-        add_match_stats_to_hero_instance(hero_dict)
-
-        ## build tables in database
-        create_heroes_table(hero_dict)
-        create_abilities_table(hero_dict)
-
-        ## display infos in hero dict
-        # for hero_name in hero_official_url_dict.keys():
-        #     print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
-        #     hero_inst = hero_dict[hero_name.lower()]
-        #     print(hero_inst.info())
-        #     print(hero_inst.detail_info())
-        #     print("")
-        #     print(hero_inst.quote)
-        #     print("")
-        #     print(hero_inst.stats())
-        #     print(hero_inst.compete_stats())
-        #     print("*******************************************")
-        #     for ability in hero_inst.abilities.keys():
-        #         print(hero_inst.abilities[ability].info())
-        #         print(hero_inst.abilities[ability].show_stats())
-        #         print("*******************************************")
-        #     print("<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<")
+        build_wiki_database()
+
+    ## subcommands
+    if (len(sys.argv) > 1 and sys.argv[1] == 'snapshot'):
+        snapshot_path = Path(sys.argv[2]) if len(sys.argv) > 2 else wiki_snapshot_file
+        manifest = create_wiki_snapshot_file(snapshot_path)
+        print("Wrote data version " + manifest["data_version"] + " (" + str(manifest["size"]) + " bytes, sha256 " + manifest["sha256"] + ") to " + str(snapshot_path))
+        sys.exit()
+    if (len(sys.argv) > 1 and sys.argv[1] == 'export'):
+        export_directory = sys.argv[2] if len(sys.argv) > 2 else 'hero_wiki_export'
+        for path in export_wiki_database(export_directory):
+            print("Exported " + str(path))
+        sys.exit()
 
     ## interface
+    search_locale = DEFAULT_LOCALE
     while True:
         print("-----------------------------------------------------")
         print("########## Welcome to Overwatch Hero Wiki! ##########")
@@ -801,6 +2277,9 @@ if __name__ == "__main__":
         print("- 1. Heroes")
         print("- 2. Abilities")
         print("- 3. Heroes comparison")
+        print("- 4. Full-text search")
+        print("- 5. Filter heroes")
+        print("- 6. Language (current: " + search_locale + ")")
         search_option = input('Enter the number of your choice or "exit": ').lower()
         if search_option == 'exit':
             print("Thank you!")
@@ -820,10 +2299,9 @@ if __name__ == "__main__":
                         if (int(search_hero_option) == 1):
                             search_hero_name = input('Enter the name of the hero: ')
                             print("-----------------------------------------------------")
-                            results = search_hero_table_by_name(search_hero_name)
+                            results = search_hero_table_by_name(search_hero_name, search_locale, hero_row_factory)
                             if (results):
-                                search_hero_result = Hero()
-                                search_hero_result.set_val_by_list(results[0])
+                                search_hero_result = results[0]
                                 print(search_hero_result.info())
                                 while True:
                                     print("-----------------------------------------------------")
@@ -842,11 +2320,11 @@ if __name__ == "__main__":
                                             print(search_hero_name + "'s detail information:")
                                             print(search_hero_result.detail_info())
                                         elif (int(search_hero_detail_option) == 2):
-                                            results = search_ablility_table_by_hero_name(search_hero_name)
+                                            results = search_ablility_table_by_hero_name(search_hero_name, search_locale, ability_row_factory)
                                             index = 1
                                             print(search_hero_name + "'s abilities:")
                                             for result in results:
-                                                print("(" + str(index) + ") " + Ability(result[0], result[1], result[3], result[2]).info())
+                                                print("(" + str(index) + ") " + result.info())
                                                 index += 1                                            
                                         elif (int(search_hero_detail_option) == 3):
                                             print(search_hero_name + "'s character stats:")
@@ -854,6 +2332,8 @@ if __name__ == "__main__":
                                         elif (int(search_hero_detail_option) == 4):
                                             print(search_hero_name + "'s competition match stats:")
                                             print(search_hero_result.compete_stats())
+                                            print(search_hero_name + "'s standing within the " + search_hero_result.role + " role:")
+                                            print(role_stats_info(search_hero_result))
                                         elif (int(search_hero_detail_option) == 5):
                                             search_hero_result.show_pose()
                                     else:
@@ -873,20 +2353,18 @@ if __name__ == "__main__":
                                     break
                                 elif search_role_option.isnumeric() and int(search_role_option) >= 1 and int(search_role_option) <= 3:
                                     if (int(search_role_option) == 1):
-                                        results = search_hero_table_by_role("Support")
+                                        results = load_heroes_with_abilities("Support", search_locale)
                                         print("Support heroes:")
                                     elif (int(search_role_option) == 2):
-                                        results = search_hero_table_by_role("Damage")
+                                        results = load_heroes_with_abilities("Damage", search_locale)
                                         print("Damage heroes:")
                                     elif (int(search_role_option) == 3):
-                                        results = search_hero_table_by_role("Tank")
+                                        results = load_heroes_with_abilities("Tank", search_locale)
                                         print("Tank heroes:")
                                     if (results):
                                         index = 1
                                         hero_list = []
-                                        for result in results:
-                                            hero = Hero()
-                                            hero.set_val_by_list(result)
+                                        for hero in results:
                                             print("(" + str(index) + ") " + hero.info())
                                             hero_list.append(hero)
                                             index += 1
@@ -918,11 +2396,10 @@ if __name__ == "__main__":
                                                             print(hero_list[int(search_hero_index_option)-1].name + "'s detail information:")
                                                             print(hero_list[int(search_hero_index_option)-1].detail_info())
                                                         elif (int(search_hero_detail_option) == 2):
-                                                            results = search_ablility_table_by_hero_name(hero_list[int(search_hero_index_option)-1].name)
                                                             index = 1
                                                             print(hero_list[int(search_hero_index_option)-1].name + "'s abilities:")
-                                                            for result in results:
-                                                                print("(" + str(index) + ") " + Ability(result[0], result[1], result[3], result[2]).info())
+                                                            for ability in hero_list[int(search_hero_index_option)-1].abilities:
+                                                                print("(" + str(index) + ") " + ability.info())
                                                                 index += 1                                            
                                                         elif (int(search_hero_detail_option) == 3):
                                                             print(hero_list[int(search_hero_index_option)-1].name + "'s character stats:")
@@ -930,6 +2407,8 @@ if __name__ == "__main__":
                                                         elif (int(search_hero_detail_option) == 4):
                                                             print(hero_list[int(search_hero_index_option)-1].name + "'s competition match stats:")
                                                             print(hero_list[int(search_hero_index_option)-1].compete_stats())
+                                                            print(hero_list[int(search_hero_index_option)-1].name + "'s standing within the " + hero_list[int(search_hero_index_option)-1].role + " role:")
+                                                            print(role_stats_info(hero_list[int(search_hero_index_option)-1]))
                                                         elif (int(search_hero_detail_option) == 5):
                                                             hero_list[int(search_hero_index_option)-1].show_pose()
                                                     else:
@@ -951,19 +2430,20 @@ if __name__ == "__main__":
                     print("- Which way do you want to search for an ability?")
                     print("- 1. By ability name")
                     print("- 2. By hero name")
+                    print("- 3. By the range of a stat")
                     search_ability_option = input('Enter the number of your choice or "back": ').lower()
                     print("-----------------------------------------------------")
                     if search_ability_option == 'back':
                         break
-                    elif search_ability_option.isnumeric() and int(search_ability_option) >= 1 and int(search_ability_option) <= 2:
+                    elif search_ability_option.isnumeric() and int(search_ability_option) >= 1 and int(search_ability_option) <= 3:
                         if (int(search_ability_option) == 1):
                             search_ability_name = input('Enter the name of the ability: ')
                             print("-----------------------------------------------------")
-                            results = search_ablility_table_by_ablitity_name(search_ability_name)
+                            results = search_ablility_table_by_ablitity_name(search_ability_name, search_locale, row_factory=sqlite3.Row)
                             if (results):
                                 result = results[0]
-                                search_ability_result = Ability(result[0], result[1], result[3], result[2])
-                                print("Belongs to hero: " + result[4])
+                                search_ability_result = Ability(result['Name'], result['Description'], result['Video_URL'], result['Stats'])
+                                print("Belongs to hero: " + result['Hero_Name'])
                                 print(search_ability_result.info())
                                 while True:
                                     print("-----------------------------------------------------")
@@ -987,13 +2467,12 @@ if __name__ == "__main__":
                         elif (int(search_ability_option) == 2):
                             search_hero_name = input('Enter the name of the hero: ')
                             print("-----------------------------------------------------")
-                            results = search_ablility_table_by_hero_name(search_hero_name)
+                            results = search_ablility_table_by_hero_name(search_hero_name, search_locale, ability_row_factory)
                             if (results):
                                 index = 1
                                 ability_list = []
                                 print(search_hero_name + "'s abilities:")
-                                for result in results:
-                                    ability = Ability(result[0], result[1], result[3], result[2])
+                                for ability in results:
                                     ability_list.append(ability)
                                     print("(" + str(index) + ") " + ability.info())
                                     index += 1
@@ -1030,6 +2509,25 @@ if __name__ == "__main__":
                                     print("Invalid choice. Try again.")
                             else:
                                 print("No result matches.")
+                        elif (int(search_ability_option) == 3):
+                            stat_key = input('Enter the stat (e.g. Cooldown, Damage, Duration): ').strip()
+                            range_text = input('Enter the range of ' + stat_key + ' as "min-max" (e.g. "-6" or "50-100"), or leave it empty: ').strip()
+                            stat_min, stat_max = float('-inf'), float('inf')
+                            if (re.fullmatch(r'(\d+(\.\d+)?)?-(\d+(\.\d+)?)?', range_text) and range_text != '-'):
+                                min_text, max_text = range_text.split('-')
+                                stat_min, stat_max = float(min_text or '-inf'), float(max_text or 'inf')
+                            elif (range_text):
+                                print("Invalid range, showing every value of " + stat_key + ".")
+                            stat_descending = input('Largest first? (y/n): ').strip().lower() == 'y'
+                            print("-----------------------------------------------------")
+                            results = search_ability_table_by_stat(stat_key, stat_min, stat_max, stat_descending)
+                            if (results):
+                                index = 1
+                                for ability_name, hero_name, raw_value, numeric_value, unit, hero_slug in results:
+                                    print("(" + str(index) + ") " + ability_name + " of " + hero_name + ": " + stat_key + " " + raw_value)
+                                    index += 1
+                            else:
+                                print("No result matches.")
                     else:
                         print("Invalid choice. Try again.")
         elif search_option.isnumeric() and int(search_option) == 3:
@@ -1045,22 +2543,16 @@ if __name__ == "__main__":
                 if search_role_option == 'back':
                     break
                 elif search_role_option.isnumeric() and int(search_role_option) >= 1 and int(search_role_option) <= 4:
+                    hero_stats_store = get_hero_stats_store(search_locale)
                     if (int(search_role_option) == 1):
-                        results = search_hero_table_by_role("Support")
+                        cmp_role = "Support"
                     elif (int(search_role_option) == 2):
-                        results = search_hero_table_by_role("Damage")
+                        cmp_role = "Damage"
                     elif (int(search_role_option) == 3):
-                        results = search_hero_table_by_role("Tank")
+                        cmp_role = "Tank"
                     elif (int(search_role_option) == 4):
-                        results = search_hero_table_by_role()
-                    if (results):
-                        index = 1
-                        hero_list = []
-                        for result in results:
-                            hero = Hero()
-                            hero.set_val_by_list(result)
-                            hero_list.append(hero)
-                            index += 1
+                        cmp_role = None
+                    if (len(select_hero_stats(hero_stats_store, cmp_role)['name'])):
                         while True:
                             print("-----------------------------------------------------")
                             print("- Which stats do you want to compare?")
@@ -1071,18 +2563,82 @@ if __name__ == "__main__":
                             print("- 5. Win rate")
                             print("- 6. Tie rate")
                             print("- 7. On fire rate")
+                            print("- 8. Percentile within role")
                             search_cmp_option = input('Enter the number of your choice or "back": ').lower()
                             print("-----------------------------------------------------")
                             if search_cmp_option == 'back':
                                 break
-                            elif search_cmp_option.isnumeric() and int(search_cmp_option) >= 1 and int(search_cmp_option) <= 7:
-                                hero_comparison_barplot(hero_list, int(search_cmp_option))
+                            elif search_cmp_option.isnumeric() and int(search_cmp_option) >= 1 and int(search_cmp_option) <= 8:
+                                hero_comparison_barplot(select_hero_stats(hero_stats_store, cmp_role, CMP_CHART_SPECS[int(search_cmp_option)]['metric']), int(search_cmp_option))
                             else:
                                 print("Invalid choice. Try again.")
                     else:
                         print("No result matches.")
                 else:
                     print("Invalid choice. Try again.")
+        elif search_option.isnumeric() and int(search_option) == 4:
+            while True:
+                print("-----------------------------------------------------")
+                search_text = input('Enter the words to search for (e.g. heal teammates) or "back": ')
+                print("-----------------------------------------------------")
+                if search_text.lower() == 'back':
+                    break
+                results = search_wiki_text(search_text, search_locale)
+                if (results):
+                    index = 1
+                    for result in results:
+                        if (result[0] == 'hero'):
+                            print("(" + str(index) + ") Hero " + result[1] + ":")
+                        else:
+                            print("(" + str(index) + ") Ability " + result[1] + " of " + result[2] + ":")
+                        print("    " + " ".join(result[3].split()))
+                        index += 1
+                else:
+                    print("No result matches.")
+        elif search_option.isnumeric() and int(search_option) == 5:
+            print("-----------------------------------------------------")
+            print("- Leave a criterion empty to not filter on it.")
+            filter_role = input('Enter the role (Support, Damage or Tank): ').strip().capitalize() or None
+            filter_ranges = {}
+            for range_name in HERO_FILTER_RANGES.keys():
+                range_text = input('Enter the range of ' + range_name.replace('_', ' ') + ' as "min-max" (e.g. "200-" or "50-55"): ').strip()
+                if (re.fullmatch(r'(\d+(\.\d+)?)?-(\d+(\.\d+)?)?', range_text) and range_text != '-'):
+                    min_text, max_text = range_text.split('-')
+                    filter_ranges[range_name] = (float(min_text) if min_text else None, float(max_text) if max_text else None)
+                elif (range_text):
+                    print("Invalid range, not filtering on " + range_name.replace('_', ' ') + ".")
+            filter_nationality = input('Enter the nationality: ').strip() or None
+            filter_affiliation = input('Enter words of the affiliation: ').strip() or None
+            filter_sort = input('Sort by (' + ', '.join(HERO_FILTER_SORTS.keys()) + '): ').strip().lower()
+            if (filter_sort not in HERO_FILTER_SORTS):
+                filter_sort = 'name'
+            filter_descending = input('Largest first? (y/n): ').strip().lower() == 'y'
+            filter_after = None
+            index = 1
+            while True:
+                print("-----------------------------------------------------")
+                results, filter_after = filter_hero_table(filter_role, filter_ranges, filter_nationality, filter_affiliation, filter_sort, filter_descending, filter_after, locale=search_locale, row_factory=hero_row_factory)
+                if (not results and index == 1):
+                    print("No result matches.")
+                for hero in results:
+                    print("(" + str(index) + ") " + hero.name + " (" + hero.role + "): Health " + hero.health + ", Armor " + hero.armor + ", Shield " + hero.shield + ", Win rate " + str(hero.win_rate) + "%, Pick rate " + str(hero.pick_rate) + "%")
+                    index += 1
+                if (filter_after is None):
+                    break
+                if (input('Enter "more" for the next page or anything else to go back: ').lower() != 'more'):
+                    break
+        elif search_option.isnumeric() and int(search_option) == 6:
+            print("-----------------------------------------------------")
+            print("- Which language do you want to search in?")
+            index = 1
+            for locale in LOCALES:
+                print("- " + str(index) + ". " + locale)
+                index += 1
+            search_locale_option = input('Enter the number of your choice or "back": ').lower()
+            if search_locale_option.isnumeric() and int(search_locale_option) >= 1 and int(search_locale_option) <= len(LOCALES):
+                search_locale = LOCALES[int(search_locale_option)-1]
+            elif search_locale_option != 'back':
+                print("Invalid choice. Try again.")
         else:
             print("-----------------------------------------------------")
             print("Invalid choice. Try again.")
@@ -4,26 +4,107 @@
 #################################
 
 from bs4 import BeautifulSoup
-import plotly.graph_objects as go 
+import numpy as np
 import requests
 import json
 import time
 import re
 import webbrowser
 import sqlite3
+import threading
+import operator
+import functools
+import queue
+import os
+import uuid
+import math
+import hashlib
+import tarfile
+import io
+import gzip
+import sys
+import gc
+import signal
+import socket
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from flask import Flask, render_template, request
+from plotly.offline import get_plotlyjs
+from werkzeug.serving import BaseWSGIServer
+from flask import Flask, Response, abort, make_response, redirect, render_template, request, url_for
+from markupsafe import Markup, escape
+try:
+    import brotli
+except ImportError:
+    brotli = None # responses are only compressed with gzip without the optional package brotli
 
 app = Flask(__name__)
+CHART_CACHE_SIZE = 64 # 4 roles x 8 comparisons, twice over while a new data version replaces the old one; other locales share it
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable' # asset file names change with their content
+CHART_DATA_CACHE_CONTROL = 'public, no-cache' # kept by clients, but checked against the data version by its ETag
+PAGE_CACHE_CONTROL = 'public, no-cache' # pages of the GET routes, checked against the data version by their ETag
+## rendered pages of the GET routes are kept in memory up to this many bytes, least recently used first out;
+## set HERO_WIKI_RESPONSE_CACHE_BYTES=0 to render every page
+RESPONSE_CACHE_BYTES = int(os.environ.get("HERO_WIKI_RESPONSE_CACHE_BYTES", 32 * 1024 * 1024))
+RESPONSE_CACHE = OrderedDict() # key is (view, view arguments, locale), value is (body, status, mimetype)
+RESPONSE_CACHE_STATS = {'data_version': None, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+RESPONSE_CACHE_LOCK = threading.Lock()
+## view arguments matched in any case, lowercased before they reach the view so that every spelling shares one cached page
+CASE_INSENSITIVE_PAGE_ARGS = ('role', 'metric')
+## responses of these types and at least COMPRESSION_MIN_BYTES long are compressed for clients
+## accepting it, with brotli if installed or gzip; set HERO_WIKI_COMPRESSION_MIN_BYTES to change it
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'application/javascript'}
+COMPRESSION_MIN_BYTES = int(os.environ.get("HERO_WIKI_COMPRESSION_MIN_BYTES", 1024))
+COMPRESSION_ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip'] # in order of preference
+## the levels of responses compressed on every request, and of the ones compressed once and kept
+COMPRESSION_LEVELS = {'br': int(os.environ.get("HERO_WIKI_BROTLI_QUALITY", 5)), 'gzip': int(os.environ.get("HERO_WIKI_GZIP_LEVEL", 6))}
+PRECOMPRESSION_LEVELS = {'br': 9, 'gzip': 9}
+COMPRESSED_FILE_SUFFIXES = {'br': '.br', 'gzip': '.gz'} # next to the pages of the static site
+COMPRESSION_STATS = {} # key is an endpoint, see compression_stats
+COMPRESSION_LOCK = threading.Lock()
+SITE_EXPORT_WORKERS = os.cpu_count() or 4 # threads rendering the pages of the static site
+SITE_MANIFEST_NAME = '.site_manifest.json' # the source data and checksum of every page of the static site, see export_static_site
+SITE_MANIFEST_FORMAT = 2 # increase when the manifest changes, older manifests are then ignored
+SITE_PAGE_MIMETYPES = {'.html': 'text/html', '.json': 'application/json', '.js': 'application/javascript'}
+## the production server of `python final_proj_flask.py serve`, see serve_prefork
+SERVER_HOST = os.environ.get("HERO_WIKI_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("HERO_WIKI_PORT", 8000))
+SERVER_WORKERS = int(os.environ.get("HERO_WIKI_WORKERS", os.cpu_count() or 2)) # processes, one per core by default
+SERVER_THREADS = int(os.environ.get("HERO_WIKI_THREADS", 8)) # request threads of each process
+SERVER_SHUTDOWN_SECONDS = float(os.environ.get("HERO_WIKI_SHUTDOWN_SECONDS", 30)) # for the workers to finish, then they are killed
+SERVER_SIGNALS = (signal.SIGTERM, signal.SIGHUP, signal.SIGINT) # handled by the launcher and the workers
 wiki_file = Path("./hero_wiki.sqlite")
+## a packaged finished build, restored on a machine without hero_wiki.sqlite instead of scraping
+wiki_snapshot_file = Path(os.environ.get("HERO_WIKI_SNAPSHOT", "./hero_wiki_snapshot.tar.gz"))
 
 OFFICAL_WEBSITE_URL = 'https://playoverwatch.com'
 GAMEPEDIA_WEBSITE_URL = 'https://overwatch.gamepedia.com'
 OVERBUFF_WEBSITE_URL = 'https://www.overbuff.com/heroes'
-OFFICAL_WEBSITE_INDEX_PATH = '/en-us/heroes/'
+OFFICAL_WEBSITE_INDEX_PATH = '/{locale}/heroes/'
 GAMEPEDIA_WEBSITE_INDEX_PATH = '/Heroes'
 CACHE_FILE_NAME = 'cache.json'
 CACHE_DICT = {}
+CACHE_LOCK = threading.Lock()
+READ_CONNECTIONS = queue.LifoQueue()
+
+## searches are answered from an in-memory copy of hero_wiki.sqlite, which costs about
+## the size of the file in RAM once per process (shared by all of its read connections);
+## set HERO_WIKI_SERVE_FROM=disk to read the file directly instead
+SERVE_FROM_MEMORY = os.environ.get("HERO_WIKI_SERVE_FROM", "memory") != "disk"
+SNAPSHOT_CHECK_INTERVAL = 5 # seconds between checks of the file for a new data version
+MEMORY_SNAPSHOT = {'generation': 0, 'uri': None, 'anchor': None, 'data_version': None, 'built_at': None, 'checked_at': 0.0}
+DISK_DATA_INFO = {'data_version': None, 'built_at': None, 'checked_at': 0.0} # when serving from disk, see refresh_disk_data_info
+HERO_STATS_STORES = {} # key is a locale, see get_hero_stats_store
+SNAPSHOT_LOCK = threading.RLock()
+SNAPSHOT_FILE_FORMAT = 2 # increase when the tables change, older snapshot files are then refused
+
+## the default locale is stored in heroes/abilities, the others only keep
+## the text that differs from it in hero_translations/ability_translations
+DEFAULT_LOCALE = 'en-us'
+LOCALES = ['en-us', 'de-de', 'es-es', 'fr-fr', 'ja-jp', 'ko-kr', 'pt-br', 'zh-tw']
 
 headers = {
     'User-Agent': 'UMSI 507 Course Final Project - Overwatch Hero Wiki',
@@ -34,13 +115,13 @@ headers = {
 create_heroes = '''
     CREATE TABLE IF NOT EXISTS "heroes" (
         "Id"          INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-        "Name"        TEXT NOT NULL,
-        "Role"        TEXT NOT NULL,
+        "Name"        TEXT NOT NULL COLLATE NOCASE,
+        "Role"        TEXT NOT NULL COLLATE NOCASE,
         "Description" TEXT NOT NULL,
         "Quote"       TEXT NOT NULL,
         "Real_Name"   TEXT NOT NULL,
         "Age"         TEXT NOT NULL,
-        "Nationality" TEXT NOT NULL,
+        "Nationality" TEXT NOT NULL COLLATE NOCASE,
         "Occupation"  TEXT NOT NULL,
         "Base"        TEXT NOT NULL,
         "Affiliation" TEXT NOT NULL,
@@ -51,7 +132,14 @@ create_heroes = '''
         "Win_Rate"    REAL NOT NULL,
         "Tie_Rate"    REAL NOT NULL,
         "OnFire_Rate" REAL NOT NULL,
-        "Pose_URL"    TEXT NOT NULL
+        "Pose_URL"    TEXT NOT NULL,
+        "Slug"        TEXT NOT NULL,
+        "Health_Base" REAL NOT NULL,
+        "Health_Alt"  REAL,
+        "Armor_Base"  REAL NOT NULL,
+        "Armor_Alt"   REAL,
+        "Shield_Base" REAL NOT NULL,
+        "Shield_Alt"  REAL
     );
 '''
 
@@ -61,16 +149,16 @@ drop_heroes = '''
 
 add_hero = '''
     INSERT INTO heroes
-    VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 '''
 
 create_abilities = '''
     CREATE TABLE IF NOT EXISTS "abilities" (
         "Id"          INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-        "Name"        TEXT NOT NULL,
+        "Name"        TEXT NOT NULL COLLATE NOCASE,
         "Description" TEXT NOT NULL,
         "Stats"       TEXT NOT NULL,
-        "HeroId"      INTEGER NOT NULL,
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
         "Video_URL"   TEXT NOT NULL
     );
 '''
@@ -84,6 +172,432 @@ add_ability = '''
     VALUES (NULL, ?, ?, ?, ?, ?)
 '''
 
+create_hero_translations = '''
+    CREATE TABLE IF NOT EXISTS "hero_translations" (
+        "HeroId"      INTEGER NOT NULL,
+        "Locale"      TEXT NOT NULL,
+        "Name"        TEXT COLLATE NOCASE,
+        "Role"        TEXT,
+        "Description" TEXT,
+        "Quote"       TEXT,
+        PRIMARY KEY ("HeroId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_translations = '''
+    DROP TABLE IF EXISTS "hero_translations";
+'''
+
+add_hero_translation = '''
+    INSERT INTO hero_translations
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+create_ability_translations = '''
+    CREATE TABLE IF NOT EXISTS "ability_translations" (
+        "AbilityId"   INTEGER NOT NULL,
+        "Locale"      TEXT NOT NULL,
+        "Name"        TEXT COLLATE NOCASE,
+        "Description" TEXT,
+        PRIMARY KEY ("AbilityId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_ability_translations = '''
+    DROP TABLE IF EXISTS "ability_translations";
+'''
+
+add_ability_translation = '''
+    INSERT INTO ability_translations
+    VALUES (?, ?, ?, ?)
+'''
+
+create_ability_stats = '''
+    CREATE TABLE IF NOT EXISTS "ability_stats" (
+        "AbilityId"     INTEGER NOT NULL REFERENCES "abilities" ("Id"),
+        "Position"      INTEGER NOT NULL,
+        "Key"           TEXT NOT NULL COLLATE NOCASE,
+        "Raw_Value"     TEXT NOT NULL,
+        "Numeric_Value" REAL,
+        "Unit"          TEXT,
+        PRIMARY KEY ("AbilityId", "Position")
+    ) WITHOUT ROWID;
+'''
+
+drop_ability_stats = '''
+    DROP TABLE IF EXISTS "ability_stats";
+'''
+
+add_ability_stat = '''
+    INSERT INTO ability_stats
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+## everything hero.html shows for one hero in one locale, serialised as compact JSON
+create_hero_pages = '''
+    CREATE TABLE IF NOT EXISTS "hero_pages" (
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
+        "Locale"      TEXT NOT NULL,
+        "Page"        TEXT NOT NULL,
+        PRIMARY KEY ("HeroId", "Locale")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_pages = '''
+    DROP TABLE IF EXISTS "hero_pages";
+'''
+
+add_hero_page = '''
+    INSERT INTO hero_pages
+    VALUES (?, ?, ?)
+'''
+
+## every hero's standing within its role on each metric, next to the mean, median and
+## standard deviation of the role, computed once at build time with window functions
+create_hero_role_stats = '''
+    CREATE TABLE IF NOT EXISTS "hero_role_stats" (
+        "HeroId"      INTEGER NOT NULL REFERENCES "heroes" ("Id"),
+        "Metric"      TEXT NOT NULL,
+        "Role"        TEXT NOT NULL COLLATE NOCASE,
+        "Value"       REAL NOT NULL,
+        "Role_Rank"   INTEGER NOT NULL,
+        "Role_Count"  INTEGER NOT NULL,
+        "Percentile"  REAL NOT NULL,
+        "Role_Mean"   REAL NOT NULL,
+        "Role_Median" REAL NOT NULL,
+        "Role_Stddev" REAL NOT NULL,
+        PRIMARY KEY ("HeroId", "Metric")
+    ) WITHOUT ROWID;
+'''
+
+drop_hero_role_stats = '''
+    DROP TABLE IF EXISTS "hero_role_stats";
+'''
+
+## rank 1 is the largest value of the role, the percentile is the share of the other heroes
+## of the role with a smaller value, and the median averages the one or two middle values
+add_hero_role_stats = '''
+    INSERT INTO hero_role_stats
+    WITH metric_values AS (
+        SELECT Id AS HeroId, 'health' AS Metric, Role, Health_Base AS Value FROM heroes
+        UNION ALL SELECT Id, 'armor', Role, Armor_Base FROM heroes
+        UNION ALL SELECT Id, 'shield', Role, Shield_Base FROM heroes
+        UNION ALL SELECT Id, 'pick_rate', Role, Pick_Rate FROM heroes
+        UNION ALL SELECT Id, 'win_rate', Role, Win_Rate FROM heroes
+        UNION ALL SELECT Id, 'tie_rate', Role, Tie_Rate FROM heroes
+        UNION ALL SELECT Id, 'on_fire_rate', Role, OnFire_Rate FROM heroes
+    ), ranked AS (
+        SELECT HeroId, Metric, Role, Value,
+            RANK() OVER (PARTITION BY Metric, Role ORDER BY Value DESC) AS Role_Rank,
+            ROW_NUMBER() OVER (PARTITION BY Metric, Role ORDER BY Value) AS Position,
+            PERCENT_RANK() OVER (PARTITION BY Metric, Role ORDER BY Value) * 100 AS Percentile,
+            COUNT(*) OVER role_window AS Role_Count,
+            AVG(Value) OVER role_window AS Role_Mean,
+            AVG(Value * Value) OVER role_window AS Role_Mean_Square
+        FROM metric_values
+        WINDOW role_window AS (PARTITION BY Metric, Role)
+    ), medians AS (
+        SELECT Metric, Role, AVG(Value) AS Role_Median FROM ranked
+        WHERE Position IN ((Role_Count + 1) / 2, (Role_Count + 2) / 2)
+        GROUP BY Metric, Role
+    )
+    SELECT ranked.HeroId, ranked.Metric, ranked.Role, ranked.Value, ranked.Role_Rank, ranked.Role_Count,
+        ranked.Percentile, ranked.Role_Mean, medians.Role_Median,
+        sqrt(max(ranked.Role_Mean_Square - ranked.Role_Mean * ranked.Role_Mean, 0))
+    FROM ranked JOIN medians ON medians.Metric = ranked.Metric AND medians.Role = ranked.Role
+'''
+
+create_wiki_info = '''
+    CREATE TABLE IF NOT EXISTS "wiki_info" (
+        "Key"         TEXT PRIMARY KEY,
+        "Value"       TEXT NOT NULL
+    ) WITHOUT ROWID;
+'''
+
+drop_wiki_info = '''
+    DROP TABLE IF EXISTS "wiki_info";
+'''
+
+add_wiki_info = '''
+    INSERT INTO wiki_info
+    VALUES (?, ?)
+'''
+
+## locale-specific text falls back to the default locale where no translation is stored
+localised_hero_columns = '''
+    SELECT heroes.Id, COALESCE(t.Name, heroes.Name) AS Name, COALESCE(t.Role, heroes.Role) AS Role,
+        COALESCE(t.Description, heroes.Description) AS Description, COALESCE(t.Quote, heroes.Quote) AS Quote,
+        heroes.Real_Name, heroes.Age, heroes.Nationality, heroes.Occupation, heroes.Base,
+        heroes.Affiliation, heroes.Health, heroes.Armor, heroes.Shield, heroes.Pick_Rate,
+        heroes.Win_Rate, heroes.Tie_Rate, heroes.OnFire_Rate, heroes.Pose_URL, heroes.Slug,
+        heroes.Health_Base, heroes.Health_Alt, heroes.Armor_Base, heroes.Armor_Alt,
+        heroes.Shield_Base, heroes.Shield_Alt'''
+
+localised_hero_from = '''
+    FROM heroes LEFT JOIN hero_translations AS t
+        ON t.HeroId = heroes.Id AND t.Locale = ?
+'''
+
+select_localised_heroes = localised_hero_columns + localised_hero_from
+
+## the names of the columns of localised_hero_columns and select_localised_abilities, in order
+LOCALISED_HERO_COLUMNS = ('Id', 'Name', 'Role', 'Description', 'Quote', 'Real_Name', 'Age', 'Nationality', 'Occupation', 'Base',
+    'Affiliation', 'Health', 'Armor', 'Shield', 'Pick_Rate', 'Win_Rate', 'Tie_Rate', 'OnFire_Rate', 'Pose_URL', 'Slug',
+    'Health_Base', 'Health_Alt', 'Armor_Base', 'Armor_Alt', 'Shield_Base', 'Shield_Alt')
+LOCALISED_ABILITY_COLUMNS = ('Name', 'Description', 'Stats', 'Video_URL', 'Hero_Name', 'Id', 'HeroId', 'Hero_Slug')
+
+select_localised_abilities = '''
+    SELECT COALESCE(at.Name, abilities.Name) AS Name, COALESCE(at.Description, abilities.Description) AS Description,
+        abilities.Stats, abilities.Video_URL, COALESCE(ht.Name, heroes.Name) AS Hero_Name, abilities.Id, abilities.HeroId,
+        heroes.Slug AS Hero_Slug
+    FROM abilities JOIN heroes ON abilities.HeroId = heroes.Id
+    LEFT JOIN ability_translations AS at
+        ON at.AbilityId = abilities.Id AND at.Locale = ?
+    LEFT JOIN hero_translations AS ht
+        ON ht.HeroId = heroes.Id AND ht.Locale = ?
+'''
+
+## names are matched case-insensitively in the default locale and in the translations,
+## each side through its own index
+search_heroes_by_name = select_localised_heroes + '''
+    WHERE heroes.Id IN (
+        SELECT Id FROM heroes WHERE Name = ?
+        UNION SELECT HeroId FROM hero_translations WHERE Name = ?)
+'''
+
+select_hero_roles = '''
+    SELECT DISTINCT Role FROM heroes ORDER BY Role
+'''
+
+search_heroes_by_role = select_localised_heroes + '''
+    WHERE heroes.Role = ?
+'''
+
+search_abilities_by_name = select_localised_abilities + '''
+    WHERE abilities.Id IN (
+        SELECT Id FROM abilities WHERE Name = ?
+        UNION SELECT AbilityId FROM ability_translations WHERE Name = ?)
+'''
+
+search_abilities_by_hero_name = select_localised_abilities + '''
+    WHERE abilities.HeroId IN (
+        SELECT Id FROM heroes WHERE Name = ?
+        UNION SELECT HeroId FROM hero_translations WHERE Name = ?)
+'''
+
+## the pages and abilities of the GET routes and the static site find a hero by its slug
+search_hero_page_by_slug_query = '''
+    SELECT Page FROM hero_pages
+    WHERE Locale = ? AND HeroId = (SELECT Id FROM heroes WHERE Slug = ?)
+'''
+
+search_abilities_by_hero_slug = select_localised_abilities + '''
+    WHERE heroes.Slug = ?
+    ORDER BY abilities.Id
+'''
+
+## the stat lines of several abilities, in display order
+search_ability_stats_query = '''
+    SELECT AbilityId, Key, Raw_Value FROM ability_stats
+    WHERE AbilityId IN (SELECT value FROM json_each(?))
+    ORDER BY AbilityId, Position
+'''
+
+## the standing within their roles of several heroes
+search_hero_role_stats_query = '''
+    SELECT heroes.Slug, Metric, Value, Role_Rank, Role_Count, Percentile, Role_Mean, Role_Median, Role_Stddev
+    FROM heroes JOIN hero_role_stats ON hero_role_stats.HeroId = heroes.Id
+    WHERE heroes.Slug IN (SELECT value FROM json_each(?))
+'''
+
+## the columns of the hero stats store, one row per hero in Id order, with the percentiles
+## of hero_role_stats turned into one column per metric in the order of ROLE_STAT_METRICS
+select_hero_stats_columns = '''
+    SELECT heroes.Slug, COALESCE(t.Name, heroes.Name), COALESCE(t.Role, heroes.Role), lower(heroes.Role),
+        heroes.Health_Base, heroes.Armor_Base, heroes.Shield_Base, heroes.Pick_Rate,
+        heroes.Win_Rate, heroes.Tie_Rate, heroes.OnFire_Rate,
+        p.Health, p.Armor, p.Shield, p.Pick_Rate, p.Win_Rate, p.Tie_Rate, p.OnFire_Rate
+    FROM heroes LEFT JOIN hero_translations AS t
+        ON t.HeroId = heroes.Id AND t.Locale = ?
+    LEFT JOIN (
+        SELECT HeroId,
+            MAX(CASE Metric WHEN 'health' THEN Percentile END) AS Health,
+            MAX(CASE Metric WHEN 'armor' THEN Percentile END) AS Armor,
+            MAX(CASE Metric WHEN 'shield' THEN Percentile END) AS Shield,
+            MAX(CASE Metric WHEN 'pick_rate' THEN Percentile END) AS Pick_Rate,
+            MAX(CASE Metric WHEN 'win_rate' THEN Percentile END) AS Win_Rate,
+            MAX(CASE Metric WHEN 'tie_rate' THEN Percentile END) AS Tie_Rate,
+            MAX(CASE Metric WHEN 'on_fire_rate' THEN Percentile END) AS OnFire_Rate
+        FROM hero_role_stats GROUP BY HeroId
+    ) AS p ON p.HeroId = heroes.Id
+    ORDER BY heroes.Id
+'''
+
+## abilities by the parsed number of one stat (e.g. 'Cooldown'), through idx_ability_stats_key_value
+select_abilities_by_stat = '''
+    SELECT abilities.Name, heroes.Name, ability_stats.Raw_Value, ability_stats.Numeric_Value, ability_stats.Unit, heroes.Slug
+    FROM ability_stats JOIN abilities ON abilities.Id = ability_stats.AbilityId
+    JOIN heroes ON heroes.Id = abilities.HeroId
+    WHERE ability_stats.Key = ? AND ability_stats.Numeric_Value BETWEEN ? AND ?
+'''
+
+search_abilities_by_stat_ascending = select_abilities_by_stat + '''
+    ORDER BY ability_stats.Numeric_Value ASC LIMIT ?
+'''
+
+search_abilities_by_stat_descending = select_abilities_by_stat + '''
+    ORDER BY ability_stats.Numeric_Value DESC LIMIT ?
+'''
+
+## full-text indexes over the hero and ability text, with one row of text per hero or ability
+## and built locale, since the translated text is spread over two tables
+create_heroes_fts = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "heroes_fts" USING fts5(
+        "Description", "Quote", "Occupation", "Affiliation", "HeroId" UNINDEXED, "Locale" UNINDEXED,
+        tokenize='porter unicode61 remove_diacritics 2'
+    );
+'''
+
+drop_heroes_fts = '''
+    DROP TABLE IF EXISTS "heroes_fts";
+'''
+
+create_abilities_fts = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "abilities_fts" USING fts5(
+        "Name", "Description", "Stats", "AbilityId" UNINDEXED, "Locale" UNINDEXED,
+        tokenize='porter unicode61 remove_diacritics 2'
+    );
+'''
+
+drop_abilities_fts = '''
+    DROP TABLE IF EXISTS "abilities_fts";
+'''
+
+add_heroes_fts = '''
+    INSERT INTO heroes_fts (Description, Quote, Occupation, Affiliation, HeroId, Locale)
+    SELECT COALESCE(t.Description, heroes.Description), COALESCE(t.Quote, heroes.Quote),
+        heroes.Occupation, heroes.Affiliation, heroes.Id, ?
+''' + localised_hero_from
+
+add_abilities_fts = '''
+    INSERT INTO abilities_fts (Name, Description, Stats, AbilityId, Locale)
+    SELECT COALESCE(at.Name, abilities.Name), COALESCE(at.Description, abilities.Description),
+        abilities.Stats, abilities.Id, ?
+    FROM abilities LEFT JOIN ability_translations AS at
+        ON at.AbilityId = abilities.Id AND at.Locale = ?
+'''
+
+## heroes and abilities of one locale ranked together by BM25 (lower is better), with a highlighted snippet
+search_wiki_text_query = '''
+    SELECT * FROM (
+        SELECT 'hero', COALESCE(t.Name, heroes.Name), COALESCE(t.Name, heroes.Name),
+            snippet(heroes_fts, -1, ?, ?, '...', 16), bm25(heroes_fts) AS Rank
+        FROM heroes_fts JOIN heroes ON heroes.Id = heroes_fts.HeroId
+        LEFT JOIN hero_translations AS t
+            ON t.HeroId = heroes.Id AND t.Locale = heroes_fts.Locale
+        WHERE heroes_fts MATCH ? AND heroes_fts.Locale = ?
+        UNION ALL
+        SELECT 'ability', COALESCE(at.Name, abilities.Name), COALESCE(ht.Name, heroes.Name),
+            snippet(abilities_fts, -1, ?, ?, '...', 16), bm25(abilities_fts, 5.0, 1.0, 1.0) AS Rank
+        FROM abilities_fts JOIN abilities ON abilities.Id = abilities_fts.AbilityId
+        JOIN heroes ON heroes.Id = abilities.HeroId
+        LEFT JOIN ability_translations AS at
+            ON at.AbilityId = abilities.Id AND at.Locale = abilities_fts.Locale
+        LEFT JOIN hero_translations AS ht
+            ON ht.HeroId = heroes.Id AND ht.Locale = abilities_fts.Locale
+        WHERE abilities_fts MATCH ? AND abilities_fts.Locale = ?
+    )
+    ORDER BY Rank LIMIT ?
+'''
+
+## every search above must be answered through an index: each query with example parameters and
+## the step its EXPLAIN QUERY PLAN must have, see tests/test_query_plans.py
+search_query_plan_checks = [
+    (search_heroes_by_name, [DEFAULT_LOCALE, '', ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_name '),
+    (search_heroes_by_role, [DEFAULT_LOCALE, ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_role_\w+ \(Role=\?'),
+    (search_abilities_by_name, [DEFAULT_LOCALE, DEFAULT_LOCALE, '', ''], r'SEARCH abilities USING (COVERING )?INDEX idx_abilities_name '),
+    (search_abilities_by_hero_name, [DEFAULT_LOCALE, DEFAULT_LOCALE, '', ''], r'SEARCH abilities USING INDEX idx_abilities_hero_id '),
+    (search_wiki_text_query, ['[', ']', '"barrier"', DEFAULT_LOCALE, '[', ']', '"barrier"', DEFAULT_LOCALE, 20], r'SCAN abilities_fts VIRTUAL TABLE INDEX \d+:M'),
+    (search_hero_page_by_slug_query, [DEFAULT_LOCALE, ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_slug '),
+    (search_abilities_by_hero_slug, [DEFAULT_LOCALE, DEFAULT_LOCALE, ''], r'SEARCH heroes USING (COVERING )?INDEX idx_heroes_slug '),
+    (search_ability_stats_query, ['[1, 2]'], r'SEARCH ability_stats USING PRIMARY KEY \(AbilityId=\?\)'),
+    (search_hero_role_stats_query, ['["ana", "mercy"]'], r'SEARCH hero_role_stats USING PRIMARY KEY '),
+    (search_abilities_by_stat_ascending, ['Cooldown', 0, 6, 20], r'SEARCH ability_stats USING INDEX idx_ability_stats_key_value '),
+    (search_abilities_by_stat_descending, ['Damage', float('-inf'), float('inf'), 20], r'SEARCH ability_stats USING INDEX idx_ability_stats_key_value '),
+    (select_localised_heroes + ' ORDER BY heroes.Health_Base DESC LIMIT ?', [DEFAULT_LOCALE, 20], r'SCAN heroes USING INDEX idx_heroes_health')
+]
+
+## the build runs in one transaction without fsyncs and is checked once at the end,
+## in WAL mode so that readers keep serving the previous data until it commits
+build_pragmas = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536'
+]
+
+## read connections only query, and keep the whole (small) database in memory
+serving_pragmas = [
+    'PRAGMA query_only = ON',
+    'PRAGMA cache_size = -8192',
+    'PRAGMA mmap_size = 67108864'
+]
+SERVING_CACHED_STATEMENTS = 64
+
+## indexes are created after the rows are loaded
+create_indexes = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS "idx_heroes_slug" ON "heroes" ("Slug")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_name" ON "heroes" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_name" ON "heroes" ("Role" COLLATE NOCASE, "Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_abilities_name" ON "abilities" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_abilities_hero_id" ON "abilities" ("HeroId")',
+    'CREATE INDEX IF NOT EXISTS "idx_hero_translations_name" ON "hero_translations" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_ability_translations_name" ON "ability_translations" ("Name" COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS "idx_ability_stats_key_value" ON "ability_stats" ("Key" COLLATE NOCASE, "Numeric_Value")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_health" ON "heroes" ("Health_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_armor" ON "heroes" ("Armor_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_shield" ON "heroes" ("Shield_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_win_rate" ON "heroes" ("Win_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_pick_rate" ON "heroes" ("Pick_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_health" ON "heroes" ("Role" COLLATE NOCASE, "Health_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_armor" ON "heroes" ("Role" COLLATE NOCASE, "Armor_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_shield" ON "heroes" ("Role" COLLATE NOCASE, "Shield_Base")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_win_rate" ON "heroes" ("Role" COLLATE NOCASE, "Win_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_role_pick_rate" ON "heroes" ("Role" COLLATE NOCASE, "Pick_Rate")',
+    'CREATE INDEX IF NOT EXISTS "idx_heroes_nationality" ON "heroes" ("Nationality" COLLATE NOCASE)'
+]
+
+## the columns the hero filter can sort on and take ranges of; every index above ends with the
+## hero Id, which breaks ties so that pages can continue from (sort value, Id)
+HERO_FILTER_SORTS = {'name': 'Name', 'health': 'Health_Base', 'armor': 'Armor_Base', 'shield': 'Shield_Base', 'win_rate': 'Win_Rate', 'pick_rate': 'Pick_Rate'}
+HERO_FILTER_RANGES = {'health': 'Health_Base', 'armor': 'Armor_Base', 'shield': 'Shield_Base', 'win_rate': 'Win_Rate', 'pick_rate': 'Pick_Rate'}
+HERO_FILTER_PAGE_SIZE = 20
+
+## the metrics of hero_role_stats in display order, with their labels
+ROLE_STAT_METRICS = {'health': 'Health', 'armor': 'Armor', 'shield': 'Shield', 'pick_rate': 'Pick rate', 'win_rate': 'Win rate', 'tie_rate': 'Tie rate', 'on_fire_rate': 'On fire rate'}
+
+## the chart of each comparison choice: its type, the metric of the hero stats store it shows
+## (the heroes are sorted by it) and its title; grouped bars show the percentiles of every metric
+CMP_CHART_SPECS = {
+    1: {'type': 'bar', 'metric': 'health', 'title': "Hero Comparison by Health"},
+    2: {'type': 'bar', 'metric': 'armor', 'title': "Hero Comparison by Armor"},
+    3: {'type': 'bar', 'metric': 'shield', 'title': "Hero Comparison by Shield"},
+    4: {'type': 'pie', 'metric': 'pick_rate', 'title': "Hero Comparison by Pick Rate"},
+    5: {'type': 'bar', 'metric': 'win_rate', 'title': "Hero Comparison by Win Rate"},
+    6: {'type': 'bar', 'metric': 'tie_rate', 'title': "Hero Comparison by Tie Rate"},
+    7: {'type': 'bar', 'metric': 'on_fire_rate', 'title': "Hero Comparison by On Fire Rate"},
+    8: {'type': 'grouped_bar', 'metric': None, 'title': "Hero Comparison by Percentile within Role"}
+}
+
+## the name of each comparison choice in the URLs of the comparison pages, e.g. /compare/tank/health
+CMP_METRIC_SLUGS = {cmp_choice: spec['metric'] or 'percentile' for cmp_choice, spec in CMP_CHART_SPECS.items()}
+CMP_METRIC_CHOICES = {metric_slug: cmp_choice for cmp_choice, metric_slug in CMP_METRIC_SLUGS.items()}
+
+## the number at the start of a stat value and its unit (e.g. '12 seconds', '40%', '20 meters'),
+## a unit followed by '/' is a rate (e.g. '20 m/s') and is left without one
+STAT_NUMBER_PATTERN = re.compile(r'(-?\d+(?:\.\d+)?)\s*(%|seconds?\b(?!/)|s\b(?!/)|meters?\b(?!/)|m\b(?!/)|degrees?\b(?!/))?')
+STAT_UNITS = {'%': '%', 'second': 's', 'seconds': 's', 's': 's', 'meter': 'm', 'meters': 'm', 'm': 'm', 'degree': '°', 'degrees': '°'}
+
 def construct_unique_key(baseurl, params):
     ''' constructs a key that is guaranteed to uniquely and 
     repeatably identify an API request by its baseurl and params
@@ -174,16 +688,17 @@ def make_url_request_using_cache(baseurl, cache, params=None):
         JSON
     '''
     request_key = construct_unique_key(baseurl, params)
-    if (request_key in cache.keys()):
-        print("Using cache")
-        return cache[request_key]
+    with CACHE_LOCK: # locales are fetched from several threads at once
+        if (request_key in cache.keys()):
+            print("Using cache")
+            return cache[request_key]
+    print("Fetching")
+    time.sleep(1)
+    if (params == None):
+        response = requests.get(baseurl, headers=headers)
     else:
-        print("Fetching")
-        time.sleep(1)
-        if (params == None):
-            response = requests.get(baseurl, headers=headers)
-        else:
-            response = requests.get(baseurl, headers=headers, params=params)
+        response = requests.get(baseurl, headers=headers, params=params)
+    with CACHE_LOCK:
         cache[request_key] = response.text
         save_cache(cache)
         return cache[request_key] # in both cases, we return cache[request_key]
@@ -221,6 +736,15 @@ class Hero:
     shield: string
         the shield value of a overwatch hero (e.g. '100')
 
+    health_base: float
+        the base health of a overwatch hero, parsed at build time (e.g. 200.0 for '200 (400 in Tank mode)')
+
+    armor_base: float
+        the base armor of a overwatch hero, parsed at build time
+
+    shield_base: float
+        the base shield of a overwatch hero, parsed at build time
+
     real_name: string
         the real name of a overwatch hero (e.g. 'Ana Amari (أنا عماري)')
     
@@ -250,11 +774,20 @@ class Hero:
 
     on_fire_rate: float
         the on fire rate of a overwatch hero in the competition match
+
+    slug: string
+        the locale-independent key of a overwatch hero in the official website (e.g. 'ana')
     '''
-    def __init__(self, role="", name="", description="", abilities={}, quote="", hero_pose_url="", health="0", armor="0", shield="0", real_name="", age="", nationality="", occupation="", base="", affiliation="", pick_rate=0, win_rate=0, tie_rate=0, on_fire_rate=0):
+    __slots__ = ('role', 'name', 'description', 'abilities', 'quote', 'hero_pose_url', 'health', 'armor', 'shield',
+        'real_name', 'age', 'nationality', 'occupation', 'base', 'affiliation', 'pick_rate', 'win_rate', 'tie_rate',
+        'on_fire_rate', 'slug', 'health_base', 'armor_base', 'shield_base')
+
+    def __init__(self, role="", name="", description="", abilities=None, quote="", hero_pose_url="", health="0", armor="0", shield="0", real_name="", age="", nationality="", occupation="", base="", affiliation="", pick_rate=0, win_rate=0, tie_rate=0, on_fire_rate=0, slug=""):
         self.role = role
         self.name = name
         self.description = description
+        if (abilities is None):
+            abilities = {}
         self.abilities = abilities
         self.quote = quote
         self.hero_pose_url = hero_pose_url
@@ -271,27 +804,10 @@ class Hero:
         self.win_rate = win_rate
         self.tie_rate = tie_rate
         self.on_fire_rate = on_fire_rate
-    
-    def set_val_by_list(self, list):
-        self.role = list[2]
-        self.name = list[1]
-        self.description = list[3]
-        self.abilities = []
-        self.quote = list[4]
-        self.hero_pose_url = list[18]
-        self.health = list[11]
-        self.armor = list[12]
-        self.shield = list[13]
-        self.real_name = list[5]
-        self.age = list[6]
-        self.nationality = list[7]
-        self.occupation = list[8]
-        self.base = list[9]
-        self.affiliation = list[10]
-        self.pick_rate = float(list[14])
-        self.win_rate = float(list[15])
-        self.tie_rate = float(list[16])
-        self.on_fire_rate = float(list[17])
+        self.slug = slug
+        self.health_base = 0.0
+        self.armor_base = 0.0
+        self.shield_base = 0.0
 
 
     def info(self):
@@ -328,6 +844,8 @@ class Ability:
     stats: string
         the stats of an ability (e.g. "Type: Weapon. Damage: 70 over 0.6 seconds. Spread angle: Pinpoint...")
     '''
+    __slots__ = ('name', 'description', 'video_url', 'stats')
+
     def __init__(self, name="", description="", video_url="", stats=""):
         self.name = name
         self.description = description
@@ -345,12 +863,13 @@ class Ability:
         webbrowser.open(self.video_url)
 
 
-def build_hero_official_url_dict():
-    ''' Make a dictionary that maps hero name to hero page url from "https://playoverwatch.com/en-us/heroes/"
+def build_hero_official_url_dict(locale=DEFAULT_LOCALE):
+    ''' Make a dictionary that maps hero name to hero page url from "https://playoverwatch.com/<locale>/heroes/"
 
     Parameters
     ----------
-    None
+    locale: string
+        the locale of the official website (e.g. 'en-us')
 
     Returns
     -------
@@ -358,7 +877,7 @@ def build_hero_official_url_dict():
         key is a hero name and value is the url
         e.g. {'Ana':'https://playoverwatch.com/en-us/heroes/ana/', ...}
     '''
-    index_page_url = OFFICAL_WEBSITE_URL + OFFICAL_WEBSITE_INDEX_PATH
+    index_page_url = OFFICAL_WEBSITE_URL + OFFICAL_WEBSITE_INDEX_PATH.format(locale=locale)
     url_text = make_url_request_using_cache(index_page_url, CACHE_DICT)
     soup = BeautifulSoup(url_text, 'html.parser')
     hero_official_url_dict = {}
@@ -430,7 +949,50 @@ def get_official_hero_instance(hero_name, hero_url):
     hero_pose_tag = hero_pose_parent.find('div', class_="hero-pose-image")['style']
     hero_pose_url = re.findall(r'.*[(](.*)[)].*', hero_pose_tag)[0]
 
-    return Hero(hero_role, hero_name, hero_description, hero_abilities_dict, hero_quote, hero_pose_url)
+    ## the last part of the URL is the same in every locale (e.g. '/en-us/heroes/ana/')
+    hero_slug = hero_url.rstrip('/').split('/')[-1]
+
+    return Hero(hero_role, hero_name, hero_description, hero_abilities_dict, hero_quote, hero_pose_url, slug=hero_slug)
+
+
+def build_hero_dict(locale=DEFAULT_LOCALE):
+    ''' Make a hero dict of one locale from the official website
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the official website (e.g. 'en-us')
+
+    Returns
+    -------
+    dict
+        key is a lowercase hero name and value is the hero instance
+    '''
+    hero_official_url_dict = build_hero_official_url_dict(locale)
+    hero_dict = {}
+    for hero_name in hero_official_url_dict.keys():
+        hero_url = hero_official_url_dict[hero_name]
+        hero_inst = get_official_hero_instance(hero_name, hero_url)
+        hero_dict[hero_name.lower()] = hero_inst
+    return hero_dict
+
+
+def build_locale_hero_dicts(locales=LOCALES):
+    ''' Make the hero dicts of several locales, fetching the locales concurrently
+
+    Parameters
+    ----------
+    locales: list
+        the locales of the official website (e.g. ['en-us', 'de-de'])
+
+    Returns
+    -------
+    dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    with ThreadPoolExecutor(max_workers=len(locales)) as executor:
+        hero_dicts = list(executor.map(build_hero_dict, locales))
+    return dict(zip(locales, hero_dicts))
 
 
 def build_hero_gamepedia_url_dict():
@@ -564,366 +1126,2279 @@ def add_match_stats_to_hero_instance(hero_dict):
             hero_dict[hero_name].on_fire_rate = float(hero_match_stats_list[4].strip('%'))
 
 
-def create_heroes_table(hero_dict):
+## Hero attributes in the column order of the heroes table
+HERO_COLUMN_ATTRIBUTES = ('name', 'role', 'description', 'quote', 'real_name', 'age', 'nationality', 'occupation', 'base', 'affiliation', 'health', 'armor', 'shield', 'pick_rate', 'win_rate', 'tie_rate', 'on_fire_rate', 'hero_pose_url', 'slug')
+
+## the columns the row factories read, in the order of the attributes they are assigned to
+## in hero_row_factory/ability_row_factory, and the itemgetters picking them out of the rows
+## of the queries starting with localised_hero_columns and select_localised_abilities
+HERO_ROW_COLUMNS = ('Name', 'Role', 'Description', 'Quote', 'Real_Name', 'Age', 'Nationality', 'Occupation', 'Base', 'Affiliation',
+    'Health', 'Armor', 'Shield', 'Pick_Rate', 'Win_Rate', 'Tie_Rate', 'OnFire_Rate', 'Pose_URL', 'Slug', 'Health_Base', 'Armor_Base', 'Shield_Base')
+ABILITY_ROW_COLUMNS = ('Name', 'Description', 'Video_URL', 'Stats')
+HERO_ROW_GETTER = operator.itemgetter(*[LOCALISED_HERO_COLUMNS.index(column) for column in HERO_ROW_COLUMNS])
+ABILITY_ROW_GETTER = operator.itemgetter(*[LOCALISED_ABILITY_COLUMNS.index(column) for column in ABILITY_ROW_COLUMNS])
+
+
+def create_heroes_table(cur, hero_dict):
     '''Build a Heroes Table from hero dict.
     
     Parameters
     ----------
+    cur: cursor
+        the cursor of the database being built
     hero_dict: dict
         hero dict including all infos of all heroes
     '''
-    conn = sqlite3.connect("hero_wiki.sqlite")
-    cur = conn.cursor()
-
     ## create table
     cur.execute(drop_heroes)
     cur.execute(create_heroes)
-    conn.commit()
 
     ## add infos
-    for hero_name in hero_dict.keys():
-        name = hero_dict[hero_name].name
-        role = hero_dict[hero_name].role
-        description = hero_dict[hero_name].description
-        quote = hero_dict[hero_name].quote
-        real_name = hero_dict[hero_name].real_name
-        age = hero_dict[hero_name].age
-        nationality = hero_dict[hero_name].nationality
-        occupation = hero_dict[hero_name].occupation
-        base = hero_dict[hero_name].base
-        affiliation = hero_dict[hero_name].affiliation
-        health = hero_dict[hero_name].health
-        armor = hero_dict[hero_name].armor
-        shield = hero_dict[hero_name].shield
-        pick_rate = hero_dict[hero_name].pick_rate
-        win_rate = hero_dict[hero_name].win_rate
-        tie_rate = hero_dict[hero_name].tie_rate
-        on_fire_rate = hero_dict[hero_name].on_fire_rate
-        hero_pose_url = hero_dict[hero_name].hero_pose_url
-        cur.execute(add_hero, [name, role, description, quote, real_name, age, nationality, occupation, base, affiliation, health, armor, shield, pick_rate, win_rate, tie_rate, on_fire_rate, hero_pose_url])
-        conn.commit()
-
-    conn.close()
-
-
-def create_abilities_table(hero_dict):
+    cur.executemany(add_hero, hero_rows(hero_dict))
+
+
+def parse_durability(durability):
+    ''' Parse a health, armor or shield text from gamepedia into numbers
+
+    Parameters
+    ----------
+    durability: string
+        the durability text (e.g. '200 (400 in Tank mode)')
+
+    Returns
+    -------
+    tuple
+        the base value and the value of the alternate form, e.g. (200.0, 400.0);
+        the alternate value is None if there is none
+    '''
+    numbers = re.findall(r'\d+(?:\.\d+)?', durability.replace(',', ''))
+    base_value = float(numbers[0]) if numbers else 0.0
+    alt_value = float(numbers[1]) if len(numbers) > 1 else None
+    return (base_value, alt_value)
+
+
+def hero_rows(hero_dict):
+    ''' Yield the rows of the heroes table from hero dict'''
+    hero_row = operator.attrgetter(*HERO_COLUMN_ATTRIBUTES)
+    for hero_inst in hero_dict.values():
+        yield hero_row(hero_inst) + parse_durability(hero_inst.health) + parse_durability(hero_inst.armor) + parse_durability(hero_inst.shield)
+
+
+def ability_rows(hero_dict, hero_ids):
+    ''' Yield the rows of the abilities table from hero dict, with the id of each hero looked up by its slug'''
+    for hero_inst in hero_dict.values():
+        hero_id = hero_ids[hero_inst.slug]
+        for ability in hero_inst.abilities.values():
+            yield (ability.name, ability.description, ability.stats.lstrip(), hero_id, ability.video_url)
+
+
+def create_abilities_table(cur, hero_dict):
     '''Build an Abilities Table from hero dict.
     
     Parameters
     ----------
+    cur: cursor
+        the cursor of the database being built
     hero_dict: dict
         hero dict including all infos of all heroes
     '''
-    conn = sqlite3.connect("hero_wiki.sqlite")
-    cur = conn.cursor()
-
     ## create table
     cur.execute(drop_abilities)
     cur.execute(create_abilities)
-    conn.commit()
 
     ## add infos
-    hero_id = 1
-    for hero_name in hero_dict.keys():
-        for ability_name in hero_dict[hero_name].abilities.keys():
-            name = hero_dict[hero_name].abilities[ability_name].name
-            description = hero_dict[hero_name].abilities[ability_name].description
-            stats = hero_dict[hero_name].abilities[ability_name].stats.lstrip()
-            video_url = hero_dict[hero_name].abilities[ability_name].video_url
-            cur.execute(add_ability, [name, description, stats, hero_id, video_url])
-            conn.commit()
-        hero_id += 1
-
-    conn.close()
-
-
-def search_hero_table_by_name(hero_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT * From heroes'
-    query += ' WHERE Name = "' + hero_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def search_hero_table_by_role(role=None):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT * From heroes'
-    if (role is not None):
-        query += ' WHERE Role = "' + role + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def search_ablility_table_by_ablitity_name(ablitity_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT abilities.Name, abilities.Description, abilities.Stats, Video_URL, heroes.Name From abilities JOIN heroes ON abilities.HeroId = heroes.Id'
-    query += ' WHERE abilities.Name = "' + ablitity_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-
-def search_ablility_table_by_hero_name(hero_name):
-    connection = sqlite3.connect("hero_wiki.sqlite")
-    cursor = connection.cursor()
-    query = ''
-    query += 'SELECT abilities.Name, abilities.Description, abilities.Stats, Video_URL From abilities JOIN heroes ON abilities.HeroId = heroes.Id'
-    query += ' WHERE heroes.Name = "' + hero_name + '"'
-    results = cursor.execute(query).fetchall()
-    connection.close()
-    return results
-
-def hero_comparison_barplot(hero_list, cmp_choice):
-    x_axis = []
-    y_axis = []
-    labels = []
-    values = []
-    if cmp_choice == 1:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.health.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Health")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
-    elif cmp_choice == 2:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.armor.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Armor")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div        
-    elif cmp_choice == 3:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.shield.split(" ")[0])
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Shield")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
-    elif cmp_choice == 4:
-        for hero in hero_list:
-            labels.append(hero.name)
-            values.append(hero.pick_rate)
-        pie_data = go.Pie(labels=labels, values=values)
-        basic_layout = go.Layout(title="Hero Comparison by Pick Rate")
-        fig = go.Figure(data=pie_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
-    elif cmp_choice == 5:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.win_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Win Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
-    elif cmp_choice == 6:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.tie_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by Tie Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
-    else:
-        for hero in hero_list:
-            x_axis.append(hero.name)
-            y_axis.append(hero.on_fire_rate)
-        bar_data = go.Bar(x=x_axis, y=y_axis)
-        basic_layout = go.Layout(title="Hero Comparison by On Fire Rate")
-        fig = go.Figure(data=bar_data, layout=basic_layout)
-        div = fig.to_html(full_html=False)
-        return div
+    hero_ids = dict(cur.execute('SELECT Slug, Id FROM heroes').fetchall())
+    cur.executemany(add_ability, ability_rows(hero_dict, hero_ids))
 
 
-@app.route('/')
-def index():
-    return render_template('index.html') # just the static HTML
+def parse_ability_stats(stats):
+    ''' Parse the stats text of an ability into its stat lines
+
+    Parameters
+    ----------
+    stats: string
+        the stats of an ability (e.g. "Type: Weapon\nCooldown: 12 seconds. \n")
+
+    Returns
+    -------
+    list
+        tuples of (key, raw value, numeric value, unit), e.g. ('Cooldown', '12 seconds.', 12.0, 's');
+        the numeric value and unit are None when the value does not start with a number,
+        and a line without a key (e.g. 'Headshot') has an empty key and the line as its value
+    '''
+    stat_lines = []
+    for stat_line in stats.strip('\n').split("\n"):
+        if (not stat_line.strip()):
+            continue
+        if (':' not in stat_line):
+            stat_lines.append(('', stat_line.strip(), None, None))
+            continue
+        key, raw_value = stat_line.split(':', 1)
+        raw_value = raw_value.strip()
+        numeric_value = None
+        unit = None
+        match = STAT_NUMBER_PATTERN.match(raw_value)
+        if (match):
+            numeric_value = float(match.group(1))
+            if (match.group(2)):
+                unit = STAT_UNITS[match.group(2)]
+        stat_lines.append((key.strip(), raw_value, numeric_value, unit))
+    return stat_lines
+
+
+def ability_stat_rows(cur):
+    ''' Yield the rows of the ability_stats table from the loaded abilities table'''
+    for ability_id, stats in cur.connection.execute('SELECT Id, Stats FROM abilities').fetchall():
+        position = 0
+        for stat_line in parse_ability_stats(stats):
+            yield (ability_id, position) + stat_line
+            position += 1
+
+
+def create_ability_stats_table(cur):
+    '''Build the Ability Stats Table by parsing the stats of every ability once.
     
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    '''
+    ## create table
+    cur.execute(drop_ability_stats)
+    cur.execute(create_ability_stats)
 
-@app.route('/search_type', methods=['POST'])
-def handle_search_type():
-    search_option = request.form["search_option"]
-    if (search_option == "heroes"):
-        return render_template('search_hero.html')
-    elif (search_option == "abilities"):
-        return render_template('search_ability.html')
-    else:
-        return render_template('search_cmp.html')
+    ## add infos
+    cur.executemany(add_ability_stat, ability_stat_rows(cur))
 
 
-@app.route('/search_type/hero', methods=['POST'])
-def handle_search_hero():
-    search_hero_option = request.form["search_hero_option"]
-    if (search_hero_option == "name"):
-        hero_results = search_hero_table_by_name(request.form["hero_name"])
-        if (hero_results):
-            ability_results = search_ablility_table_by_hero_name(request.form["hero_name"])
-            for i in range(len(ability_results)):
-                ability = list(ability_results[i])
-                stats_list = ability[2].strip('\n').split("\n")
-                ability[2] = stats_list
-                ability_results[i] = ability
-            return render_template('hero.html', hero_inst=hero_results[0], ability_list=ability_results)
-        else:
-            return render_template('hero.html', hero_inst="", ability_list=[])
-    else:
-        return render_template('search_role.html')
+def create_hero_role_stats_table(cur):
+    '''Build the Hero Role Stats Table from the loaded heroes table: the rank, percentile,
+    role mean, role median and role standard deviation of every hero on every metric.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    '''
+    ## create table
+    cur.execute(drop_hero_role_stats)
+    cur.execute(create_hero_role_stats)
 
+    ## add infos
+    cur.execute(add_hero_role_stats)
 
-@app.route('/search_type/role', methods=['POST'])
-def handle_search_role():
-    search_role_option = request.form["search_role_option"]
-    results = search_hero_table_by_role(search_role_option)
-    if (results):
-        return render_template('role.html', role_list=results, role=search_role_option)
-    else:
-        return render_template('role.html')
 
+def group_role_stats(role_stats_rows):
+    '''Group rows of the hero_role_stats table by hero.
 
-@app.route('/search_type/role/hero', methods=['POST'])
-def handle_hero_page():
-    hero_results = search_hero_table_by_name(request.form["hero_name"])
-    if (hero_results):
-        ability_results = search_ablility_table_by_hero_name(request.form["hero_name"])
-        for i in range(len(ability_results)):
-            ability = list(ability_results[i])
-            stats_list = ability[2].strip('\n').split("\n")
-            ability[2] = stats_list
-            ability_results[i] = ability
-        return render_template('hero.html', hero_inst=hero_results[0], ability_list=ability_results)
-    else:
-        return render_template('hero.html', hero_inst="", ability_list=[])
+    Parameters
+    ----------
+    role_stats_rows: list
+        tuples of (hero key, metric, value, rank, count, percentile, mean, median, stddev)
 
+    Returns
+    -------
+    dict
+        key is a hero key and value is the list of its (label, value, rank, count, percentile,
+        mean, median, stddev) in the order of ROLE_STAT_METRICS
+    '''
+    metric_order = list(ROLE_STAT_METRICS.keys())
+    role_stats_dict = {}
+    for row in sorted(role_stats_rows, key=lambda row: metric_order.index(row[1])):
+        role_stats_dict.setdefault(row[0], []).append((ROLE_STAT_METRICS[row[1]],) + tuple(row[2:]))
+    return role_stats_dict
 
-@app.route('/search_type/ability', methods=['POST'])
-def handle_search_ability():
-    search_ability_option = request.form["search_ability_option"]
-    if (search_ability_option == "name"):
-        ability_results = search_ablility_table_by_ablitity_name(request.form["ability_name"])
-        if (ability_results):
-            ability_result = list(ability_results[0])
-            stats_list = ability_result[2].strip('\n').split("\n")
-            ability_result[2] = stats_list
-            return render_template('ability.html', ability_inst=ability_result)
-        else:
-            return render_template('ability.html', ability_inst="")
-    else:
-        ability_results = search_ablility_table_by_hero_name(request.form["hero_name"])
-        if (ability_results):
-            for i in range(len(ability_results)):
-                ability = list(ability_results[i])
-                stats_list = ability[2].strip('\n').split("\n")
-                ability[2] = stats_list
-                ability_results[i] = ability
-            return render_template('hero_ability.html', ability_list=ability_results, hero_name=request.form["hero_name"])
-        else:
-            return render_template('hero_ability.html', ability_list=[])
 
+def translated_or_none(text, default_text):
+    ''' Return the text of a locale, or None when it is the same as the default locale's text,
+    so that untranslated text is only stored once
+    '''
+    if (text == default_text):
+        return None
+    return text
+
+
+def hero_translation_rows(locale_hero_dicts, default_hero_rows):
+    ''' Yield the rows of the hero_translations table, skipping heroes without translated text'''
+    for locale in locale_hero_dicts.keys():
+        if (locale == DEFAULT_LOCALE):
+            continue
+        for hero_inst in locale_hero_dicts[locale].values():
+            if (hero_inst.slug not in default_hero_rows):
+                continue
+            hero_id, name, role, description, quote = default_hero_rows[hero_inst.slug]
+            hero_translation = (translated_or_none(hero_inst.name, name),
+                                translated_or_none(hero_inst.role, role),
+                                translated_or_none(hero_inst.description, description),
+                                translated_or_none(hero_inst.quote, quote))
+            if (hero_translation != (None, None, None, None)):
+                yield (hero_id, locale) + hero_translation
+
+
+def ability_translation_rows(locale_hero_dicts, default_ability_rows):
+    ''' Yield the rows of the ability_translations table, skipping abilities without translated text'''
+    for locale in locale_hero_dicts.keys():
+        if (locale == DEFAULT_LOCALE):
+            continue
+        for hero_inst in locale_hero_dicts[locale].values():
+            for ability in hero_inst.abilities.values():
+                if (ability.video_url not in default_ability_rows):
+                    continue
+                ability_id, name, description = default_ability_rows[ability.video_url]
+                ability_translation = (translated_or_none(ability.name, name),
+                                       translated_or_none(ability.description, description))
+                if (ability_translation != (None, None)):
+                    yield (ability_id, locale) + ability_translation
+
+
+def create_translation_tables(cur, locale_hero_dicts):
+    '''Build the Hero Translations and Ability Translations Tables from the hero dicts of all locales.
+    Heroes are matched to the default locale by slug and abilities by video URL,
+    and only the text that differs from the default locale is stored.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locale_hero_dicts: dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    ## create table
+    cur.execute(drop_hero_translations)
+    cur.execute(create_hero_translations)
+    cur.execute(drop_ability_translations)
+    cur.execute(create_ability_translations)
+
+    ## look up the rows of the default locale
+    default_hero_rows = {}
+    for row in cur.execute('SELECT Slug, Id, Name, Role, Description, Quote FROM heroes'):
+        default_hero_rows[row[0]] = row[1:]
+    default_ability_rows = {}
+    for row in cur.execute('SELECT Video_URL, Id, Name, Description FROM abilities'):
+        default_ability_rows[row[0]] = row[1:]
 
-@app.route('/search_type/ability/hero', methods=['POST'])
-def handle_search_hero_ability():
-    ability_results = search_ablility_table_by_ablitity_name(request.form["ability_name"])
-    if (ability_results):
-        ability_result = list(ability_results[0])
-        stats_list = ability_result[2].strip('\n').split("\n")
-        ability_result[2] = stats_list
-        return render_template('ability.html', ability_inst=ability_result)
-    else:
-        return render_template('ability.html', ability_inst="")
+    ## add infos
+    cur.executemany(add_hero_translation, hero_translation_rows(locale_hero_dicts, default_hero_rows))
+    cur.executemany(add_ability_translation, ability_translation_rows(locale_hero_dicts, default_ability_rows))
+
+
+def hero_page_rows(cur, locales):
+    ''' Yield the rows of the hero_pages table: for every locale, each hero row with its
+    abilities, their parsed stat lines and its standing within its role attached,
+    read from the loaded tables'''
+    conn = cur.connection
+    stats_dict = {}
+    for ability_id, key, raw_value in conn.execute('SELECT AbilityId, Key, Raw_Value FROM ability_stats ORDER BY AbilityId, Position').fetchall():
+        stats_dict.setdefault(ability_id, []).append((key, raw_value))
+    role_stats_dict = group_role_stats(conn.execute('SELECT HeroId, Metric, Value, Role_Rank, Role_Count, Percentile, Role_Mean, Role_Median, Role_Stddev FROM hero_role_stats').fetchall())
+
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    for locale in locales:
+        abilities_dict = {}
+        for ability in cursor.execute(select_localised_abilities + ' ORDER BY abilities.Id', [locale, locale]).fetchall():
+            ability_page = (ability['Name'], ability['Description'], stats_dict.get(ability['Id'], []), ability['Video_URL'])
+            abilities_dict.setdefault(ability['HeroId'], []).append(ability_page)
+        for hero in cursor.execute(select_localised_heroes, [locale]).fetchall():
+            page = {'hero': tuple(hero), 'abilities': abilities_dict.get(hero['Id'], []), 'role_stats': role_stats_dict.get(hero['Id'], [])}
+            yield (hero['Id'], locale, json.dumps(page, ensure_ascii=False, separators=(',', ':')))
+
+
+def create_hero_pages_table(cur, locales):
+    '''Build the Hero Pages Table, the pre-joined read model of hero.html, so that
+    a hero page is a single lookup.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales to build the pages of
+    '''
+    ## create table
+    cur.execute(drop_hero_pages)
+    cur.execute(create_hero_pages)
 
+    ## add infos
+    cur.executemany(add_hero_page, hero_page_rows(cur, locales))
 
-@app.route('/search_type/cmp', methods=['POST'])
-def handle_search_cmp():
-    search_role_option = request.form["search_role_option"]
-    results = search_hero_table_by_role(search_role_option)
-    if (search_role_option == "Support"):
-        results = search_hero_table_by_role("Support")
-    elif (search_role_option == "Damage"):
-        results = search_hero_table_by_role("Damage")
-    elif (search_role_option == "Tank"):
-        results = search_hero_table_by_role("Tank")
-    elif (search_role_option == "All"):
-        results = search_hero_table_by_role()
-    if (results):
-        index = 1
-        hero_list = []
-        for result in results:
-            hero = Hero()
-            hero.set_val_by_list(result)
-            hero_list.append(hero)
-            index += 1
-        div = hero_comparison_barplot(hero_list, int(request.form["search_cmp_option"]))
-        return render_template('cmp.html', search_role_option=search_role_option, plot_div=div)
+
+def create_fts_tables(cur, locales):
+    '''Build the full-text indexes of the hero and ability text of every locale from the loaded tables.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales to index the text of
+    '''
+    cur.execute(drop_heroes_fts)
+    cur.execute(create_heroes_fts)
+    cur.executemany(add_heroes_fts, [(locale, locale) for locale in locales])
+    cur.execute(drop_abilities_fts)
+    cur.execute(create_abilities_fts)
+    cur.executemany(add_abilities_fts, [(locale, locale) for locale in locales])
+
+
+def create_wiki_info_table(cur, locales):
+    '''Build the Wiki Info Table with a new data version, which changes on every build.
+    
+    Parameters
+    ----------
+    cur: cursor
+        the cursor of the database being built
+    locales: list
+        the locales in the database
+    '''
+    cur.execute(drop_wiki_info)
+    cur.execute(create_wiki_info)
+    cur.executemany(add_wiki_info, [
+        ('data_version', uuid.uuid4().hex),
+        ('built_at', time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+        ('locales', ','.join(locales))
+    ])
+
+
+def create_wiki_database(hero_dict, locale_hero_dicts):
+    '''Build all tables of the database in a single transaction, create the
+    indexes once the rows are loaded and check the integrity of the result
+    before it is committed.
+    
+    Parameters
+    ----------
+    hero_dict: dict
+        hero dict including all infos of all heroes in the default locale
+    locale_hero_dicts: dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    conn = sqlite3.connect(wiki_file, isolation_level=None)
+    ## sqrt is only built into SQLite when it is compiled with its math functions
+    conn.create_function('sqrt', 1, math.sqrt, deterministic=True)
+    cur = conn.cursor()
+    for pragma in build_pragmas:
+        cur.execute(pragma)
+
+    ## a failed build is rolled back and its connection closed, so it never keeps the write lock
+    try:
+        cur.execute('BEGIN')
+        create_heroes_table(cur, hero_dict)
+        create_abilities_table(cur, hero_dict)
+        create_ability_stats_table(cur)
+        create_hero_role_stats_table(cur)
+        create_translation_tables(cur, locale_hero_dicts)
+        create_hero_pages_table(cur, list(locale_hero_dicts.keys()))
+        create_fts_tables(cur, list(locale_hero_dicts.keys()))
+        create_wiki_info_table(cur, list(locale_hero_dicts.keys()))
+        for create_index in create_indexes:
+            cur.execute(create_index)
+
+        ## checked before the commit, so that readers never see data that failed the check
+        integrity = cur.execute('PRAGMA integrity_check').fetchone()[0]
+        if (integrity != 'ok'):
+            raise sqlite3.DatabaseError("hero_wiki.sqlite failed the integrity check: " + integrity)
+        cur.execute('COMMIT')
+    except:
+        if (conn.in_transaction):
+            cur.execute('ROLLBACK')
+        raise
     else:
-        return render_template('cmp.html')
+        cur.execute('PRAGMA wal_checkpoint(PASSIVE)')
+    finally:
+        conn.close()
 
+    ## serve the new data right away, from memory or from the file
+    if (SERVE_FROM_MEMORY and MEMORY_SNAPSHOT['anchor'] is not None):
+        load_memory_snapshot()
+    DISK_DATA_INFO['data_version'] = None
 
-if __name__ == "__main__":
-    ## Load the cache, save in global variable
-    CACHE_DICT = load_cache()
 
-    if not wiki_file.exists():
-        ## build url dict from official website
-        hero_official_url_dict = build_hero_official_url_dict()
-
-        ## build hero dict from official url dict
-        hero_dict = {}
-        for hero_name in hero_official_url_dict.keys():
-            hero_url = hero_official_url_dict[hero_name]
-            hero_inst = get_official_hero_instance(hero_name, hero_url)
-            hero_dict[hero_name.lower()] = hero_inst
-            
-        ## build url dict from gamepedia website
-        hero_gamepedia_url_dict = build_hero_gamepedia_url_dict()
-
-        ## add gamepedia infos into class Hero in hero dict
-        for hero_name in hero_gamepedia_url_dict.keys():
-            try:
-                add_ability_stats_to_hero_instance(hero_dict[hero_name.lower()], hero_gamepedia_url_dict[hero_name])
-            except:
-                pass
+def build_wiki_database():
+    ''' Scrape the official website, gamepedia and overbuff, and build hero_wiki.sqlite from the results'''
+    ## build hero dicts of all locales from official website
+    locale_hero_dicts = build_locale_hero_dicts(LOCALES)
+    hero_dict = locale_hero_dicts[DEFAULT_LOCALE]
         
-        # add_ability_stats_to_hero_instance(hero_dict['roadhog'], hero_gamepedia_url_dict['Roadhog'])
-        # add_ability_stats_to_hero_instance(hero_dict['widowmaker'], hero_gamepedia_url_dict['Widowmaker'])
-
-        ## add overbuff infos into class Hero in hero dict
-        add_match_stats_to_hero_instance(hero_dict)
-
-        ## build tables in database
-        create_heroes_table(hero_dict)
-        create_abilities_table(hero_dict)
-
-        ## display infos in hero dict
-        # for hero_name in hero_official_url_dict.keys():
-        #     print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
-        #     hero_inst = hero_dict[hero_name.lower()]
-        #     print(hero_inst.info())
-        #     print(hero_inst.detail_info())
-        #     print("")
-        #     print(hero_inst.quote)
-        #     print("")
-        #     print(hero_inst.stats())
-        #     print(hero_inst.compete_stats())
-        #     print("*******************************************")
-        #     for ability in hero_inst.abilities.keys():
-        #         print(hero_inst.abilities[ability].info())
-        #         print(hero_inst.abilities[ability].show_stats())
-        #         print("*******************************************")
-        #     print("<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<")
+    ## build url dict from gamepedia website
+    hero_gamepedia_url_dict = build_hero_gamepedia_url_dict()
+
+    ## add gamepedia infos into class Hero in hero dict
+    for hero_name in hero_gamepedia_url_dict.keys():
+        try:
+            add_ability_stats_to_hero_instance(hero_dict[hero_name.lower()], hero_gamepedia_url_dict[hero_name])
+        except:
+            pass
+    
+    # add_ability_stats_to_hero_instance(hero_dict['roadhog'], hero_gamepedia_url_dict['Roadhog'])
+    # add_ability_stats_to_hero_instance(hero_dict['widowmaker'], hero_gamepedia_url_dict['Widowmaker'])
+
+    ## add overbuff infos into class Hero in hero dict
+    add_match_stats_to_hero_instance(hero_dict)
+
+    ## build tables in database
+    create_wiki_database(hero_dict, locale_hero_dicts)
+
+    ## display infos in hero dict
+    # for hero_name in hero_official_url_dict.keys():
+    #     print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
+    #     hero_inst = hero_dict[hero_name.lower()]
+    #     print(hero_inst.info())
+    #     print(hero_inst.detail_info())
+    #     print("")
+    #     print(hero_inst.quote)
+    #     print("")
+    #     print(hero_inst.stats())
+    #     print(hero_inst.compete_stats())
+    #     print("*******************************************")
+    #     for ability in hero_inst.abilities.keys():
+    #         print(hero_inst.abilities[ability].info())
+    #         print(hero_inst.abilities[ability].show_stats())
+    #         print("*******************************************")
+    #     print("<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<")
+
+
+def create_wiki_snapshot_file(snapshot_path=wiki_snapshot_file):
+    '''Package a finished hero_wiki.sqlite into a snapshot file: a gzipped tar holding
+    a compacted copy of the database and a manifest.json with its data version, build
+    time, locales, size and SHA-256 checksum.
+    
+    Parameters
+    ----------
+    snapshot_path: Path
+        the path of the snapshot file, replaced atomically if it exists
+
+    Returns
+    -------
+    dict
+        the manifest of the snapshot
+    '''
+    snapshot_path = Path(snapshot_path)
+    database_copy = snapshot_path.with_name(snapshot_path.name + '.sqlite.tmp')
+    if (database_copy.exists()):
+        database_copy.unlink()
+    source = sqlite3.connect(wiki_file)
+    source.execute('VACUUM INTO ?', [str(database_copy)])
+    wiki_info = dict(source.execute('SELECT Key, Value FROM wiki_info').fetchall())
+    source.close()
+
+    digest = hashlib.sha256()
+    with open(database_copy, 'rb') as database:
+        for chunk in iter(lambda: database.read(1 << 20), b''):
+            digest.update(chunk)
+    manifest = {
+        'format': SNAPSHOT_FILE_FORMAT,
+        'data_version': wiki_info['data_version'],
+        'built_at': wiki_info['built_at'],
+        'locales': wiki_info['locales'].split(','),
+        'database': wiki_file.name,
+        'size': database_copy.stat().st_size,
+        'sha256': digest.hexdigest()
+    }
+    manifest_bytes = json.dumps(manifest, indent=4).encode('utf-8')
+
+    snapshot_copy = snapshot_path.with_name(snapshot_path.name + '.tmp')
+    with tarfile.open(snapshot_copy, 'w:gz', compresslevel=6) as snapshot:
+        manifest_info = tarfile.TarInfo('manifest.json')
+        manifest_info.size = len(manifest_bytes)
+        manifest_info.mtime = int(time.time())
+        snapshot.addfile(manifest_info, io.BytesIO(manifest_bytes))
+        snapshot.add(database_copy, arcname=manifest['database'])
+    database_copy.unlink()
+    os.replace(snapshot_copy, snapshot_path)
+    return manifest
+
+
+def restore_wiki_snapshot_file(snapshot_path=wiki_snapshot_file):
+    '''Restore hero_wiki.sqlite from a snapshot file made by create_wiki_snapshot_file.
+    The database is checked against the checksum in the manifest before it replaces
+    hero_wiki.sqlite, so a damaged snapshot never replaces a database.
+    
+    Parameters
+    ----------
+    snapshot_path: Path
+        the path of the snapshot file
+
+    Returns
+    -------
+    dict
+        the manifest of the snapshot
+
+    Raises
+    ------
+    ValueError
+        if the snapshot file has another format or its database does not match its checksum
+    '''
+    restored_file = wiki_file.with_name(wiki_file.name + '.restore')
+    with tarfile.open(snapshot_path, 'r:gz') as snapshot:
+        manifest = json.load(snapshot.extractfile('manifest.json'))
+        if (manifest['format'] != SNAPSHOT_FILE_FORMAT):
+            raise ValueError("snapshot format " + str(manifest['format']) + " is not format " + str(SNAPSHOT_FILE_FORMAT))
+        digest = hashlib.sha256()
+        with snapshot.extractfile(manifest['database']) as database, open(restored_file, 'wb') as restored:
+            for chunk in iter(lambda: database.read(1 << 20), b''):
+                digest.update(chunk)
+                restored.write(chunk)
+    if (digest.hexdigest() != manifest['sha256']):
+        restored_file.unlink()
+        raise ValueError("the database in the snapshot does not match its checksum")
+
+    ## a write-ahead log left over from another database must not be applied to this one
+    for leftover in [Path(str(wiki_file) + '-wal'), Path(str(wiki_file) + '-shm')]:
+        if (leftover.exists()):
+            leftover.unlink()
+    os.replace(restored_file, wiki_file)
+    return manifest
+
+
+def read_only_uri(path):
+    ''' Return the URI opening a database file read-only, which never creates the file'''
+    return path.resolve().as_uri() + '?mode=ro'
+
+
+def read_file_data_version():
+    ''' Return the data version of hero_wiki.sqlite, or None while it cannot be read (e.g. it is missing or being replaced)'''
+    try:
+        source = sqlite3.connect(read_only_uri(wiki_file), uri=True)
+        try:
+            return read_data_version(source)
+        finally:
+            source.close()
+    except (sqlite3.Error, TypeError):
+        return None
+
+
+def read_data_version(connection):
+    ''' Return the data version stored in the wiki_info table of a database'''
+    return connection.execute("SELECT Value FROM wiki_info WHERE Key = 'data_version'").fetchone()[0]
+
+
+def read_built_at(connection):
+    ''' Return the time the database was built, from its wiki_info table'''
+    built_at = connection.execute("SELECT Value FROM wiki_info WHERE Key = 'built_at'").fetchone()[0]
+    return datetime.strptime(built_at, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def load_memory_snapshot():
+    '''Copy hero_wiki.sqlite into a new shared-cache in-memory database with the
+    SQLite backup API and serve all searches from it. Connections to the previous
+    snapshot are closed as they are given back, and its memory is freed once the
+    last of them is closed.
+
+    Returns
+    -------
+    string
+        the data version of the snapshot
+    '''
+    with SNAPSHOT_LOCK:
+        MEMORY_SNAPSHOT['generation'] += 1
+        uri = 'file:hero_wiki_snapshot_' + str(MEMORY_SNAPSHOT['generation']) + '?mode=memory&cache=shared'
+
+        ## the anchor connection keeps the in-memory database alive
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(wiki_file)
+        source.backup(anchor)
+        source.close()
+
+        previous_anchor = MEMORY_SNAPSHOT['anchor']
+        MEMORY_SNAPSHOT['uri'] = uri
+        MEMORY_SNAPSHOT['anchor'] = anchor
+        MEMORY_SNAPSHOT['data_version'] = read_data_version(anchor)
+        MEMORY_SNAPSHOT['built_at'] = read_built_at(anchor)
+        MEMORY_SNAPSHOT['checked_at'] = time.time()
+
+        ## close the idle connections to the previous snapshot, the busy ones are closed when given back
+        close_read_connections()
+    if (previous_anchor is not None):
+        previous_anchor.close()
+    return MEMORY_SNAPSHOT['data_version']
+
+
+def close_read_connections():
+    ''' Close the read connections that are not borrowed at the moment'''
+    while True:
+        try:
+            connection_source, connection = READ_CONNECTIONS.get_nowait()
+        except queue.Empty:
+            break
+        connection.close()
+
+
+def refresh_memory_snapshot():
+    '''Load a new memory snapshot if there is none yet, or if hero_wiki.sqlite was
+    rebuilt with a new data version; the file is checked at most once every
+    SNAPSHOT_CHECK_INTERVAL seconds.
+    '''
+    if (MEMORY_SNAPSHOT['anchor'] is not None and time.time() - MEMORY_SNAPSHOT['checked_at'] <= SNAPSHOT_CHECK_INTERVAL):
+        return
+    with SNAPSHOT_LOCK:
+        if (MEMORY_SNAPSHOT['anchor'] is None):
+            load_memory_snapshot()
+        elif (time.time() - MEMORY_SNAPSHOT['checked_at'] > SNAPSHOT_CHECK_INTERVAL):
+            MEMORY_SNAPSHOT['checked_at'] = time.time()
+            source = sqlite3.connect(wiki_file)
+            data_version = read_data_version(source)
+            source.close()
+            if (data_version != MEMORY_SNAPSHOT['data_version']):
+                load_memory_snapshot()
+
+
+def refresh_disk_data_info():
+    '''Read the data version and build time of hero_wiki.sqlite when serving from disk,
+    if they were not read yet or this process rebuilt the file since; otherwise the
+    file is checked at most once every SNAPSHOT_CHECK_INTERVAL seconds, like the
+    memory snapshot.
+    '''
+    if (DISK_DATA_INFO['data_version'] is not None and time.time() - DISK_DATA_INFO['checked_at'] <= SNAPSHOT_CHECK_INTERVAL):
+        return
+    with SNAPSHOT_LOCK:
+        if (DISK_DATA_INFO['data_version'] is not None and time.time() - DISK_DATA_INFO['checked_at'] <= SNAPSHOT_CHECK_INTERVAL):
+            return
+        with read_connection() as connection:
+            DISK_DATA_INFO['built_at'] = read_built_at(connection)
+            DISK_DATA_INFO['data_version'] = read_data_version(connection)
+        DISK_DATA_INFO['checked_at'] = time.time()
+
+
+def get_data_version():
+    ''' Return the data version of the data being served, kept by the process between checks of the file'''
+    if (SERVE_FROM_MEMORY):
+        refresh_memory_snapshot()
+        return MEMORY_SNAPSHOT['data_version']
+    refresh_disk_data_info()
+    return DISK_DATA_INFO['data_version']
+
+
+def get_built_at():
+    ''' Return the time the data being served was built, kept by the process between checks of the file'''
+    if (SERVE_FROM_MEMORY):
+        refresh_memory_snapshot()
+        return MEMORY_SNAPSHOT['built_at']
+    refresh_disk_data_info()
+    return DISK_DATA_INFO['built_at']
+
+
+def open_read_connection(source):
+    '''Open a long-lived read-only connection for serving searches.
+    The connection keeps its prepared statements in its statement cache, so the
+    parameterised search queries are only compiled once per connection.
+
+    Parameters
+    ----------
+    source: string
+        the URI of the memory snapshot, or the read-only URI of the database file
+
+    Returns
+    -------
+    connection
+        a sqlite3 connection
+    '''
+    connection = sqlite3.connect(source, uri=True, check_same_thread=False, cached_statements=SERVING_CACHED_STATEMENTS)
+    for pragma in serving_pragmas:
+        connection.execute(pragma)
+    return connection
+
+
+@contextmanager
+def read_connection():
+    '''Borrow a read connection for the current thread and give it back afterwards.
+    Connections are reused across requests, so at most one connection is open for
+    every thread that searches at the same time.
+    '''
+    if (SERVE_FROM_MEMORY):
+        refresh_memory_snapshot()
+        source = MEMORY_SNAPSHOT['uri']
+    else:
+        source = read_only_uri(wiki_file)
+    try:
+        connection_source, connection = READ_CONNECTIONS.get_nowait()
+        if (connection_source != source): # from a previous snapshot
+            connection.close()
+            connection = open_read_connection(source)
+    except queue.Empty:
+        connection = open_read_connection(source)
+    try:
+        yield connection
+    finally:
+        READ_CONNECTIONS.put((source, connection))
+
+
+def hero_row_factory(cursor, row):
+    ''' sqlite3 row factory building a Hero from a row of a query starting with localised_hero_columns'''
+    hero = Hero.__new__(Hero)
+    (hero.name, hero.role, hero.description, hero.quote, hero.real_name, hero.age, hero.nationality, hero.occupation,
+        hero.base, hero.affiliation, hero.health, hero.armor, hero.shield, hero.pick_rate, hero.win_rate, hero.tie_rate,
+        hero.on_fire_rate, hero.hero_pose_url, hero.slug, hero.health_base, hero.armor_base, hero.shield_base
+    ) = HERO_ROW_GETTER(row)
+    hero.abilities = []
+    return hero
+
+
+def ability_row_factory(cursor, row):
+    ''' sqlite3 row factory building an Ability from a row of select_localised_abilities'''
+    ability = Ability.__new__(Ability)
+    (ability.name, ability.description, ability.video_url, ability.stats) = ABILITY_ROW_GETTER(row)
+    return ability
+
+
+def search_hero_table_by_name(hero_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_heroes_by_name, [locale, hero_name, hero_name]).fetchall()
+
+def search_hero_table_by_role(role=None, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        if (role is not None):
+            return cursor.execute(search_heroes_by_role, [locale, role]).fetchall()
+        return cursor.execute(select_localised_heroes, [locale]).fetchall()
+
+def build_hero_filter_query(role=None, ranges=None, nationality=None, affiliation=None, sort='name', descending=False, after=None, page_size=HERO_FILTER_PAGE_SIZE, locale=DEFAULT_LOCALE):
+    '''Build the parameterised query of a hero filter. Only whitelisted column names
+    go into the SQL text, every value is a parameter.
+
+    Parameters
+    ----------
+    role: string
+        only heroes of this role (e.g. 'Tank')
+    ranges: dict
+        key is one of HERO_FILTER_RANGES and value is a (min, max) tuple, either end may be None
+        (e.g. {'health': (300, None), 'win_rate': (50, 55)})
+    nationality: string
+        only heroes of this nationality (e.g. 'Egyptian')
+    affiliation: string
+        only heroes whose affiliation contains these words (e.g. 'Overwatch')
+    sort: string
+        one of HERO_FILTER_SORTS
+    descending: bool
+        whether the largest values come first
+    after: tuple
+        the (sort value, hero id) of the last hero of the previous page
+    page_size: int
+        the maximum number of heroes in a page
+    locale: string
+        the locale of the text of the heroes (e.g. 'de-de'); heroes sorted by name
+        are in the order of their names in this locale
+
+    Returns
+    -------
+    tuple
+        the query and its parameters; every row ends with its sort value
+    '''
+    if (sort == 'name' and locale != DEFAULT_LOCALE):
+        ## sort and page on the shown name; the default locale has no translations,
+        ## so its names keep the order of the indexes on heroes.Name
+        sort_column = 'COALESCE(t.Name, heroes.Name) COLLATE NOCASE'
+    else:
+        sort_column = 'heroes.' + HERO_FILTER_SORTS[sort]
+    conditions = []
+    params = [locale]
+    if (role is not None):
+        conditions.append('heroes.Role = ?')
+        params.append(role)
+    for range_name, (min_value, max_value) in (ranges or {}).items():
+        column = 'heroes.' + HERO_FILTER_RANGES[range_name]
+        if (min_value is not None):
+            conditions.append(column + ' >= ?')
+            params.append(min_value)
+        if (max_value is not None):
+            conditions.append(column + ' <= ?')
+            params.append(max_value)
+    if (nationality is not None):
+        conditions.append('heroes.Nationality = ?')
+        params.append(nationality)
+    if (affiliation is not None):
+        terms = re.findall(r'\w+', affiliation)
+        ## the affiliation is not translated, so the text of the default locale is enough
+        conditions.append('heroes.Id IN (SELECT HeroId FROM heroes_fts WHERE heroes_fts MATCH ? AND Locale = ?)')
+        params.append(' AND '.join('Affiliation : "' + term + '"' for term in terms) or '""')
+        params.append(DEFAULT_LOCALE)
+    if (after is not None):
+        ## keyset pagination: continue right after the last hero of the previous page
+        if (descending):
+            conditions.append('(' + sort_column + ', heroes.Id) < (?, ?)')
+        else:
+            conditions.append('(' + sort_column + ', heroes.Id) > (?, ?)')
+        params.extend(after)
+
+    query = localised_hero_columns + ', ' + sort_column + localised_hero_from
+    if (conditions):
+        query += '    WHERE ' + ' AND '.join(conditions) + '\n'
+    if (descending):
+        query += '    ORDER BY ' + sort_column + ' DESC, heroes.Id DESC LIMIT ?'
+    else:
+        query += '    ORDER BY ' + sort_column + ', heroes.Id LIMIT ?'
+    params.append(page_size)
+    return query, params
+
+
+def filter_hero_table(role=None, ranges=None, nationality=None, affiliation=None, sort='name', descending=False, after=None, page_size=HERO_FILTER_PAGE_SIZE, locale=DEFAULT_LOCALE, row_factory=None):
+    '''Look up one page of the heroes matching all the given criteria, see build_hero_filter_query.
+    The rows are built by row_factory (e.g. hero_row_factory) if one is given.
+
+    Returns
+    -------
+    tuple
+        the hero rows of the page, and the value of after for the next page
+        (None if this is the last page)
+    '''
+    query, params = build_hero_filter_query(role, ranges, nationality, affiliation, sort, descending, after, page_size, locale)
+    with read_connection() as connection:
+        cursor = connection.execute(query, params)
+        results = cursor.fetchall()
+        next_after = None
+        if (len(results) == page_size):
+            next_after = (results[-1][-1], results[-1][0])
+        if (row_factory is not None):
+            ## the plain rows carry the hero id and sort value the next page continues from
+            return [row_factory(cursor, result) for result in results], next_after
+    return [result[:-1] for result in results], next_after
+
+def search_ablility_table_by_ablitity_name(ablitity_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_abilities_by_name, [locale, locale, ablitity_name, ablitity_name]).fetchall()
+
+
+def search_ablility_table_by_hero_name(hero_name, locale=DEFAULT_LOCALE, row_factory=None):
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_abilities_by_hero_name, [locale, locale, hero_name, hero_name]).fetchall()
+
+
+def search_hero_page_by_slug(hero_slug, locale=DEFAULT_LOCALE):
+    '''Look up the pre-joined page of a hero by its slug.
+
+    Parameters
+    ----------
+    hero_slug: string
+        the slug of the hero (e.g. 'soldier-76')
+    locale: string
+        the locale of the page, the default locale's page is used for locales that were not built
+
+    Returns
+    -------
+    dict
+        'hero' is the hero row, 'abilities' the list of (name, description, stat lines, video URL)
+        of its abilities and 'role_stats' its standing within its role as returned by
+        search_hero_role_stats, or None if there is no such hero
+    '''
+    with read_connection() as connection:
+        result = connection.execute(search_hero_page_by_slug_query, [locale, hero_slug]).fetchone()
+        if (result is None and locale != DEFAULT_LOCALE):
+            result = connection.execute(search_hero_page_by_slug_query, [DEFAULT_LOCALE, hero_slug]).fetchone()
+    if (result is None):
+        return None
+    return json.loads(result[0])
+
+
+def search_ablility_table_by_hero_slug(hero_slug, locale=DEFAULT_LOCALE, row_factory=None):
+    '''Look up the abilities of the hero of a slug, for the GET routes of the hero's abilities.
+
+    Parameters
+    ----------
+    hero_slug: string
+        the slug of the hero (e.g. 'soldier-76')
+    locale: string
+        the locale of the names and descriptions
+    row_factory: function
+        builds the rows if given (e.g. sqlite3.Row)
+
+    Returns
+    -------
+    list
+        the ability rows of the hero in the order of its abilities, empty if there is no such hero
+    '''
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(search_abilities_by_hero_slug, [locale, locale, hero_slug]).fetchall()
+
+
+def search_ability_stats(ability_ids):
+    '''Look up the parsed stat lines of several abilities in one query.
+
+    Parameters
+    ----------
+    ability_ids: list
+        the ids of the abilities
+
+    Returns
+    -------
+    dict
+        key is an ability id and value is the list of its (key, raw value) stat lines
+    '''
+    stats_dict = {}
+    with read_connection() as connection:
+        for ability_id, key, raw_value in connection.execute(search_ability_stats_query, [json.dumps(ability_ids)]):
+            stats_dict.setdefault(ability_id, []).append((key, raw_value))
+    return stats_dict
+
+
+def search_hero_role_stats(hero_slugs):
+    '''Look up the standing within their roles of several heroes in one query.
+
+    Parameters
+    ----------
+    hero_slugs: list
+        the slugs of the heroes
+
+    Returns
+    -------
+    dict
+        key is a hero slug and value is the list of its (label, value, rank, count, percentile,
+        mean, median, stddev) in the order of ROLE_STAT_METRICS
+    '''
+    with read_connection() as connection:
+        return group_role_stats(connection.execute(search_hero_role_stats_query, [json.dumps(hero_slugs)]).fetchall())
+
+
+def load_hero_stats_store(locale=DEFAULT_LOCALE):
+    '''Load the slugs, names, roles and numeric stats of all heroes into NumPy arrays,
+    one array per column with one entry per hero, so that comparisons work on whole
+    columns instead of one Hero object per hero.
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the names and roles
+
+    Returns
+    -------
+    dict
+        'data_version' and 'locale' of the store; 'slug', 'name', 'role' and 'role_key' (the
+        role in the default locale, lowercased) arrays; one float array per metric of
+        ROLE_STAT_METRICS; and 'percentiles', with the percentile of every hero within its
+        role on every metric in the order of ROLE_STAT_METRICS as its columns
+    '''
+    with read_connection() as connection:
+        data_version = read_data_version(connection)
+        rows = connection.execute(select_hero_stats_columns, [locale]).fetchall()
+    metric_count = len(ROLE_STAT_METRICS)
+    if (rows):
+        columns = list(zip(*rows))
+    else:
+        columns = [()] * (4 + 2 * metric_count)
+    store = {
+        'data_version': data_version,
+        'locale': locale,
+        'slug': np.array(columns[0], dtype=object),
+        'name': np.array(columns[1], dtype=object),
+        'role': np.array(columns[2], dtype=object),
+        'role_key': np.array(columns[3], dtype=str)
+    }
+    for position, metric in enumerate(ROLE_STAT_METRICS):
+        store[metric] = np.array(columns[4 + position], dtype=float)
+    store['percentiles'] = np.array(columns[4 + metric_count:], dtype=float).T
+    return store
+
+
+def get_hero_stats_store(locale=DEFAULT_LOCALE):
+    ''' Return the hero stats store of a locale, loaded once per data version'''
+    data_version = get_data_version()
+    store = HERO_STATS_STORES.get(locale)
+    if (store is None or store['data_version'] != data_version):
+        store = load_hero_stats_store(locale)
+        HERO_STATS_STORES[locale] = store
+    return store
+
+
+def select_hero_stats(store, role=None, sort=None, descending=True, top=None, normalise=None):
+    '''Select heroes of a hero stats store with whole-array operations.
+
+    Parameters
+    ----------
+    store: dict
+        a hero stats store, see load_hero_stats_store
+    role: string
+        only heroes of this role, in any case (e.g. 'Tank'), or None for all heroes
+    sort: string
+        a metric of ROLE_STAT_METRICS to sort the heroes by, or None to keep them in Id order
+    descending: bool
+        whether the largest values come first
+    top: int
+        the number of heroes to keep, or None for all of them
+    normalise: string
+        'minmax' to scale every metric of the selected heroes from 0 (smallest) to 1 (largest),
+        'zscore' to turn it into standard scores, or None to keep the values
+
+    Returns
+    -------
+    dict
+        the same keys as the store, with the arrays holding the selected heroes in order
+
+    Raises
+    ------
+    ValueError
+        if normalise is not one of the normalisations above
+    '''
+    if (role is None):
+        indexes = np.arange(len(store['slug']))
+    else:
+        indexes = np.flatnonzero(store['role_key'] == role.lower())
+    if (sort is not None):
+        keys = store[sort][indexes]
+        if (descending):
+            keys = -keys
+        if (top is not None and 0 < top < len(keys)):
+            ## only the heroes up to the value of the top-th one need to be sorted; the ones
+            ## tied with it are all sorted too, so that ties are kept in Id order
+            threshold = keys[np.argpartition(keys, top - 1)[top - 1]]
+            candidates = np.flatnonzero(keys <= threshold)
+            indexes = indexes[candidates[np.argsort(keys[candidates], kind='stable')]]
+        else:
+            indexes = indexes[np.argsort(keys, kind='stable')]
+    if (top is not None):
+        indexes = indexes[:top]
+
+    selected = {'data_version': store['data_version'], 'locale': store['locale']}
+    for key in ['slug', 'name', 'role', 'role_key', 'percentiles'] + list(ROLE_STAT_METRICS):
+        selected[key] = store[key][indexes]
+    if (normalise is not None):
+        for metric in ROLE_STAT_METRICS:
+            values = selected[metric]
+            if (normalise == 'minmax'):
+                spread = values.max() - values.min() if len(values) else 0
+                selected[metric] = (values - values.min()) / spread if spread else np.zeros_like(values)
+            elif (normalise == 'zscore'):
+                spread = values.std() if len(values) else 0
+                selected[metric] = (values - values.mean()) / spread if spread else np.zeros_like(values)
+            else:
+                raise ValueError("unknown normalisation " + str(normalise))
+    return selected
+
+
+def search_ability_table_by_stat(key, min_value=float('-inf'), max_value=float('inf'), descending=False, limit=20):
+    '''Look up abilities by the parsed number of one of their stats,
+    e.g. abilities with a cooldown under 6 seconds, or the highest damage.
+
+    Parameters
+    ----------
+    key: string
+        the stat to look at (e.g. 'Cooldown', 'Damage', 'Duration', 'Ammo')
+    min_value: float
+        the smallest value to include
+    max_value: float
+        the largest value to include
+    descending: bool
+        whether the largest values come first
+    limit: int
+        the maximum number of results
+
+    Returns
+    -------
+    list
+        tuples of (ability name, hero name, raw value, numeric value, unit, hero slug)
+    '''
+    if (descending):
+        query = search_abilities_by_stat_descending
+    else:
+        query = search_abilities_by_stat_ascending
+    with read_connection() as connection:
+        return connection.execute(query, [key, min_value, max_value, limit]).fetchall()
+
+def search_wiki_text(text, locale=DEFAULT_LOCALE, limit=20, highlight=('[', ']')):
+    '''Full-text search over the hero and ability text of a locale, best matches first.
+    Every word of the text has to match (e.g. 'heal teammates'), and words are
+    matched by their stem, so 'heal' also finds 'heals' and 'healing'.
+
+    Parameters
+    ----------
+    text: string
+        the words to search for
+    locale: string
+        the locale of the text to search, the default locale's text is searched for locales that were not built
+    limit: int
+        the maximum number of results
+    highlight: tuple
+        the strings put before and after every matched word in the snippets
+
+    Returns
+    -------
+    list
+        tuples of (kind, name, hero name, snippet, rank), kind is 'hero' or 'ability'
+    '''
+    terms = re.findall(r'\w+', text)
+    if (not terms):
+        return []
+    match = ' '.join('"' + term + '"' for term in terms) # quoted, so user input is never FTS syntax
+    with read_connection() as connection:
+        built_locales = connection.execute("SELECT Value FROM wiki_info WHERE Key = 'locales'").fetchone()[0].split(',')
+        if (locale not in built_locales):
+            locale = DEFAULT_LOCALE
+        return connection.execute(search_wiki_text_query, [highlight[0], highlight[1], match, locale, highlight[0], highlight[1], match, locale, limit]).fetchall()
+
+
+def hero_comparison_chart_data(hero_stats, cmp_choice):
+    '''Put the data of a comparison chart into plain lists, for cmp.html to draw with plotly.js.
+
+    Parameters
+    ----------
+    hero_stats: dict
+        the heroes to compare, as selected by select_hero_stats
+    cmp_choice: int
+        the stat to compare, a key of CMP_CHART_SPECS
+
+    Returns
+    -------
+    dict
+        'type' ('bar', 'pie' or 'grouped_bar'), 'title' and 'names' of the chart, with the
+        'values' of each hero, or for grouped bars a list of 'series' with a 'name' and 'values' each
+    '''
+    spec = CMP_CHART_SPECS[cmp_choice]
+    chart_data = {'type': spec['type'], 'title': spec['title'], 'names': hero_stats['name'].tolist()}
+    if (spec['type'] == 'grouped_bar'):
+        chart_data['series'] = []
+        for metric_index, label in enumerate(ROLE_STAT_METRICS.values()):
+            chart_data['series'].append({'name': label, 'values': hero_stats['percentiles'][:, metric_index].tolist()})
+    else:
+        chart_data['values'] = hero_stats[spec['metric']].tolist()
+    return chart_data
+
+
+@functools.lru_cache(maxsize=None)
+def plotly_js_asset():
+    '''Read the plotly.js bundle that ships with the plotly package, so charts work offline.
+
+    Returns
+    -------
+    tuple
+        the file name of the bundle, which includes a hash of its content
+        (e.g. 'plotly-3f2a9c0d1e4b5a6c.min.js'), and its bytes
+    '''
+    body = get_plotlyjs().encode('utf-8')
+    return 'plotly-' + hashlib.sha256(body).hexdigest()[:16] + '.min.js', body
+
+
+def comparison_chart(role, cmp_choice, data_version, locale=DEFAULT_LOCALE):
+    '''Serialise the data of a comparison chart, remembering the most recent CHART_CACHE_SIZE charts.
+    The data version is part of the cache key, so charts of a rebuilt database are
+    built again and the ones of the previous data are evicted as they go unused.
+
+    Parameters
+    ----------
+    role: string
+        the role of the heroes to compare in any case (e.g. 'Tank'), or 'all' or None for all heroes
+    cmp_choice: int
+        the stat to compare, see hero_comparison_chart_data
+    data_version: string
+        the data version being served
+    locale: string
+        the locale of the hero names on the chart
+
+    Returns
+    -------
+    string
+        the compact JSON of hero_comparison_chart_data, or None if there is no hero to compare
+    '''
+    ## every spelling of a role shares one cached chart
+    if (role is not None):
+        role = role.strip().lower()
+        if (role == 'all'):
+            role = None
+    return cached_comparison_chart(role, cmp_choice, data_version, locale)
+
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def cached_comparison_chart(role, cmp_choice, data_version, locale):
+    ''' Serialise the data of a comparison chart of a lowercased role or None, see comparison_chart'''
+    if (cmp_choice not in CMP_CHART_SPECS):
+        return None
+    hero_stats = select_hero_stats(get_hero_stats_store(locale), role, CMP_CHART_SPECS[cmp_choice]['metric'])
+    if (len(hero_stats['name']) == 0):
+        return None
+    return json.dumps(hero_comparison_chart_data(hero_stats, cmp_choice), ensure_ascii=False, separators=(',', ':'))
+
+
+def attach_ability_stats(ability_results):
+    '''Replace the stats text of ability rows by their parsed stat lines from the ability_stats table.
+
+    Parameters
+    ----------
+    ability_results: list
+        sqlite3.Row rows of select_localised_abilities
+
+    Returns
+    -------
+    list
+        a dict of every row, key is a column of select_localised_abilities, with the list of
+        (key, raw value) stat lines as its 'Stats'
+    '''
+    stats_dict = search_ability_stats([ability['Id'] for ability in ability_results])
+    ability_list = []
+    for ability in ability_results:
+        ability = dict(ability)
+        ability['Stats'] = stats_dict.get(ability['Id'], [])
+        ability_list.append(ability)
+    return ability_list
+
+
+def page_slug(name):
+    ''' Turn a name into the lowercase, dash-separated name of its page in URLs and file names, e.g. 'Biotic Grenade' into 'biotic-grenade' '''
+    return re.sub(r'\W+', '-', name.lower()).strip('-')
+
+
+app.add_template_filter(page_slug, 'slug')
+
+
+def locale_args(locale):
+    ''' Return the query arguments of a page in a locale, none for the default locale'''
+    if (locale == DEFAULT_LOCALE or locale not in LOCALES):
+        return {}
+    return {'locale': locale}
+
+
+def request_locale():
+    ''' Return the locale of the ?locale= argument of a GET route, the default locale for unknown ones'''
+    locale = request.args.get('locale', DEFAULT_LOCALE)
+    if (locale not in LOCALES):
+        return DEFAULT_LOCALE
+    return locale
+
+
+def compression_stats(endpoint):
+    ''' Return the compression counts of an endpoint, to be updated while holding COMPRESSION_LOCK'''
+    return COMPRESSION_STATS.setdefault(endpoint, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'compressions': 0, 'compress_seconds': 0.0})
+
+
+def compress_body(body, encoding, level, endpoint):
+    '''Compress the body of a response, counting the time it takes for its endpoint.
+
+    Parameters
+    ----------
+    body: bytes
+        the body
+    encoding: string
+        'br' or 'gzip'
+    level: int
+        the brotli quality or gzip level
+    endpoint: string
+        the endpoint of the response
+
+    Returns
+    -------
+    bytes
+        the compressed body
+    '''
+    start = time.perf_counter()
+    if (encoding == 'br'):
+        compressed = brotli.compress(body, quality=level)
+    else:
+        compressed = gzip.compress(body, compresslevel=level, mtime=0) # no timestamp, so the same body gives the same bytes
+    with COMPRESSION_LOCK:
+        stats = compression_stats(endpoint)
+        stats['compressions'] += 1
+        stats['compress_seconds'] += time.perf_counter() - start
+    return compressed
+
+
+def compressed_encodings(body, mimetype):
+    ''' Return the encodings a body is worth compressing in, none if it is too small or not compressible'''
+    if (mimetype not in COMPRESSIBLE_MIMETYPES or len(body) < COMPRESSION_MIN_BYTES):
+        return []
+    return COMPRESSION_ENCODINGS
+
+
+def precompress_body(body, mimetype, endpoint):
+    '''Compress a body that is kept and sent again once in every encoding, at PRECOMPRESSION_LEVELS.
+
+    Parameters
+    ----------
+    body: bytes
+        the body
+    mimetype: string
+        the mimetype of the body
+    endpoint: string
+        the endpoint of the response
+
+    Returns
+    -------
+    dict
+        key is an encoding and value is the compressed body, empty if the body is not worth compressing
+    '''
+    encoded = {}
+    for encoding in compressed_encodings(body, mimetype):
+        encoded[encoding] = compress_body(body, encoding, PRECOMPRESSION_LEVELS[encoding], endpoint)
+    return encoded
+
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE + 1)
+def precompressed_payload(payload, mimetype, endpoint):
+    ''' Return a payload kept elsewhere, a chart or the plotly.js bundle, as bytes together with precompress_body of it'''
+    if (isinstance(payload, str)):
+        payload = payload.encode('utf-8')
+    return payload, precompress_body(payload, mimetype, endpoint)
+
+
+def negotiate_encoding(encodings):
+    ''' Return the first of the encodings, in the order of COMPRESSION_ENCODINGS, that the client accepts, or None'''
+    for encoding in COMPRESSION_ENCODINGS:
+        if (encoding in encodings and request.accept_encodings[encoding]):
+            return encoding
+    return None
+
+
+def encode_response(response, encoded, endpoint):
+    '''Replace the body of a response by its compressed body in the encoding the client
+    prefers, if any. The ETag of a compressed response is weak, since it holds the
+    same content in other bytes.
+
+    Parameters
+    ----------
+    response: Response
+        the response, with its uncompressed body
+    encoded: dict
+        the compressed bodies of the response by encoding, empty if it is not worth compressing
+    endpoint: string
+        the endpoint of the response
+
+    Returns
+    -------
+    Response
+        the response
+    '''
+    if (not encoded):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(encoded)
+    if (encoding is None):
+        return response
+    body_size = response.content_length
+    response.set_data(encoded[encoding])
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if (etag):
+        response.set_etag(etag, weak=True)
+    with COMPRESSION_LOCK:
+        stats = compression_stats(endpoint)
+        stats['responses'] += 1
+        stats['bytes_in'] += body_size
+        stats['bytes_out'] += len(encoded[encoding])
+    return response
+
+
+def response_cache_entry_size(entry):
+    ''' Return the bytes of the bodies of a response cache entry'''
+    return len(entry[0]) + sum(len(encoded_body) for encoded_body in entry[3].values())
+
+
+def cached_response(key, data_version, render):
+    '''Look up a rendered page in the response cache, or render and keep it.
+    The whole cache is dropped when the data version changes, since a rebuild
+    replaces all of the data, and the least recently used pages are evicted
+    once the pages take more than RESPONSE_CACHE_BYTES. Only pages that were found
+    are kept, so requests for made-up slugs cannot push the real pages out.
+
+    Parameters
+    ----------
+    key: tuple
+        the view, its arguments and the locale of the page
+    data_version: string
+        the data version the page is rendered from
+    render: function
+        a function without arguments returning the Response of the page
+
+    Returns
+    -------
+    tuple
+        the body, status code and mimetype of the page, and its compressed bodies (see precompress_body)
+    '''
+    with RESPONSE_CACHE_LOCK:
+        if (RESPONSE_CACHE_STATS['data_version'] != data_version):
+            if (RESPONSE_CACHE):
+                RESPONSE_CACHE_STATS['invalidations'] += 1
+            RESPONSE_CACHE.clear()
+            RESPONSE_CACHE_STATS['bytes'] = 0
+            RESPONSE_CACHE_STATS['data_version'] = data_version
+        entry = RESPONSE_CACHE.get(key)
+        if (entry is not None):
+            RESPONSE_CACHE.move_to_end(key)
+            RESPONSE_CACHE_STATS['hits'] += 1
+            return entry
+        RESPONSE_CACHE_STATS['misses'] += 1
+
+    ## rendered without the lock, so other pages are served meanwhile
+    response = render()
+    body = response.get_data()
+    if (response.status_code != 200):
+        ## pages that were not found are neither compressed nor kept, they may be for any made-up URL
+        return body, response.status_code, response.mimetype, {}
+    entry = (body, response.status_code, response.mimetype, precompress_body(body, response.mimetype, key[0]))
+    entry_size = response_cache_entry_size(entry)
+    with RESPONSE_CACHE_LOCK:
+        if (RESPONSE_CACHE_STATS['data_version'] == data_version and key not in RESPONSE_CACHE and entry_size <= RESPONSE_CACHE_BYTES):
+            RESPONSE_CACHE[key] = entry
+            RESPONSE_CACHE_STATS['bytes'] += entry_size
+            while (RESPONSE_CACHE_STATS['bytes'] > RESPONSE_CACHE_BYTES):
+                evicted_key, evicted_entry = RESPONSE_CACHE.popitem(last=False)
+                RESPONSE_CACHE_STATS['bytes'] -= response_cache_entry_size(evicted_entry)
+                RESPONSE_CACHE_STATS['evictions'] += 1
+    return entry
+
+
+def page_cache_key(view_name, view_args, locale):
+    ''' Return the key of a page in the response cache: the view, its arguments and the locale of the page'''
+    return (view_name, tuple(sorted(view_args.items())), locale)
+
+
+@functools.lru_cache(maxsize=2 * len(LOCALES))
+def known_page_keys(data_version, locale):
+    '''Return the keys (see page_cache_key) of every cacheable page that is found in the data
+    of a data version, read once per data version and locale. Conditional requests
+    are answered from it without rendering the page.
+
+    Parameters
+    ----------
+    data_version: string
+        the data version being served
+    locale: string
+        the locale of the pages, which the slugs of the ability pages depend on
+
+    Returns
+    -------
+    frozenset
+        the page keys
+    '''
+    with read_connection() as connection:
+        roles = [row[0].lower() for row in connection.execute(select_hero_roles)]
+        hero_slugs = [row[0] for row in connection.execute('SELECT Slug FROM heroes')]
+        cursor = connection.cursor()
+        cursor.row_factory = sqlite3.Row
+        ability_rows = cursor.execute(select_localised_abilities, [locale, locale]).fetchall()
+    keys = set()
+    for hero_slug in hero_slugs:
+        keys.add(page_cache_key('handle_hero', {'slug': hero_slug}, locale))
+    for ability in ability_rows:
+        keys.add(page_cache_key('handle_hero_abilities', {'slug': ability['Hero_Slug']}, locale))
+        keys.add(page_cache_key('handle_ability', {'slug': ability['Hero_Slug'], 'ability_slug': page_slug(ability['Name'])}, locale))
+    for role in roles:
+        keys.add(page_cache_key('handle_role', {'role': role}, locale))
+    for role in ['all'] + roles:
+        for metric in CMP_METRIC_CHOICES.keys():
+            keys.add(page_cache_key('handle_compare', {'role': role, 'metric': metric}, locale))
+    return frozenset(keys)
+
+
+def cacheable_page(view):
+    '''Make a view the cacheable page of a GET route. Its ETag is made of the data version
+    and the locale and its Last-Modified is the build time of the data, both kept by the
+    process (see get_data_version). A conditional request for a page that is found in
+    the data being served (see known_page_keys) is answered with 304 Not Modified before
+    the view runs any query or renders any template. Other requests are answered from
+    the response cache, see cached_response, compressed ahead of time. Pages that were
+    not found have no validators and are always sent. The ETag is weak, since the page
+    is sent in other bytes to clients accepting compression, so a 304 carries the ETag
+    the page is sent with in any encoding.
+    The arguments in CASE_INSENSITIVE_PAGE_ARGS are lowercased, for the view and the cache key alike.
+    '''
+    @functools.wraps(view)
+    def cacheable_view(*args, **kwargs):
+        for name in CASE_INSENSITIVE_PAGE_ARGS:
+            if (name in kwargs):
+                kwargs[name] = kwargs[name].lower()
+        data_version = get_data_version()
+        locale = request_locale()
+        key = page_cache_key(view.__name__, kwargs, locale)
+        etag = data_version + '-' + locale
+        built_at = get_built_at()
+        not_modified = False
+        if (key in known_page_keys(data_version, locale)):
+            if (request.if_none_match):
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = request.if_modified_since is not None and request.if_modified_since >= built_at
+        if (not_modified):
+            response = Response(status=304)
+            response.vary.add('Accept-Encoding')
+        else:
+            body, status, mimetype, encoded = cached_response(key, data_version, lambda: make_response(view(*args, **kwargs)))
+            if (status != 200):
+                return Response(body, status=status, mimetype=mimetype)
+            response = Response(body, status=status, mimetype=mimetype)
+        response.set_etag(etag, weak=True)
+        response.last_modified = built_at
+        response.headers['Cache-Control'] = PAGE_CACHE_CONTROL
+        if (not not_modified):
+            encode_response(response, encoded, view.__name__)
+        return response
+    return cacheable_view
+
+
+@app.route('/metrics/response_cache')
+def handle_response_cache_metrics():
+    with RESPONSE_CACHE_LOCK:
+        metrics = dict(RESPONSE_CACHE_STATS)
+        metrics['entries'] = len(RESPONSE_CACHE)
+    metrics['max_bytes'] = RESPONSE_CACHE_BYTES
+    lookups = metrics['hits'] + metrics['misses']
+    metrics['hit_rate'] = metrics['hits'] / lookups if lookups else 0.0
+    return metrics
+
+
+@app.route('/metrics/compression')
+def handle_compression_metrics():
+    with COMPRESSION_LOCK:
+        metrics = {endpoint: dict(stats) for endpoint, stats in COMPRESSION_STATS.items()}
+    for stats in metrics.values():
+        stats['ratio'] = stats['bytes_in'] / stats['bytes_out'] if stats['bytes_out'] else None
+        stats['compress_ms_per_call'] = 1000 * stats['compress_seconds'] / stats['compressions'] if stats['compressions'] else None
+    return {'encodings': COMPRESSION_ENCODINGS, 'min_bytes': COMPRESSION_MIN_BYTES, 'endpoints': metrics}
+
+
+@app.after_request
+def compress_response(response):
+    '''Compress the responses that were not compressed ahead of time, e.g. full-text search results.
+    Error pages are sent as they are, so that made-up URLs cost no compression.'''
+    if (response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or (response.content_length or 0) < COMPRESSION_MIN_BYTES):
+        return response
+    encoding = negotiate_encoding(COMPRESSION_ENCODINGS)
+    if (encoding is None):
+        response.vary.add('Accept-Encoding')
+        return response
+    endpoint = request.endpoint or 'other' # no endpoint when no route matched
+    encoded = {encoding: compress_body(response.get_data(), encoding, COMPRESSION_LEVELS[encoding], endpoint)}
+    return encode_response(response, encoded, endpoint)
+
+
+@app.route('/assets/<filename>')
+def handle_asset(filename):
+    asset_name, asset_body = plotly_js_asset()
+    if (filename != asset_name):
+        abort(404)
+    body, encoded = precompressed_payload(asset_body, 'application/javascript', 'handle_asset')
+    response = Response(body, mimetype='application/javascript')
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return encode_response(response, encoded, 'handle_asset')
+
+
+@app.route('/')
+def index():
+    return render_template('index.html') # just the static HTML
+    
+
+@app.route('/search_type', methods=['POST'])
+def handle_search_type():
+    search_option = request.form["search_option"]
+    if (search_option == "heroes"):
+        return render_template('search_hero.html', locales=LOCALES)
+    elif (search_option == "abilities"):
+        return render_template('search_ability.html', locales=LOCALES)
+    elif (search_option == "text"):
+        return render_template('search_text.html', locales=LOCALES)
+    elif (search_option == "filter"):
+        return render_template('search_filter.html', locales=LOCALES)
+    else:
+        return render_template('search_cmp.html')
+
+
+@app.route('/search_type/hero', methods=['POST'])
+def handle_search_hero():
+    search_hero_option = request.form["search_hero_option"]
+    locale = request.form.get("locale", DEFAULT_LOCALE)
+    if (search_hero_option == "name"):
+        return redirect_to_hero(request.form["hero_name"], locale, 'handle_hero')
+    else:
+        return render_template('search_role.html', locales=LOCALES)
+
+
+def redirect_to_hero(hero_name, locale, endpoint):
+    ''' Redirect a form to a GET route of the hero of a name, the hero page or its abilities'''
+    results = search_hero_table_by_name(hero_name, locale, row_factory=hero_row_factory)
+    if (results):
+        return redirect(url_for(endpoint, slug=results[0].slug, **locale_args(locale)), code=303)
+    elif (endpoint == 'handle_hero'):
+        return render_template('hero.html', hero_inst="", ability_list=[], role_stats=[])
+    else:
+        return render_template('hero_ability.html', ability_list=[])
+
+
+def redirect_to_ability(ability_name, locale, hero_slug=None):
+    ''' Redirect a form to the GET route of the ability of a name, of the hero of hero_slug if given'''
+    ability_results = search_ablility_table_by_ablitity_name(ability_name, locale, row_factory=sqlite3.Row)
+    if (hero_slug is not None):
+        ability_results = [ability for ability in ability_results if ability['Hero_Slug'] == hero_slug]
+    if (ability_results):
+        return redirect(url_for('handle_ability', slug=ability_results[0]['Hero_Slug'], ability_slug=page_slug(ability_results[0]['Name']), **locale_args(locale)), code=303)
+    else:
+        return render_template('ability.html', ability_inst="")
+
+
+@app.route('/search_type/role', methods=['POST'])
+def handle_search_role():
+    locale = request.form.get("locale", DEFAULT_LOCALE)
+    return redirect(url_for('handle_role', role=request.form["search_role_option"].lower(), **locale_args(locale)), code=303)
+
+
+@app.route('/search_type/role/hero', methods=['POST'])
+def handle_hero_page():
+    return redirect_to_hero(request.form["hero_name"], request.form.get("locale", DEFAULT_LOCALE), 'handle_hero')
+
+
+@app.route('/search_type/ability', methods=['POST'])
+def handle_search_ability():
+    search_ability_option = request.form["search_ability_option"]
+    locale = request.form.get("locale", DEFAULT_LOCALE)
+    if (search_ability_option == "name"):
+        return redirect_to_ability(request.form["ability_name"], locale)
+    elif (search_ability_option == "stat"):
+        ## an empty or invalid end of the range does not limit it
+        invalid_fields = []
+        stat_min = form_number("stat_min", invalid_fields)
+        stat_max = form_number("stat_max", invalid_fields)
+        stat_key = request.form.get("stat_key", "").strip()
+        result_list = search_ability_table_by_stat(
+            stat_key,
+            float('-inf') if stat_min is None else stat_min,
+            float('inf') if stat_max is None else stat_max,
+            descending=(request.form.get("order") == "desc"))
+        return render_template('ability_stat.html', stat_key=stat_key, result_list=result_list, invalid_fields=invalid_fields)
+    else:
+        return redirect_to_hero(request.form["hero_name"], locale, 'handle_hero_abilities')
+
+
+@app.route('/search_type/ability/hero', methods=['POST'])
+def handle_search_hero_ability():
+    return redirect_to_ability(request.form["ability_name"], request.form.get("locale", DEFAULT_LOCALE), request.form.get("hero_slug"))
+
+
+@app.route('/hero/<slug>')
+@cacheable_page
+def handle_hero(slug):
+    hero_page = search_hero_page_by_slug(slug, request_locale())
+    if (hero_page):
+        return render_template('hero.html', hero_inst=hero_page["hero"], ability_list=hero_page["abilities"], role_stats=hero_page["role_stats"])
+    else:
+        return render_template('hero.html', hero_inst="", ability_list=[], role_stats=[]), 404
+
+
+@app.route('/hero/<slug>/abilities')
+@cacheable_page
+def handle_hero_abilities(slug):
+    locale = request_locale()
+    ability_results = search_ablility_table_by_hero_slug(slug, locale, row_factory=sqlite3.Row)
+    if (ability_results):
+        return render_template('hero_ability.html', ability_list=ability_results, hero_name=ability_results[0]['Hero_Name'], hero_slug=slug, locale=locale)
+    else:
+        return render_template('hero_ability.html', ability_list=[]), 404
+
+
+@app.route('/role/<role>')
+@cacheable_page
+def handle_role(role):
+    locale = request_locale()
+    results = search_hero_table_by_role(role, locale, row_factory=hero_row_factory)
+    if (results):
+        return render_template('role.html', role_list=results, role=results[0].role, locale=locale)
+    else:
+        return render_template('role.html'), 404
+
+
+@app.route('/hero/<slug>/ability/<ability_slug>')
+@cacheable_page
+def handle_ability(slug, ability_slug):
+    locale = request_locale()
+    ## abilities of different heroes may share a name, so an ability is found among the abilities of its hero
+    ability_results = [ability for ability in search_ablility_table_by_hero_slug(slug, locale, row_factory=sqlite3.Row) if page_slug(ability['Name']) == ability_slug]
+    if (ability_results):
+        ability_result = attach_ability_stats(ability_results[:1])[0]
+        return render_template('ability.html', ability_inst=ability_result)
+    else:
+        return render_template('ability.html', ability_inst=""), 404
+
+
+def highlight_snippet(snippet):
+    ''' Escape a full-text search snippet for HTML and show its matched words in bold'''
+    return Markup(escape(snippet).replace('\x02', Markup('<b>')).replace('\x03', Markup('</b>')))
+
+
+@app.route('/search_type/text', methods=['POST'])
+def handle_search_text():
+    search_text = request.form["search_text"]
+    locale = request.form.get("locale", DEFAULT_LOCALE)
+    results = search_wiki_text(search_text, locale, highlight=('\x02', '\x03'))
+    result_list = []
+    for result in results:
+        result = list(result)
+        result[3] = highlight_snippet(result[3])
+        result_list.append(result)
+    return render_template('text.html', search_text=search_text, result_list=result_list, locale=locale)
+
+
+def form_number(name, invalid_fields):
+    '''Return a number field of the request form, or None if it is empty or not a number.
+
+    Parameters
+    ----------
+    name: string
+        the name of the field
+    invalid_fields: list
+        the names of the fields that are not numbers, the name is added to it if the field is not one
+
+    Returns
+    -------
+    float
+        the number, or None
+    '''
+    value = request.form.get(name, "").strip()
+    if (value == ""):
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if (not math.isfinite(number)):
+        invalid_fields.append(name)
+        return None
+    return number
+
+
+@app.route('/search_type/filter', methods=['POST'])
+def handle_search_filter():
+    sort = request.form.get("sort", "name")
+    if (sort not in HERO_FILTER_SORTS):
+        sort = "name"
+    ## fields that are not numbers are ignored and listed on the page
+    invalid_fields = []
+    ranges = {}
+    for range_name in HERO_FILTER_RANGES.keys():
+        ranges[range_name] = (form_number(range_name + "_min", invalid_fields), form_number(range_name + "_max", invalid_fields))
+    after = None
+    if (request.form.get("after_id")):
+        after_id = form_number("after_id", invalid_fields)
+        if (sort == "name"):
+            after_value = request.form.get("after_value", "")
+        else:
+            after_value = form_number("after_value", invalid_fields)
+        ## a page that cannot be continued starts again from the first one
+        if (after_id is not None and after_value is not None):
+            after = (after_value, int(after_id))
+    hero_list, next_after = filter_hero_table(
+        role=request.form.get("role") or None,
+        ranges=ranges,
+        nationality=request.form.get("nationality") or None,
+        affiliation=request.form.get("affiliation") or None,
+        sort=sort,
+        descending=(request.form.get("order") == "desc"),
+        after=after,
+        locale=request.form.get("locale", DEFAULT_LOCALE),
+        row_factory=hero_row_factory)
+    return render_template('filter.html', hero_list=hero_list, next_after=next_after, filter_form=request.form, invalid_fields=invalid_fields)
+
+
+@app.route('/search_type/cmp', methods=['POST'])
+def handle_search_cmp():
+    try:
+        cmp_choice = int(request.form.get("search_cmp_option", ""))
+    except ValueError:
+        cmp_choice = None
+    if (cmp_choice not in CMP_METRIC_SLUGS):
+        return render_template('cmp.html')
+    return redirect(url_for('handle_compare', role=request.form["search_role_option"].lower(), metric=CMP_METRIC_SLUGS[cmp_choice]), code=303)
+
+
+@app.route('/compare/<role>/<metric>')
+@cacheable_page
+def handle_compare(role, metric):
+    cmp_choice = CMP_METRIC_CHOICES.get(metric)
+    if (cmp_choice is None):
+        return render_template('cmp.html'), 404
+    locale = request_locale()
+    chart = comparison_chart(role, cmp_choice, get_data_version(), locale)
+    if (chart is not None):
+        chart_url = url_for('handle_chart_data', role=role, metric=metric, **locale_args(locale))
+        return render_template('cmp.html', search_role_option=role.title(), chart_url=chart_url, plotly_js=plotly_js_asset()[0])
+    else:
+        return render_template('cmp.html'), 404
+
+
+@app.route('/api/chart/<role>/<metric>')
+def handle_chart_data(role, metric):
+    ## the same role and metric slug as /compare, in any case
+    role, metric = role.lower(), metric.lower()
+    cmp_choice = CMP_METRIC_CHOICES.get(metric)
+    if (cmp_choice is None):
+        abort(404)
+    data_version = get_data_version()
+    locale = request_locale()
+    chart = comparison_chart(role, cmp_choice, data_version, locale)
+    if (chart is None):
+        abort(404)
+    body, encoded = precompressed_payload(chart, 'application/json', 'handle_chart_data')
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = CHART_DATA_CACHE_CONTROL
+    response.set_etag(data_version + '-' + locale + '-' + role + '-' + metric)
+    return encode_response(response, encoded, 'handle_chart_data').make_conditional(request)
+
+
+def render_site_page(template_name, **context):
+    ''' Render a page of the static site outside of a request, as UTF-8 bytes'''
+    with app.test_request_context():
+        return render_template(template_name, static_site=True, **context).encode('utf-8')
+
+
+def site_templates_digest():
+    ''' Return a checksum of all templates of the app, which every page of the static site is rendered with'''
+    digest = hashlib.sha256()
+    for template_path in sorted(Path(app.root_path, app.template_folder).rglob('*')):
+        if (template_path.is_file()):
+            digest.update(template_path.name.encode('utf-8'))
+            digest.update(template_path.read_bytes())
+    return digest.hexdigest()
+
+
+def static_site_pages(locale=DEFAULT_LOCALE):
+    '''List the pages of the static site, each with the data it is rendered from and
+    the function that renders it.
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the text of the pages
+
+    Returns
+    -------
+    dict
+        key is the path of a page within the site (e.g. 'hero/ana.html') and value is
+        a tuple of the source data of the page, made of tuples, lists, dicts and plain
+        values, and a function without arguments returning the bytes of the page
+    '''
+    data_version = get_data_version()
+    with read_connection() as connection:
+        roles = [row[0] for row in connection.execute(select_hero_roles)]
+        cursor = connection.cursor()
+        cursor.row_factory = sqlite3.Row
+        heroes = cursor.execute(select_localised_heroes, [locale]).fetchall()
+        ability_rows = cursor.execute(select_localised_abilities + ' ORDER BY abilities.Id', [locale, locale]).fetchall()
+    ability_list = attach_ability_stats(ability_rows)
+    abilities_by_hero = {}
+    for ability in ability_rows:
+        abilities_by_hero.setdefault(ability['HeroId'], []).append(ability)
+
+    asset_name, asset_body = plotly_js_asset()
+    pages = {'assets/' + asset_name: (asset_name, lambda: asset_body)}
+    comparisons = []
+    for role in ['All'] + roles:
+        for cmp_choice, spec in CMP_CHART_SPECS.items():
+            chart = comparison_chart(role, cmp_choice, data_version, locale)
+            if (chart is None):
+                continue
+            page_path = 'compare/' + role.lower() + '/' + CMP_METRIC_SLUGS[cmp_choice]
+            comparisons.append((role, spec['title'], page_path + '.html'))
+            pages[page_path + '.json'] = (chart, functools.partial(str.encode, chart, 'utf-8'))
+            pages[page_path + '.html'] = ((role, asset_name), functools.partial(render_site_page, 'cmp.html', search_role_option=role,
+                chart_url='/' + page_path + '.json', plotly_js=asset_name))
+    pages['index.html'] = ((roles, [tuple(hero) for hero in heroes], comparisons),
+        functools.partial(render_site_page, 'index.html', roles=roles, heroes=heroes, comparisons=comparisons))
+
+    for role in roles:
+        role_rows = search_hero_table_by_role(role, locale)
+        pages['role/' + role.lower() + '.html'] = (role_rows, functools.partial(render_site_page, 'role.html',
+            role_list=[hero_row_factory(None, row) for row in role_rows], role=role, locale=locale))
+    for hero in heroes:
+        hero_page = search_hero_page_by_slug(hero['Slug'], locale)
+        hero_abilities = abilities_by_hero.get(hero['Id'], [])
+        pages['hero/' + hero['Slug'] + '.html'] = (hero_page, functools.partial(render_site_page, 'hero.html',
+            hero_inst=hero_page['hero'], ability_list=hero_page['abilities'], role_stats=hero_page['role_stats']))
+        pages['hero/' + hero['Slug'] + '/abilities.html'] = (([tuple(ability) for ability in hero_abilities], hero['Name']),
+            functools.partial(render_site_page, 'hero_ability.html',
+            ability_list=hero_abilities, hero_name=hero['Name'], hero_slug=hero['Slug'], locale=locale))
+    for ability in ability_list:
+        pages.setdefault('hero/' + ability['Hero_Slug'] + '/ability/' + page_slug(ability['Name']) + '.html',
+            (ability, functools.partial(render_site_page, 'ability.html', ability_inst=ability)))
+    return pages
+
+
+def export_static_site(directory, locale=DEFAULT_LOCALE):
+    '''Render every page of the wiki into a directory, for any static file server to serve:
+    the index, every hero, ability, hero's ability list, role and role x comparison chart.
+    The site manifest of the previous export records a checksum of the source data of
+    every page (see static_site_pages) together with the templates, and of its bytes.
+    A page whose source data is unchanged and whose files are all there is neither
+    rendered nor written, so an export after a rebuild only renders the pages whose data
+    changed. Those are rendered by SITE_EXPORT_WORKERS threads and only written if their
+    bytes changed, and pages that are no longer part of the site are removed. Pages
+    worth compressing are also written compressed next to themselves (e.g. index.html.gz),
+    for servers that send precompressed files such as nginx with gzip_static.
+
+    Parameters
+    ----------
+    directory: string
+        the directory of the site, created if it does not exist
+    locale: string
+        the locale of the text of the pages
+
+    Returns
+    -------
+    dict
+        the number of pages 'rendered', 'written', 'unchanged' (not written) and 'removed'
+    '''
+    directory = Path(directory)
+    manifest_path = directory / SITE_MANIFEST_NAME
+    try:
+        previous_manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        previous_pages = previous_manifest['pages'] if previous_manifest.get('format') == SITE_MANIFEST_FORMAT else {}
+    except (OSError, ValueError, KeyError):
+        previous_pages = {}
+    pages = static_site_pages(locale)
+    templates_digest = site_templates_digest()
+
+    def write_file(file_path, body):
+        file_copy = file_path.with_name(file_path.name + '.tmp')
+        file_copy.write_bytes(body)
+        os.replace(file_copy, file_path)
+
+    def remove_page(file_path):
+        for suffix in [''] + list(COMPRESSED_FILE_SUFFIXES.values()):
+            if (file_path.with_name(file_path.name + suffix).exists()):
+                file_path.with_name(file_path.name + suffix).unlink()
+
+    def page_files_exist(file_path, encodings):
+        page_files = [file_path] + [file_path.with_name(file_path.name + COMPRESSED_FILE_SUFFIXES[encoding]) for encoding in encodings]
+        return all(page_file.exists() for page_file in page_files)
+
+    def export_page(page_path):
+        source, render = pages[page_path]
+        source_checksum = hashlib.sha256(repr((templates_digest, locale, COMPRESSION_ENCODINGS, source)).encode('utf-8')).hexdigest()
+        previous_page = previous_pages.get(page_path)
+        file_path = directory / page_path
+        if (previous_page is not None and previous_page['source'] == source_checksum and page_files_exist(file_path, previous_page['encodings'])):
+            return page_path, previous_page, False, False
+        body = render()
+        mimetype = SITE_PAGE_MIMETYPES.get(file_path.suffix)
+        page = {'source': source_checksum, 'checksum': hashlib.sha256(body).hexdigest(), 'encodings': list(compressed_encodings(body, mimetype))}
+        if (previous_page is not None and previous_page['checksum'] == page['checksum'] and page_files_exist(file_path, page['encodings'])):
+            return page_path, page, True, False
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        ## every file is replaced in one step, so a server never sees a page missing or half written;
+        ## the compressed copies go first, then the page, then the copies the page no longer has
+        encoded_bodies = precompress_body(body, mimetype, 'export_static_site')
+        for encoding, encoded_body in encoded_bodies.items():
+            write_file(file_path.with_name(file_path.name + COMPRESSED_FILE_SUFFIXES[encoding]), encoded_body)
+        write_file(file_path, body)
+        for encoding, suffix in COMPRESSED_FILE_SUFFIXES.items():
+            if (encoding not in encoded_bodies and file_path.with_name(file_path.name + suffix).exists()):
+                file_path.with_name(file_path.name + suffix).unlink()
+        return page_path, page, True, True
+
+    exported_pages = {}
+    counts = {'rendered': 0, 'written': 0, 'unchanged': 0, 'removed': 0}
+    with ThreadPoolExecutor(max_workers=SITE_EXPORT_WORKERS) as executor:
+        for page_path, page, rendered, written in executor.map(export_page, sorted(pages)):
+            exported_pages[page_path] = page
+            counts['rendered'] += rendered
+            counts['written' if written else 'unchanged'] += 1
+    for page_path in previous_pages.keys() - exported_pages.keys():
+        remove_page(directory / page_path)
+        counts['removed'] += 1
+
+    manifest = {'format': SITE_MANIFEST_FORMAT, 'data_version': get_data_version(), 'locale': locale, 'pages': exported_pages}
+    manifest_copy = manifest_path.with_name(manifest_path.name + '.tmp')
+    manifest_copy.write_text(json.dumps(manifest, indent=4), encoding='utf-8')
+    os.replace(manifest_copy, manifest_path)
+    return counts
+
+
+def create_app():
+    '''Prepare the Flask app for a WSGI server, e.g. `gunicorn "final_proj_flask:create_app()"`.
+    Serving never scrapes: hero_wiki.sqlite is built beforehand with
+    `python final_proj_flask.py build`, or restored from the snapshot file.
+
+    Returns
+    -------
+    Flask
+        the app
+
+    Raises
+    ------
+    RuntimeError
+        if there is neither hero_wiki.sqlite nor a snapshot file to restore it from
+    '''
+    if (not wiki_file.exists() and wiki_snapshot_file.exists()):
+        restore_wiki_snapshot_file()
+    if (not wiki_file.exists()):
+        raise RuntimeError(str(wiki_file) + " does not exist, run `python final_proj_flask.py build` first")
+    return app
+
+
+def preload_app_data(locale=DEFAULT_LOCALE):
+    '''Load the read-only data of the app before the server forks its workers, so the
+    workers share it copy-on-write: the hero stats store, the comparison charts, the
+    plotly.js bundle and the rendered page of every GET route in the response cache,
+    all of them compressed.
+    The read connections and the memory snapshot are closed afterwards, since SQLite
+    connections must not be used across a fork. The workers never load a memory
+    snapshot of their own, see prepare_worker: they read the file through read-only
+    connections for the pages that were not preloaded.
+
+    Parameters
+    ----------
+    locale: string
+        the locale of the pages to render
+
+    Returns
+    -------
+    string
+        the data version of the preloaded data
+    '''
+    data_version = get_data_version()
+    precompressed_payload(plotly_js_asset()[1], 'application/javascript', 'handle_asset')
+    with read_connection() as connection:
+        roles = [row[0].lower() for row in connection.execute(select_hero_roles)]
+        hero_slugs = [row[0] for row in connection.execute('SELECT Slug FROM heroes ORDER BY Id')]
+        cursor = connection.cursor()
+        cursor.row_factory = sqlite3.Row
+        ability_rows = cursor.execute(select_localised_abilities + ' ORDER BY abilities.Id', [locale, locale]).fetchall()
+    urls = ['/role/' + role for role in roles]
+    for hero_slug in hero_slugs:
+        urls += ['/hero/' + hero_slug, '/hero/' + hero_slug + '/abilities']
+    urls += ['/hero/' + ability['Hero_Slug'] + '/ability/' + page_slug(ability['Name']) for ability in ability_rows]
+    for role in ['all'] + roles:
+        urls += ['/compare/' + role + '/' + metric_slug for metric_slug in CMP_METRIC_CHOICES]
+        urls += ['/api/chart/' + role + '/' + metric_slug for metric_slug in CMP_METRIC_CHOICES]
+    client = app.test_client()
+    for url in urls:
+        client.get(url, query_string=locale_args(locale))
+    DISK_DATA_INFO.update(data_version=data_version, built_at=get_built_at(), checked_at=time.time())
+
+    with SNAPSHOT_LOCK:
+        close_read_connections()
+        if (MEMORY_SNAPSHOT['anchor'] is not None):
+            MEMORY_SNAPSHOT['anchor'].close()
+            MEMORY_SNAPSHOT['anchor'] = None
+    return data_version
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    '''A WSGI server answering requests with a fixed pool of threads. It speaks
+    HTTP/1.0, so a connection never keeps a thread of the pool between requests.'''
+    def __init__(self, app, fd, threads):
+        super().__init__(SERVER_HOST, SERVER_PORT, app, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def clear_app_caches():
+    ''' Drop the preloaded data of the app, the response cache and the cached charts, stores and page keys'''
+    with RESPONSE_CACHE_LOCK:
+        RESPONSE_CACHE.clear()
+        RESPONSE_CACHE_STATS.update(data_version=None, bytes=0)
+    HERO_STATS_STORES.clear()
+    cached_comparison_chart.cache_clear()
+    precompressed_payload.cache_clear()
+    known_page_keys.cache_clear()
+
+
+def prepare_worker():
+    '''Make a forked worker serve the data preloaded by preload_app_data. The worker
+    reads hero_wiki.sqlite through read-only connections instead of copying it into a
+    memory snapshot of its own, so the workers only share the preloaded data and the
+    page cache of the file. It keeps the data version of the preloaded data without
+    checking the file, since the launcher forks a new generation of workers for a new one.
+    '''
+    global SERVE_FROM_MEMORY
+    SERVE_FROM_MEMORY = False
+    DISK_DATA_INFO['checked_at'] = float('inf')
+
+
+def run_worker(listener, threads):
+    '''Serve the app from a forked worker process until it gets SIGTERM, then finish the
+    requests in progress and exit.
+
+    Parameters
+    ----------
+    listener: socket
+        the listening socket shared by all workers
+    threads: int
+        the number of request threads
+    '''
+    logging.getLogger('werkzeug').setLevel(logging.WARNING) # no log line for every request
+    prepare_worker()
+    server = PooledWSGIServer(app, listener.fileno(), threads)
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # the launcher stops the workers
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    server.serve_forever()
+    server.executor.shutdown(wait=True)
+    server.server_close()
+
+
+def fork_worker(listener, threads):
+    ''' Fork a worker process serving the app, see run_worker, and return its pid'''
+    ## the signals are held back until the new worker has dropped the handlers of the launcher,
+    ## so a SIGTERM to the process group is never swallowed by a worker that does not serve yet
+    previous_mask = signal.pthread_sigmask(signal.SIG_BLOCK, SERVER_SIGNALS)
+    pid = os.fork()
+    if (pid == 0):
+        try:
+            for signum in SERVER_SIGNALS:
+                signal.signal(signum, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_SETMASK, previous_mask)
+            run_worker(listener, threads)
+        finally:
+            os._exit(0)
+    signal.pthread_sigmask(signal.SIG_SETMASK, previous_mask)
+    return pid
+
+
+def stop_workers(worker_pids, timeout=SERVER_SHUTDOWN_SECONDS):
+    '''Stop worker processes with SIGTERM and wait for them to finish their requests in
+    progress, killing the ones still running after timeout seconds.
+
+    Parameters
+    ----------
+    worker_pids: list
+        the pids of the workers
+    timeout: float
+        the seconds to wait before the remaining workers are killed
+    '''
+    for pid in worker_pids:
+        os.kill(pid, signal.SIGTERM)
+    running_pids = set(worker_pids)
+    deadline = time.time() + timeout
+    while (running_pids and time.time() < deadline):
+        for pid in list(running_pids):
+            if (os.waitpid(pid, os.WNOHANG)[0] == pid):
+                running_pids.discard(pid)
+        if (running_pids):
+            time.sleep(0.1)
+    for pid in running_pids:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def has_new_data_version(data_version):
+    ''' Return whether hero_wiki.sqlite holds another data version than the one being served; never while it cannot be read'''
+    file_data_version = read_file_data_version()
+    return file_data_version is not None and file_data_version != data_version
+
+
+def serve_prefork(workers=SERVER_WORKERS, threads=SERVER_THREADS):
+    '''Serve the app with several worker processes forked from this one after the data
+    is preloaded, see preload_app_data. All workers accept connections on one listening
+    socket, so throughput grows with the number of cores.
+
+    A new generation of workers is forked from newly preloaded data when hero_wiki.sqlite
+    gets a new data version, or on SIGHUP; the previous workers then finish their requests
+    in progress and exit, so no request is dropped. Workers that die are replaced, and
+    SIGTERM or SIGINT stop the server, see stop_workers.
+
+    Parameters
+    ----------
+    workers: int
+        the number of worker processes
+    threads: int
+        the number of request threads of each worker
+
+    Raises
+    ------
+    ValueError
+        if there is not at least one worker
+    '''
+    if (workers < 1):
+        raise ValueError("the server needs at least one worker, not " + str(workers))
+    listener = socket.create_server((SERVER_HOST, SERVER_PORT), backlog=1024)
+    ## several workers wait for the same connections, the ones that lose the race go back to waiting
+    listener.setblocking(False)
+    signals = {'reload': False, 'stop': False}
+    signal.signal(signal.SIGHUP, lambda signum, frame: signals.update(reload=True))
+    signal.signal(signal.SIGTERM, lambda signum, frame: signals.update(stop=True))
+    signal.signal(signal.SIGINT, lambda signum, frame: signals.update(stop=True))
+
+    def start_generation():
+        ## the data of the previous generation is dropped and collected before the new one is frozen
+        gc.unfreeze()
+        clear_app_caches()
+        gc.collect()
+        data_version = preload_app_data()
+        gc.freeze() # keep the preloaded objects out of the collector, which would copy their pages
+        return data_version, [fork_worker(listener, threads) for _ in range(workers)]
+
+    data_version, worker_pids = start_generation()
+    retiring_pids = set() # workers of previous generations finishing their requests in progress
+    print("Serving data version " + data_version + " on http://" + SERVER_HOST + ":" + str(SERVER_PORT)
+        + " with " + str(workers) + " workers of " + str(threads) + " threads")
+    checked_at = time.time()
+    while (not signals['stop']):
+        time.sleep(0.5)
+        if (time.time() - checked_at > SNAPSHOT_CHECK_INTERVAL):
+            checked_at = time.time()
+            signals['reload'] = signals['reload'] or has_new_data_version(data_version)
+        if (signals['reload']):
+            signals['reload'] = False
+            previous_pids = worker_pids
+            data_version, worker_pids = start_generation()
+            for pid in previous_pids:
+                os.kill(pid, signal.SIGTERM)
+            retiring_pids.update(previous_pids)
+            print("Reloaded data version " + data_version)
+        while (True):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError: # no worker left
+                break
+            if (pid == 0):
+                break
+            retiring_pids.discard(pid)
+            if (pid in worker_pids):
+                ## no new worker once the server is stopping
+                if (signals['stop']):
+                    worker_pids.remove(pid)
+                else:
+                    worker_pids[worker_pids.index(pid)] = fork_worker(listener, threads)
+
+    stop_workers(worker_pids + list(retiring_pids))
+    listener.close()
+
+
+if __name__ == "__main__":
+    ## Load the cache, save in global variable
+    CACHE_DICT = load_cache()
+
+    ## production: build and serve are separate steps
+    if (len(sys.argv) > 1 and sys.argv[1] == 'build'):
+        build_wiki_database()
+        sys.exit()
+    if (len(sys.argv) > 1 and sys.argv[1] == 'serve'):
+        create_app()
+        serve_prefork()
+        sys.exit()
+
+    if (not wiki_file.exists() and wiki_snapshot_file.exists()):
+        try:
+            manifest = restore_wiki_snapshot_file()
+            print("Restored data version " + manifest["data_version"] + " built at " + manifest["built_at"] + " from " + str(wiki_snapshot_file))
+            ## serve the restored data right away, and the new build once it is finished
+            threading.Thread(target=build_wiki_database, daemon=True).start()
+        except (ValueError, KeyError, tarfile.TarError) as error:
+            print("Cannot restore " + str(wiki_snapshot_file) + ": " + str(error))
+    if not wiki_file.exists():
+        build_wiki_database()
+
+    if (SERVE_FROM_MEMORY):
+        load_memory_snapshot()
+
+    ## subcommands
+    if (len(sys.argv) > 1 and sys.argv[1] == 'site'):
+        site_directory = sys.argv[2] if len(sys.argv) > 2 else 'hero_wiki_site'
+        site_locale = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_LOCALE
+        counts = export_static_site(site_directory, site_locale)
+        print("Exported the site to " + site_directory + ": " + str(counts['rendered']) + " pages rendered, " + str(counts['written']) + " written, "
+            + str(counts['unchanged']) + " unchanged, " + str(counts['removed']) + " removed")
+        sys.exit()
 
     ## interface
     print('starting Flask app', app.name)  
@@ -0,0 +1,70 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''The made-up database the tests run on, built by create_wiki_database
+of either program.
+'''
+
+import importlib
+import sqlite3
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+ROLES = ['Tank', 'Damage', 'Support']
+
+
+def build_hero_dicts(module, hero_count=9, locales=('en-us', 'de-de')):
+    '''Make up the hero dicts of create_wiki_database, with a few translated names.
+
+    Parameters
+    ----------
+    module: module
+        final_proj_commandline or final_proj_flask
+    hero_count: int
+        the number of heroes
+    locales: tuple
+        the locales, the first being the default one
+
+    Returns
+    -------
+    dict
+        key is a locale and value is the hero dict of that locale
+    '''
+    locale_hero_dicts = {}
+    for locale in locales:
+        hero_dict = {}
+        for i in range(hero_count):
+            name = 'Hero' + str(i) if locale == locales[0] else 'Held' + str(i)
+            abilities = {}
+            for j in range(3):
+                ability = module.Ability('Ability' + str(i) + '_' + str(j), 'A barrier ability.', 'https://example.com/' + str(i) + '_' + str(j) + '.mp4')
+                ability.stats = ('\nType: Weapon\nDamage: ' + str(10 * i + j) + ' per shot.\nCooldown: ' + str(j + 4) + ' seconds.\n'
+                    + 'Projectile speed: 60 m/s\nCan headshot\n')
+                abilities[ability.name] = ability
+            hero = module.Hero(ROLES[i % 3], name, 'A hero.', abilities, 'Quote!', 'https://example.com/' + str(i) + '.png', slug='hero' + str(i))
+            hero.health, hero.armor, hero.shield = str(200 + 25 * i), str(10 * i), str(50 * (i % 2))
+            hero.real_name, hero.age, hero.nationality = 'Real Name', str(30 + i), ['Egyptian', 'Swedish'][i % 2]
+            hero.occupation, hero.base, hero.affiliation = 'Occupation', 'Base', 'Overwatch'
+            hero.pick_rate, hero.win_rate, hero.tie_rate, hero.on_fire_rate = 1.0 + i, 45.0 + i, 0.5, 5.0 + i
+            hero_dict[name.lower()] = hero
+        locale_hero_dicts[locale] = hero_dict
+    return locale_hero_dicts
+
+
+@pytest.fixture(params=['final_proj_commandline', 'final_proj_flask'])
+def wiki(request, tmp_path, monkeypatch):
+    ''' Build a made-up hero_wiki.sqlite with one of the programs, and return the program and a cursor'''
+    module = importlib.import_module(request.param)
+    monkeypatch.setattr(module, 'wiki_file', tmp_path / 'hero_wiki.sqlite')
+    ## the searches read the file, not a memory snapshot of a previous test's database
+    monkeypatch.setattr(module, 'SERVE_FROM_MEMORY', False)
+    locale_hero_dicts = build_hero_dicts(module)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    connection = sqlite3.connect(tmp_path / 'hero_wiki.sqlite')
+    yield module, connection.cursor()
+    connection.close()
@@ -0,0 +1,58 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the parsing of the ability stats into the ability_stats table, and
+the search of abilities by the number of one of their stats.
+
+Usage: python -m pytest tests
+'''
+
+import importlib
+import pytest
+
+
+@pytest.mark.parametrize('module_name', ['final_proj_commandline', 'final_proj_flask'])
+def test_parse_ability_stats(module_name):
+    module = importlib.import_module(module_name)
+    stats = '\nType: Weapon\nCooldown: 12 seconds.\nHealing: 40%\nProjectile speed: 20 m/s\nRange: 15 meters\nCan headshot\n'
+    assert module.parse_ability_stats(stats) == [
+        ('Type', 'Weapon', None, None),
+        ('Cooldown', '12 seconds.', 12.0, 's'),
+        ('Healing', '40%', 40.0, '%'),
+        ('Projectile speed', '20 m/s', 20.0, None),
+        ('Range', '15 meters', 15.0, 'm'),
+        ('', 'Can headshot', None, None)
+    ]
+
+
+def test_search_ability_table_by_stat(wiki):
+    module, _ = wiki
+    short_cooldowns = module.search_ability_table_by_stat('cooldown', max_value=5)
+    assert len(short_cooldowns) == 18
+    assert [row[3] for row in short_cooldowns] == sorted(row[3] for row in short_cooldowns)
+    assert all(row[3] <= 5 and row[4] == 's' for row in short_cooldowns)
+    highest_damage = module.search_ability_table_by_stat('Damage', descending=True, limit=3)
+    assert [(row[0], row[1], row[3]) for row in highest_damage] == [
+        ('Ability8_2', 'Hero8', 82.0), ('Ability8_1', 'Hero8', 81.0), ('Ability8_0', 'Hero8', 80.0)
+    ]
+    assert all(row[4] is None for row in module.search_ability_table_by_stat('Projectile speed'))
+
+
+def test_stat_lines_without_a_key_are_kept(wiki):
+    _, cur = wiki
+    assert cur.execute("SELECT count(*) FROM ability_stats WHERE Key = '' AND Raw_Value = 'Can headshot'").fetchone()[0] == 27
+
+
+@pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+def test_search_abilities_by_stat_range_page(wiki):
+    module, _ = wiki
+    response = module.app.test_client().post('/search_type/ability', data={
+        'search_ability_option': 'stat', 'stat_key': 'Damage', 'stat_min': '80', 'stat_max': 'many', 'order': 'desc'})
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert page.index('/hero/hero8/ability/ability8_2') < page.index('/hero/hero8/ability/ability8_0')
+    assert 'Ability7_2' not in page
+    assert 'Ignored the fields that are not numbers: stat_max' in page
+    assert module.app.test_client().get('/hero/hero8/ability/ability8_2').status_code == 200
@@ -0,0 +1,47 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the comparison charts of the Flask app are cached once per role
+whatever its spelling, and drawn with the hero names of the requested locale.
+
+Usage: python -m pytest tests
+'''
+
+import json
+import pytest
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+
+def test_role_spellings_share_a_chart(wiki):
+    module, _ = wiki
+    module.cached_comparison_chart.cache_clear()
+    data_version = module.get_data_version()
+    chart = module.comparison_chart('tank', 1, data_version)
+    assert module.comparison_chart(' Tank ', 1, data_version) is chart
+    assert module.comparison_chart('TANK', 1, data_version) is chart
+    assert module.cached_comparison_chart.cache_info().currsize == 1
+    assert module.comparison_chart('All', 1, data_version) is module.comparison_chart(None, 1, data_version)
+
+
+def test_charts_use_the_names_of_the_locale(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    default_chart = client.get('/api/chart/tank/health')
+    german_chart = client.get('/api/chart/tank/health?locale=de-de')
+    assert json.loads(default_chart.get_data())['names'] == ['Hero6', 'Hero3', 'Hero0']
+    assert json.loads(german_chart.get_data())['names'] == ['Held6', 'Held3', 'Held0']
+    assert default_chart.headers['ETag'] != german_chart.headers['ETag']
+    assert '/api/chart/tank/health?locale=de-de' in client.get('/compare/tank/health?locale=de-de').get_data(as_text=True)
+
+
+def test_chart_data_is_found_by_metric_slug(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    for metric in module.CMP_METRIC_CHOICES:
+        assert client.get('/api/chart/all/' + metric).status_code == 200, metric
+    assert client.get('/api/chart/Tank/Health').get_data() == client.get('/api/chart/tank/health').get_data()
+    assert client.get('/api/chart/tank/1').status_code == 404
+    assert client.get('/api/chart/no-such-role/health').status_code == 404
@@ -0,0 +1,46 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the Flask app sends its pages compressed in the encoding the
+client accepts, with Vary: Accept-Encoding, and never compresses pages that
+were not found.
+
+Usage: python -m pytest tests
+'''
+
+import gzip
+import pytest
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+
+def test_gzip_is_sent_to_clients_accepting_it(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    plain = client.get('/hero/hero1', headers={'Accept-Encoding': 'identity'})
+    assert plain.status_code == 200 and 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    compressed = client.get('/hero/hero1', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    ## the same content in other bytes, with the same weak ETag
+    assert compressed.headers['ETag'] == plain.headers['ETag'] and plain.headers['ETag'].startswith('W/')
+
+
+def test_refused_encodings_are_not_sent(wiki):
+    module, _ = wiki
+    response = module.app.test_client().get('/hero/hero1', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert response.status_code == 200 and 'Content-Encoding' not in response.headers
+
+
+def test_pages_not_found_are_not_compressed(wiki, monkeypatch):
+    module, _ = wiki
+    ## the page would be worth compressing, however small
+    monkeypatch.setattr(module, 'COMPRESSION_MIN_BYTES', 0)
+    compressions = module.compression_stats('handle_hero')['compressions']
+    response = module.app.test_client().get('/hero/no-such-hero', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 404 and 'Content-Encoding' not in response.headers
+    assert module.compression_stats('handle_hero')['compressions'] == compressions
@@ -0,0 +1,94 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the cacheable pages of the Flask app answer conditional requests
+for the data being served with 304 Not Modified, and with the page otherwise.
+
+Usage: python -m pytest tests
+'''
+
+from collections import OrderedDict
+from datetime import timedelta
+import pytest
+from conftest import build_hero_dicts
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+
+def test_if_none_match(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    page = client.get('/hero/hero1', headers={'Accept-Encoding': 'identity'})
+    assert page.status_code == 200 and page.headers['ETag'] and page.headers['Last-Modified']
+    cache_lookups = module.RESPONSE_CACHE_STATS['hits'] + module.RESPONSE_CACHE_STATS['misses']
+    not_modified = client.get('/hero/hero1', headers={'If-None-Match': page.headers['ETag'], 'Accept-Encoding': 'identity'})
+    assert not_modified.status_code == 304 and not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == page.headers['ETag']
+    ## answered without looking at the response cache
+    assert module.RESPONSE_CACHE_STATS['hits'] + module.RESPONSE_CACHE_STATS['misses'] == cache_lookups
+    ## the weak ETag of the compressed page matches too, and its 304 carries the same weak ETag
+    compressed = client.get('/hero/hero1', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip' and compressed.headers['ETag'].startswith('W/')
+    not_modified = client.get('/hero/hero1', headers={'If-None-Match': compressed.headers['ETag'], 'Accept-Encoding': 'gzip'})
+    assert not_modified.status_code == 304 and not_modified.headers['ETag'] == compressed.headers['ETag']
+    assert 'Accept-Encoding' in not_modified.headers['Vary']
+    assert client.get('/hero/hero1', headers={'If-None-Match': '"another-version-en-us"'}).status_code == 200
+    ## the page of another locale has another ETag
+    assert client.get('/hero/hero1?locale=de-de', headers={'If-None-Match': page.headers['ETag']}).status_code == 200
+
+
+def test_if_modified_since(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    page = client.get('/role/tank')
+    built_at = page.last_modified
+    assert client.get('/role/tank', headers={'If-Modified-Since': page.headers['Last-Modified']}).status_code == 304
+    assert client.get('/role/tank', headers={'If-Modified-Since': (built_at - timedelta(days=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')}).status_code == 200
+    ## If-None-Match takes precedence over If-Modified-Since
+    assert client.get('/role/tank', headers={'If-Modified-Since': page.headers['Last-Modified'], 'If-None-Match': '"another-version-en-us"'}).status_code == 200
+
+
+def test_rebuilt_data_is_sent_again(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    page = client.get('/hero/hero1')
+    locale_hero_dicts = build_hero_dicts(module)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    rebuilt = client.get('/hero/hero1', headers={'If-None-Match': page.headers['ETag']})
+    assert rebuilt.status_code == 200 and rebuilt.headers['ETag'] != page.headers['ETag']
+
+
+def test_pages_not_found_are_never_not_modified(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    page = client.get('/hero/hero1')
+    missing = client.get('/hero/nope', headers={'If-None-Match': page.headers['ETag'], 'If-Modified-Since': page.headers['Last-Modified']})
+    assert missing.status_code == 404 and 'ETag' not in missing.headers
+
+
+def test_not_modified_runs_no_search(wiki, monkeypatch):
+    module, _ = wiki
+    client = module.app.test_client()
+    paths = ['/hero/hero1', '/hero/hero1/abilities', '/hero/hero1/ability/ability1_0', '/role/tank', '/compare/support/health']
+    etag = client.get(paths[0]).headers['ETag']
+    monkeypatch.setattr(module, 'RESPONSE_CACHE', OrderedDict())
+    def no_search(*args, **kwargs):
+        raise AssertionError('searched for a page that is not modified')
+    for search in ['search_hero_page_by_slug', 'search_ablility_table_by_hero_slug', 'search_hero_table_by_role', 'comparison_chart']:
+        monkeypatch.setattr(module, search, no_search)
+    for path in paths:
+        assert client.get(path, headers={'If-None-Match': etag}).status_code == 304, path
+
+
+def test_known_pages_are_found(wiki):
+    module, _ = wiki
+    client = module.app.test_client()
+    with module.app.test_request_context():
+        keys = module.known_page_keys(module.get_data_version(), 'de-de')
+        paths = [module.url_for(view_name, **dict(view_args), locale=locale) for view_name, view_args, locale in keys]
+    ## every hero and its ability list, every ability, every role, and every role and all heroes by every metric
+    assert len(paths) == 9 * 2 + 27 + 3 + 4 * len(module.CMP_METRIC_CHOICES)
+    for path in paths:
+        assert client.get(path).status_code == 200, path
@@ -0,0 +1,43 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the Parquet and Arrow IPC files written by export_wiki_database of the
+command line program.
+
+Usage: python -m pytest tests
+'''
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.ipc
+import pyarrow.parquet
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_commandline'], indirect=True)
+
+
+def test_export_round_trips_parquet_and_arrow(wiki, tmp_path, monkeypatch):
+    module, cur = wiki
+    ## the export reads the file itself, never the read connections of a memory snapshot
+    monkeypatch.setattr(module, 'read_connection', None)
+    paths = module.export_wiki_database(tmp_path / 'export')
+    assert sorted(path.name for path in paths) == sorted(table + suffix for table in module.EXPORT_TABLES for suffix in ['.parquet', '.arrow'])
+    for table in module.EXPORT_TABLES:
+        parquet_table = pa.parquet.read_table(tmp_path / 'export' / (table + '.parquet'))
+        with pa.ipc.open_file(tmp_path / 'export' / (table + '.arrow')) as reader:
+            arrow_table = reader.read_all()
+        row_count = cur.execute('SELECT count(*) FROM "' + table + '"').fetchone()[0]
+        assert parquet_table.num_rows == arrow_table.num_rows == row_count, table
+        assert parquet_table.to_pylist() == arrow_table.to_pylist()
+
+    with pa.ipc.open_file(tmp_path / 'export' / 'heroes.arrow') as reader:
+        heroes = reader.read_all()
+    for column in ['Pick_Rate', 'Win_Rate', 'Tie_Rate', 'OnFire_Rate', 'Health_Base', 'Armor_Base', 'Shield_Base']:
+        assert heroes.schema.field(column).type == pa.float64(), column
+    for column in ['Role', 'Nationality']:
+        assert pa.types.is_dictionary(heroes.schema.field(column).type), column
+        assert pa.types.is_dictionary(pa.parquet.read_schema(tmp_path / 'export' / 'heroes.parquet').field(column).type), column
+    assert sorted(heroes.column('Health_Base').to_pylist()) == [200.0 + 25 * i for i in range(9)]
+    assert heroes.column('Role').to_pylist()[:3] == ['Tank', 'Damage', 'Support']
@@ -0,0 +1,46 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the pages of the hero filter sorted by name follow the names shown
+in the locale of the filter, not the names of the default locale.
+
+Usage: python -m pytest tests
+'''
+
+from conftest import build_hero_dicts
+
+## German names in the reverse order of the default ones, in mixed case
+GERMAN_NAMES = ['Zenit', 'yak', 'Xaver', 'wolke', 'Vogel', 'ulme', 'Tanne', 'sonne', 'Regen']
+
+
+def build_renamed_wiki(module):
+    ''' Rebuild the wiki with the German names of the heroes in GERMAN_NAMES'''
+    locale_hero_dicts = build_hero_dicts(module)
+    for i, name in enumerate(GERMAN_NAMES):
+        locale_hero_dicts['de-de']['held' + str(i)].name = name
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+
+
+def filter_names(module, **criteria):
+    ''' Walk every page of the hero filter two heroes at a time, and return the shown names'''
+    names = []
+    after = None
+    while (True):
+        heroes, after = module.filter_hero_table(after=after, page_size=2, row_factory=module.hero_row_factory, **criteria)
+        names.extend(hero.name for hero in heroes)
+        if (after is None):
+            return names
+
+
+def test_name_pages_follow_the_localised_names(wiki):
+    module, _ = wiki
+    build_renamed_wiki(module)
+    names = filter_names(module, sort='name', locale='de-de')
+    assert names == sorted(GERMAN_NAMES, key=str.lower)
+    names = filter_names(module, sort='name', descending=True, locale='de-de')
+    assert names == sorted(GERMAN_NAMES, key=str.lower, reverse=True)
+    names = filter_names(module, role='Tank', sort='name', locale='de-de')
+    assert names == ['Tanne', 'wolke', 'Zenit']
+    assert filter_names(module, sort='name') == ['Hero' + str(i) for i in range(9)]
@@ -0,0 +1,56 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the selection of heroes from the hero stats store behind the
+comparison charts.
+
+Usage: python -m pytest tests
+'''
+
+import pytest
+
+
+def test_select_hero_stats_by_role(wiki):
+    module, _ = wiki
+    store = module.load_hero_stats_store()
+    assert list(module.select_hero_stats(store)['slug']) == ['hero' + str(i) for i in range(9)]
+    tanks = module.select_hero_stats(store, 'TANK')
+    assert list(tanks['slug']) == ['hero0', 'hero3', 'hero6']
+    assert list(tanks['health']) == [200.0, 275.0, 350.0]
+
+
+def test_select_hero_stats_sorted(wiki):
+    module, _ = wiki
+    store = module.load_hero_stats_store()
+    ## heroes with the same value keep their Id order
+    assert list(module.select_hero_stats(store, 'Tank', 'shield')['slug']) == ['hero3', 'hero0', 'hero6']
+    assert list(module.select_hero_stats(store, 'Tank', 'shield', descending=False)['slug']) == ['hero0', 'hero6', 'hero3']
+    supports = module.select_hero_stats(store, 'support', 'win_rate')
+    assert list(supports['slug']) == ['hero8', 'hero5', 'hero2']
+    assert list(supports['win_rate']) == [53.0, 50.0, 47.0]
+
+
+def test_select_top_hero_stats(wiki):
+    module, _ = wiki
+    store = module.load_hero_stats_store()
+    assert list(module.select_hero_stats(store, sort='health', top=2)['slug']) == ['hero8', 'hero7']
+    assert list(module.select_hero_stats(store, sort='health', descending=False, top=3)['slug']) == ['hero0', 'hero1', 'hero2']
+    ## the top heroes are the first ones of the full sort, ties included
+    for top in range(len(store['slug']) + 2):
+        assert list(module.select_hero_stats(store, sort='shield', top=top)['slug']) == list(module.select_hero_stats(store, sort='shield')['slug'][:top])
+    assert list(module.select_hero_stats(store, 'Tank', top=2)['slug']) == ['hero0', 'hero3']
+
+
+def test_select_normalised_hero_stats(wiki):
+    module, _ = wiki
+    store = module.load_hero_stats_store()
+    tanks = module.select_hero_stats(store, 'Tank', normalise='minmax')
+    assert list(tanks['health']) == [0.0, 0.5, 1.0]
+    assert list(tanks['tie_rate']) == [0.0, 0.0, 0.0]
+    tanks = module.select_hero_stats(store, 'Tank', normalise='zscore')
+    assert abs(tanks['health'].mean()) < 1e-9 and abs(tanks['health'].std() - 1) < 1e-9
+    assert list(module.select_hero_stats(store, 'Tank', normalise='zscore', top=1)['health']) == [0.0]
+    with pytest.raises(ValueError):
+        module.select_hero_stats(store, normalise='log')
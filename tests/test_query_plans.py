@@ -0,0 +1,40 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check through EXPLAIN QUERY PLAN that every search query of both programs is
+answered through the index it was written for, on a small made-up database
+built by create_wiki_database.
+
+Usage: python -m pytest tests
+'''
+
+import re
+
+
+def filter_query_plan_checks(module):
+    ''' The filter queries of build_hero_filter_query, with the step their query plan must have'''
+    return [
+        module.build_hero_filter_query(role='Tank', sort='win_rate', descending=True, after=(50.0, 1))
+            + (r'SEARCH heroes USING INDEX idx_heroes_role_win_rate ',),
+        module.build_hero_filter_query(ranges={'health': (200, None)}, sort='health')
+            + (r'SEARCH heroes USING INDEX idx_heroes_health ',),
+        module.build_hero_filter_query(role='Support', ranges={'pick_rate': (1, 5)}, sort='name', after=('Ana', 1))
+            + (r'SEARCH heroes USING INDEX idx_heroes_role_name ',),
+        module.build_hero_filter_query(nationality='Egyptian', sort='armor')
+            + (r'SEARCH heroes USING INDEX idx_heroes_nationality ',),
+        module.build_hero_filter_query(affiliation='Overwatch', sort='shield', descending=True)
+            + (r'SCAN heroes_fts VIRTUAL TABLE INDEX \d+:M',)
+    ]
+
+
+def test_search_queries_use_their_index(wiki):
+    module, cur = wiki
+    for query, params, expected_step in module.search_query_plan_checks + filter_query_plan_checks(module):
+        plan = [plan_row[3] for plan_row in cur.execute('EXPLAIN QUERY PLAN ' + query, params).fetchall()]
+        assert any(re.match(expected_step, step) for step in plan), (expected_step, plan, query)
+        for step in plan:
+            ## a table is only read in full through a full-text or json_each table, or as the expected index scan
+            if (step.startswith('SCAN ') and 'VIRTUAL TABLE' not in step):
+                assert re.match(expected_step, step), (step, query)
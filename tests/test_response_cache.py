@@ -0,0 +1,99 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the response cache of the Flask app evicts the least recently used
+pages once they take more than RESPONSE_CACHE_BYTES, and drops all of them when
+the data version changes.
+
+Usage: python -m pytest tests
+'''
+
+from collections import OrderedDict
+import pytest
+from conftest import build_hero_dicts
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+PAGE_BYTES = 400 # below COMPRESSION_MIN_BYTES, so a page takes its body's bytes
+
+
+@pytest.fixture
+def cache(wiki, monkeypatch):
+    ''' An empty response cache with room for three pages, and the renders of the pages it is asked for'''
+    module, _ = wiki
+    monkeypatch.setattr(module, 'RESPONSE_CACHE', OrderedDict())
+    monkeypatch.setattr(module, 'RESPONSE_CACHE_STATS', {'data_version': None, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0})
+    monkeypatch.setattr(module, 'RESPONSE_CACHE_BYTES', 3 * PAGE_BYTES)
+    renders = []
+
+    def get(name, data_version='v1', size=PAGE_BYTES):
+        def render():
+            renders.append(name)
+            return module.Response(name[0] * size, mimetype='text/html')
+        return module.cached_response(('handle_test', name, 'en-us'), data_version, render)
+    return module, get, renders
+
+
+def test_least_recently_used_pages_are_evicted_by_bytes(cache):
+    module, get, renders = cache
+    for name in ['a', 'b', 'c']:
+        get(name)
+    get('a')
+    assert renders == ['a', 'b', 'c']
+    get('d')
+    assert [key[1] for key in module.RESPONSE_CACHE] == ['c', 'a', 'd']
+    assert module.RESPONSE_CACHE_STATS['bytes'] == 3 * PAGE_BYTES
+    assert module.RESPONSE_CACHE_STATS['evictions'] == 1
+    ## a page twice the size makes room for itself
+    get('e', size=2 * PAGE_BYTES)
+    assert [key[1] for key in module.RESPONSE_CACHE] == ['d', 'e']
+    assert module.RESPONSE_CACHE_STATS['bytes'] == 3 * PAGE_BYTES
+    get('b')
+    assert renders == ['a', 'b', 'c', 'd', 'e', 'b']
+
+
+def test_pages_larger_than_the_cache_are_not_kept(cache):
+    module, get, _ = cache
+    get('a')
+    body = get('f', size=4 * PAGE_BYTES)[0]
+    assert len(body) == 4 * PAGE_BYTES
+    assert [key[1] for key in module.RESPONSE_CACHE] == ['a']
+
+
+def test_a_new_data_version_drops_the_cache(cache):
+    module, get, renders = cache
+    get('a')
+    get('b')
+    get('a', data_version='v2')
+    assert renders == ['a', 'b', 'a']
+    assert [key[1] for key in module.RESPONSE_CACHE] == ['a']
+    assert module.RESPONSE_CACHE_STATS['bytes'] == PAGE_BYTES
+    assert module.RESPONSE_CACHE_STATS['invalidations'] == 1
+
+
+def test_a_rebuild_renders_the_pages_again(cache, monkeypatch):
+    module, _, _ = cache
+    monkeypatch.setattr(module, 'RESPONSE_CACHE_BYTES', 1024 * 1024)
+    client = module.app.test_client()
+    client.get('/hero/hero1')
+    client.get('/hero/hero1')
+    assert client.get('/metrics/response_cache').get_json()['hits'] == 1
+    locale_hero_dicts = build_hero_dicts(module)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    client.get('/hero/hero1')
+    metrics = client.get('/metrics/response_cache').get_json()
+    assert (metrics['hits'], metrics['misses'], metrics['invalidations'], metrics['entries']) == (1, 2, 1, 1)
+
+
+def test_spellings_of_a_role_share_one_page(cache, monkeypatch):
+    module, _, _ = cache
+    monkeypatch.setattr(module, 'RESPONSE_CACHE_BYTES', 1024 * 1024)
+    client = module.app.test_client()
+    pages = [client.get(path) for path in ['/role/tank', '/role/TANK', '/role/Tank']]
+    assert all(page.status_code == 200 and page.get_data() == pages[0].get_data() for page in pages)
+    assert client.get('/compare/TANK/Health').status_code == 200
+    assert client.get('/compare/tank/health').status_code == 200
+    assert sorted(key[:2] for key in module.RESPONSE_CACHE) == [('handle_compare', (('metric', 'health'), ('role', 'tank'))),
+        ('handle_role', (('role', 'tank'),))]
@@ -0,0 +1,53 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the rank, percentile, mean, median and standard deviation of every hero
+within its role in the hero_role_stats table.
+
+Usage: python -m pytest tests
+'''
+
+import statistics
+import pytest
+from conftest import build_hero_dicts
+
+
+def role_stats(module, hero_slug, label):
+    ''' Return the (value, rank, count, percentile, mean, median, stddev) of a hero on one metric'''
+    for row in module.search_hero_role_stats([hero_slug])[hero_slug]:
+        if (row[0] == label):
+            return row[1:]
+    return None
+
+
+def test_role_stats_of_an_odd_role(wiki):
+    module, _ = wiki
+    ## the tanks are hero0, hero3 and hero6 with 200, 275 and 350 health
+    health = [200.0, 275.0, 350.0]
+    assert role_stats(module, 'hero6', 'Health') == pytest.approx(
+        (350.0, 1, 3, 100.0, statistics.mean(health), 275.0, statistics.pstdev(health)))
+    assert role_stats(module, 'hero3', 'Health')[1:4] == (2, 3, 50.0)
+    assert role_stats(module, 'hero0', 'Health')[1:4] == (3, 3, 0.0)
+
+
+def test_role_stats_with_ties(wiki):
+    module, _ = wiki
+    ## the tanks have 0, 50 and 0 shield
+    shield = [0.0, 50.0, 0.0]
+    assert role_stats(module, 'hero3', 'Shield') == pytest.approx(
+        (50.0, 1, 3, 100.0, statistics.mean(shield), 0.0, statistics.pstdev(shield)))
+    assert role_stats(module, 'hero0', 'Shield')[1:4] == role_stats(module, 'hero6', 'Shield')[1:4] == (2, 3, 0.0)
+
+
+def test_role_stats_of_an_even_role(wiki):
+    module, _ = wiki
+    locale_hero_dicts = build_hero_dicts(module, hero_count=8)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    ## the supports are hero2 and hero5, the median is the mean of the two
+    win_rate = [47.0, 50.0]
+    assert role_stats(module, 'hero5', 'Win rate') == pytest.approx(
+        (50.0, 1, 2, 100.0, 48.5, statistics.median(win_rate), statistics.pstdev(win_rate)))
+    assert role_stats(module, 'hero2', 'Win rate') == pytest.approx(
+        (47.0, 2, 2, 0.0, 48.5, 48.5, 1.5))
@@ -0,0 +1,33 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the column names the row factories pick their values by are the
+columns of the hero and ability queries, in order.
+
+Usage: python -m pytest tests
+'''
+
+
+def test_localised_columns_match_the_queries(wiki):
+    module, cur = wiki
+    hero_queries = [(module.select_localised_heroes, [module.DEFAULT_LOCALE]),
+        (module.search_heroes_by_role, [module.DEFAULT_LOCALE, 'Tank']),
+        module.build_hero_filter_query(sort='win_rate')]
+    for query, params in hero_queries:
+        names = tuple(column[0] for column in cur.execute(query, params).description)
+        assert names[:len(module.LOCALISED_HERO_COLUMNS)] == module.LOCALISED_HERO_COLUMNS
+    names = tuple(column[0] for column in cur.execute(module.search_abilities_by_hero_name, [module.DEFAULT_LOCALE, module.DEFAULT_LOCALE, 'Hero1', 'Hero1']).description)
+    assert names == module.LOCALISED_ABILITY_COLUMNS
+
+
+def test_row_factories_read_the_columns_by_name(wiki):
+    module, cur = wiki
+    cur.row_factory = module.hero_row_factory
+    hero = cur.execute(module.search_heroes_by_name, [module.DEFAULT_LOCALE, 'Hero4', 'Hero4']).fetchone()
+    assert (hero.name, hero.role, hero.slug, hero.health, hero.win_rate, hero.health_base) == ('Hero4', 'Damage', 'hero4', '300', 49.0, 300.0)
+    cur.row_factory = module.ability_row_factory
+    ability = cur.execute(module.search_abilities_by_name, [module.DEFAULT_LOCALE, module.DEFAULT_LOCALE, 'Ability4_1', 'Ability4_1']).fetchone()
+    assert (ability.name, ability.video_url) == ('Ability4_1', 'https://example.com/4_1.mp4')
+    assert ability.stats.startswith('Type: Weapon')
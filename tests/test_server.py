@@ -0,0 +1,84 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the production serving of the Flask app: create_app, a request through
+PooledWSGIServer, the data a forked worker serves, and when the launcher reloads.
+
+Usage: python -m pytest tests
+'''
+
+import socket
+import sqlite3
+import threading
+import urllib.request
+import pytest
+from conftest import build_hero_dicts
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+
+def test_pooled_server_answers_requests(wiki):
+    module, _ = wiki
+    app = module.create_app()
+    listener = socket.create_server(('127.0.0.1', 0))
+    server = module.PooledWSGIServer(app, listener.fileno(), 2)
+    serving = threading.Thread(target=server.serve_forever)
+    serving.start()
+    try:
+        port = listener.getsockname()[1]
+        with urllib.request.urlopen('http://127.0.0.1:' + str(port) + '/hero/hero1', timeout=10) as response:
+            assert response.status == 200 and 'Hero1' in response.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        serving.join()
+        server.executor.shutdown(wait=True)
+        server.server_close()
+        listener.close()
+
+
+def test_create_app_needs_a_database(wiki, tmp_path, monkeypatch):
+    module, _ = wiki
+    monkeypatch.setattr(module, 'wiki_file', tmp_path / 'missing.sqlite')
+    monkeypatch.setattr(module, 'wiki_snapshot_file', tmp_path / 'missing.tar.gz')
+    with pytest.raises(RuntimeError, match='build'):
+        module.create_app()
+
+
+def test_workers_serve_the_preloaded_data_from_the_file(wiki, monkeypatch):
+    module, _ = wiki
+    monkeypatch.setattr(module, 'SERVE_FROM_MEMORY', True)
+    data_version = module.preload_app_data()
+    assert module.MEMORY_SNAPSHOT['anchor'] is None
+    module.prepare_worker()
+    assert not module.SERVE_FROM_MEMORY
+    ## the worker neither checks the file for a new data version nor copies it into memory
+    monkeypatch.setattr(module, 'read_data_version', None)
+    monkeypatch.setattr(module, 'load_memory_snapshot', None)
+    client = module.app.test_client()
+    assert module.get_data_version() == data_version
+    cache_misses = module.RESPONSE_CACHE_STATS['misses']
+    assert client.get('/hero/hero1').status_code == 200
+    assert module.RESPONSE_CACHE_STATS['misses'] == cache_misses
+    ## the pages of other locales were not preloaded, they are read from the file
+    assert 'Held1' in client.get('/hero/hero1?locale=de-de').get_data(as_text=True)
+    with module.read_connection() as connection:
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            connection.execute('CREATE TABLE written (Id INTEGER)')
+    module.clear_app_caches()
+    assert not module.RESPONSE_CACHE and module.cached_comparison_chart.cache_info().currsize == 0
+
+
+def test_reload_only_for_a_readable_new_data_version(wiki, tmp_path, monkeypatch):
+    module, cur = wiki
+    data_version = module.read_file_data_version()
+    assert data_version == module.get_data_version()
+    assert not module.has_new_data_version(data_version)
+    locale_hero_dicts = build_hero_dicts(module)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    assert module.has_new_data_version(data_version)
+    ## a missing file is no reason to reload, and is not created
+    monkeypatch.setattr(module, 'wiki_file', tmp_path / 'missing.sqlite')
+    assert not module.has_new_data_version(data_version)
+    assert not (tmp_path / 'missing.sqlite').exists()
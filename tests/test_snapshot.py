@@ -0,0 +1,86 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that hero_wiki.sqlite is restored from a snapshot file, and that a
+snapshot whose database does not match its checksum or format is refused
+without touching the database.
+
+Usage: python -m pytest tests
+'''
+
+import io
+import json
+import sqlite3
+import tarfile
+import pytest
+from conftest import build_hero_dicts
+
+
+def rewrite_snapshot(snapshot_path, change_manifest=None, change_database=None):
+    ''' Write a copy of a snapshot file with its manifest or database bytes changed'''
+    with tarfile.open(snapshot_path, 'r:gz') as snapshot:
+        manifest = json.load(snapshot.extractfile('manifest.json'))
+        database_bytes = snapshot.extractfile(manifest['database']).read()
+    if (change_manifest):
+        change_manifest(manifest)
+    if (change_database):
+        database_bytes = change_database(database_bytes)
+    changed_path = snapshot_path.with_name('changed_' + snapshot_path.name)
+    with tarfile.open(changed_path, 'w:gz') as snapshot:
+        for name, body in [('manifest.json', json.dumps(manifest).encode('utf-8')), (manifest['database'], database_bytes)]:
+            info = tarfile.TarInfo(name)
+            info.size = len(body)
+            snapshot.addfile(info, io.BytesIO(body))
+    return changed_path
+
+
+def hero_count(module):
+    connection = sqlite3.connect(module.wiki_file)
+    count = connection.execute('SELECT count(*) FROM heroes').fetchone()[0]
+    connection.close()
+    return count
+
+
+@pytest.fixture
+def snapshot(wiki, tmp_path):
+    ''' Snapshot the 9 heroes of the wiki, then rebuild it with 3 heroes'''
+    module, _ = wiki
+    snapshot_path = tmp_path / 'hero_wiki_snapshot.tar.gz'
+    manifest = module.create_wiki_snapshot_file(snapshot_path)
+    locale_hero_dicts = build_hero_dicts(module, hero_count=3)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    return module, snapshot_path, manifest
+
+
+def test_snapshot_is_restored(snapshot):
+    module, snapshot_path, manifest = snapshot
+    assert module.restore_wiki_snapshot_file(snapshot_path) == manifest
+    assert hero_count(module) == 9
+
+
+def test_snapshot_with_a_wrong_checksum_is_refused(snapshot):
+    module, snapshot_path, _ = snapshot
+    changed_path = rewrite_snapshot(snapshot_path, change_manifest=lambda manifest: manifest.update(sha256='0' * 64))
+    with pytest.raises(ValueError, match='checksum'):
+        module.restore_wiki_snapshot_file(changed_path)
+    assert hero_count(module) == 3
+    assert not module.wiki_file.with_name(module.wiki_file.name + '.restore').exists()
+
+
+def test_damaged_snapshot_database_is_refused(snapshot):
+    module, snapshot_path, _ = snapshot
+    ## flip a byte in the middle of the database, keeping the checksum of the original
+    changed_path = rewrite_snapshot(snapshot_path, change_database=lambda body: body[:len(body) // 2] + bytes([body[len(body) // 2] ^ 0xFF]) + body[len(body) // 2 + 1:])
+    with pytest.raises(ValueError, match='checksum'):
+        module.restore_wiki_snapshot_file(changed_path)
+    assert hero_count(module) == 3
+
+
+def test_snapshot_of_another_format_is_refused(snapshot):
+    module, snapshot_path, _ = snapshot
+    changed_path = rewrite_snapshot(snapshot_path, change_manifest=lambda manifest: manifest.update(format=module.SNAPSHOT_FILE_FORMAT - 1))
+    with pytest.raises(ValueError, match='format'):
+        module.restore_wiki_snapshot_file(changed_path)
+    assert hero_count(module) == 3
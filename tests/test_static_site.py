@@ -0,0 +1,54 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the static site written by export_static_site.
+
+Usage: python -m pytest tests
+'''
+
+import pytest
+from conftest import build_hero_dicts
+
+pytestmark = pytest.mark.parametrize('wiki', ['final_proj_flask'], indirect=True)
+
+
+def test_export_only_writes_changed_or_missing_files(wiki, tmp_path):
+    module, _ = wiki
+    site = tmp_path / 'site'
+    first = module.export_static_site(site)
+    assert first['written'] > 0 and first['rendered'] == first['written'] and first['unchanged'] == 0
+    assert module.export_static_site(site) == {'rendered': 0, 'written': 0, 'unchanged': first['written'], 'removed': 0}
+    (site / 'index.html.gz').unlink()
+    assert module.export_static_site(site)['written'] == 1
+    assert (site / 'index.html.gz').exists()
+
+
+def test_export_after_a_rebuild_only_renders_the_pages_whose_data_changed(wiki, tmp_path):
+    module, _ = wiki
+    site = tmp_path / 'site'
+    first = module.export_static_site(site)
+    locale_hero_dicts = build_hero_dicts(module)
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    assert module.export_static_site(site)['rendered'] == 0
+    locale_hero_dicts[module.DEFAULT_LOCALE]['hero1'].quote = 'Another quote!'
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    ## the hero's page, and the index and role listing that show its row
+    counts = module.export_static_site(site)
+    assert counts['rendered'] == 3 and counts['unchanged'] == first['written'] - counts['written']
+    assert 'Another quote!' in (site / 'hero' / 'hero1.html').read_text(encoding='utf-8')
+
+
+def test_heroes_of_the_same_name_get_their_own_pages(wiki, tmp_path):
+    module, _ = wiki
+    locale_hero_dicts = build_hero_dicts(module)
+    for hero_dict in locale_hero_dicts.values():
+        hero = hero_dict.pop('hero2') if 'hero2' in hero_dict else hero_dict.pop('held2')
+        hero.name = hero.name.upper().replace('2', '1')
+        hero_dict['hero1 (2)'] = hero
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    site = tmp_path / 'site'
+    module.export_static_site(site)
+    assert 'Role: Damage' in (site / 'hero' / 'hero1.html').read_text(encoding='utf-8')
+    assert 'Role: Support' in (site / 'hero' / 'hero2.html').read_text(encoding='utf-8')
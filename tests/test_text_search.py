@@ -0,0 +1,38 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check that the full-text search finds the translated text of the locale it
+searches in, and the text of the default locale for locales that were not built.
+
+Usage: python -m pytest tests
+'''
+
+from conftest import build_hero_dicts
+
+
+def build_translated_wiki(module):
+    ''' Rebuild the wiki with the German description of one ability translated'''
+    locale_hero_dicts = build_hero_dicts(module)
+    locale_hero_dicts['de-de']['held4'].abilities['Ability4_1'].description = 'Eine Barriere, die Verbündete schützt.'
+    module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+
+
+def test_translated_text_is_searched_in_its_locale(wiki):
+    module, _ = wiki
+    build_translated_wiki(module)
+    results = module.search_wiki_text('verbündete', 'de-de')
+    assert [result[:3] for result in results] == [('ability', 'Ability4_1', 'Held4')]
+    assert '[Verbündete]' in results[0][3]
+    assert module.search_wiki_text('verbündete') == []
+    ## the untranslated text of the other abilities is found in the German names
+    assert ('ability', 'Ability0_0', 'Held0') in [result[:3] for result in module.search_wiki_text('barrier', 'de-de', limit=50)]
+
+
+def test_locales_not_built_search_the_default_text(wiki):
+    module, _ = wiki
+    build_translated_wiki(module)
+    assert module.search_wiki_text('verbündete', 'fr-fr') == []
+    results = module.search_wiki_text('barrier', 'fr-fr', limit=50)
+    assert len(results) == 27 and all(result[2].startswith('Hero') for result in results)
@@ -0,0 +1,52 @@
+#################################
+##### Name: Guanru Wang
+##### Uniqname: wguanru
+#################################
+
+'''Check the build of hero_wiki.sqlite by create_wiki_database.
+
+Usage: python -m pytest tests
+'''
+
+import sqlite3
+import pytest
+from conftest import build_hero_dicts
+
+
+class IntegrityFailingCursor(sqlite3.Cursor):
+    ''' A cursor whose integrity check reports a problem'''
+    def execute(self, sql, *args):
+        if (sql == 'PRAGMA integrity_check'):
+            return super().execute("SELECT 'row 1 missing from index idx_heroes_name'")
+        return super().execute(sql, *args)
+
+
+class IntegrityFailingConnection(sqlite3.Connection):
+    def cursor(self, factory=IntegrityFailingCursor):
+        return super().cursor(factory)
+
+
+def test_failed_integrity_check_keeps_the_previous_data(wiki, monkeypatch):
+    module, cur = wiki
+    connect = sqlite3.connect
+    monkeypatch.setattr(module.sqlite3, 'connect', lambda *args, **kwargs: connect(*args, factory=IntegrityFailingConnection, **kwargs))
+    locale_hero_dicts = build_hero_dicts(module, hero_count=3)
+    with pytest.raises(sqlite3.DatabaseError, match='integrity check'):
+        module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    assert cur.execute('SELECT count(*) FROM heroes').fetchone()[0] == 9
+
+
+def test_failed_build_releases_the_database(wiki, monkeypatch):
+    module, cur = wiki
+    def fail_fts_tables(cur, locales):
+        raise RuntimeError('no full-text search')
+    monkeypatch.setattr(module, 'create_fts_tables', fail_fts_tables)
+    locale_hero_dicts = build_hero_dicts(module, hero_count=3)
+    with pytest.raises(RuntimeError, match='full-text search'):
+        module.create_wiki_database(locale_hero_dicts[module.DEFAULT_LOCALE], locale_hero_dicts)
+    ## the rows written before the failure are rolled back and the write lock is free
+    writer = sqlite3.connect(module.wiki_file, timeout=0, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute('ROLLBACK')
+    writer.close()
+    assert cur.execute('SELECT count(*) FROM heroes').fetchone()[0] == 9